@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Google Sheets v4 API
+
+Serves the calls the platform makes (spreadsheets.get, values.get and
+values.batchGet, and Drive files.get for a spreadsheet's version and
+modifiedTime) from in-memory spreadsheets, plus an OAuth token endpoint,
+so sheets_client and sheets_reader can be exercised and benchmarked
+without network or credentials. Responses follow the real API's shape:
+trailing empty cells and rows are left out, ranges come back in
+'Sheet'!A1:B2 form, and errors use Google's error body. `latency` delays
+every response to model the round trip to Google.
+
+Point a client at it with:
+
+    sheets_service(server.service_account_path, api_endpoint=server.url)
+
+Usage:
+    python3 fake_sheets_server.py [--port 8766] [--rows 20000] [--columns 8] [--latency 40]
+"""
+
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from sheets_reader import RangeError, format_range, parse_range
+
+DEFAULT_ID = 'fake-inventory-sheet'
+HEADER = ['SKU', 'Item', 'Vendor', 'Category', 'Location', 'On Hand', 'Par', 'Unit Cost']
+ITEMS = ['Nitrile Gloves', 'Gauze 4x4', 'Suture Kit', 'Lidocaine 1%', 'Alcohol Prep Pad', 'Biopsy Punch 4mm',
+         'Exam Table Paper', 'Specimen Cup', 'Cotton Tip Applicator', 'Bandage Strip']
+VENDORS = ['Henry Schein', 'McKesson', 'Medline', 'Amazon']
+LOCATIONS = ['Ann Arbor', 'Wixom', 'Plymouth']
+
+
+def inventory_rows(rows, columns=len(HEADER), seed=7):
+    """Header plus `rows` synthetic inventory rows, with the odd blank row and blank trailing cells"""
+    rng = random.Random(seed)
+    data = [(HEADER * (columns // len(HEADER) + 1))[:columns]]
+    for n in range(rows):
+        if rng.random() < 0.01:
+            data.append([])
+            continue
+        row = [f"GD-{n:06d}", rng.choice(ITEMS), rng.choice(VENDORS), rng.choice(['Clinical', 'Office', 'Surgical']),
+               rng.choice(LOCATIONS), str(rng.randrange(0, 500)), str(rng.randrange(10, 200)),
+               f"{rng.uniform(0.05, 90):.2f}"]
+        row = (row * (columns // len(row) + 1))[:columns]
+        if rng.random() < 0.05:
+            row = row[:rng.randrange(1, columns)]
+        data.append(row)
+    return data
+
+
+class Spreadsheet:
+    def __init__(self, spreadsheet_id, title, sheets):
+        """`sheets` is [(title, rows)]; each grid is the data size rounded up to 1000 rows"""
+        self.spreadsheet_id = spreadsheet_id
+        self.title = title
+        self.version = 1
+        self.modified = datetime.now(dt_timezone.utc)
+        self.sheets = {}
+        for index, (sheet_title, rows) in enumerate(sheets):
+            self.sheets[sheet_title] = {
+                'index': index,
+                'rows': rows,
+                'row_count': max(1000, -(-len(rows) // 1000) * 1000),
+                'column_count': max([26] + [len(row) for row in rows]),
+            }
+
+    def metadata(self):
+        return {
+            'spreadsheetId': self.spreadsheet_id,
+            'properties': {'title': self.title},
+            'sheets': [{'properties': {'sheetId': sheet['index'], 'title': title, 'index': sheet['index'],
+                                       'sheetType': 'GRID',
+                                       'gridProperties': {'rowCount': sheet['row_count'],
+                                                          'columnCount': sheet['column_count']}}}
+                       for title, sheet in self.sheets.items()],
+        }
+
+    def drive_file(self):
+        """The Drive files.get fields a sync checks"""
+        return {'id': self.spreadsheet_id, 'name': self.title, 'version': str(self.version),
+                'modifiedTime': self.modified.isoformat(timespec='milliseconds').replace('+00:00', 'Z')}
+
+    def set_values(self, sheet, first_row, first_col, rows):
+        """Write `rows` with the top-left cell at 1-based row, 0-based column, like values.update"""
+        data = self.sheets[sheet]['rows']
+        for offset, values in enumerate(rows):
+            index = first_row - 1 + offset
+            data.extend([] for _ in range(index + 1 - len(data)))
+            row = data[index] = list(data[index])
+            row.extend('' for _ in range(first_col + len(values) - len(row)))
+            row[first_col:first_col + len(values)] = values
+        self.sheets[sheet]['row_count'] = max(self.sheets[sheet]['row_count'], len(data))
+        self.sheets[sheet]['column_count'] = max([self.sheets[sheet]['column_count']] + [len(row) for row in rows])
+        self.version += 1
+        self.modified = datetime.now(dt_timezone.utc)
+
+    def values(self, a1):
+        """The ValueRange values.get returns for one range"""
+        span = parse_range(a1)
+        title = span.sheet if span.sheet is not None else next(iter(self.sheets))
+        sheet = self.sheets.get(title)
+        if sheet is None:
+            raise RangeError(f"Unable to parse range: {a1}")
+        last_row = min(sheet['row_count'] if span.last_row is None else span.last_row, sheet['row_count'])
+        last_col = min(sheet['column_count'] - 1 if span.last_col is None else span.last_col, sheet['column_count'] - 1)
+        if span.first_row > sheet['row_count'] or span.first_col > last_col:
+            raise RangeError(f"Range ({a1}) exceeds grid limits. Max rows: {sheet['row_count']}, "
+                             f"max columns: {sheet['column_count']}")
+        values = [row[span.first_col:last_col + 1] for row in sheet['rows'][span.first_row - 1:last_row]]
+        values = [row[:max((i + 1 for i, cell in enumerate(row) if cell != ''), default=0)] for row in values]
+        while values and not values[-1]:
+            values.pop()
+        value_range = {'range': format_range(span._replace(sheet=title, last_row=last_row, last_col=last_col)),
+                       'majorDimension': 'ROWS'}
+        if values:
+            value_range['values'] = values
+        return value_range
+
+
+class FakeSheetsServer:
+    """
+    The fake API on a local port; use as a context manager or start()/stop()
+
+    `spreadsheets` defaults to one inventory spreadsheet (DEFAULT_ID) with
+    `rows` data rows. service_account_path is a throwaway key whose
+    token_uri points here.
+    """
+
+    def __init__(self, spreadsheets=None, rows=20000, columns=len(HEADER), latency=0.0, port=0):
+        if spreadsheets is None:
+            spreadsheets = [Spreadsheet(DEFAULT_ID, 'Ganger Inventory (fake)',
+                                        [('Inventory', inventory_rows(rows, columns)), ('Vendors', [['Vendor']] +
+                                                                                        [[v] for v in VENDORS])])]
+        self.spreadsheets = {s.spreadsheet_id: s for s in spreadsheets}
+        self.latency = latency
+        self.requests = {'token': 0, 'get': 0, 'values.get': 0, 'values.batchGet': 0, 'drive.get': 0}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), _handler(self))
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/"
+        self._workdir = None
+        self.service_account_path = None
+
+    def count(self, kind):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def start(self):
+        self._workdir = tempfile.mkdtemp(prefix='fake-sheets-')
+        self.service_account_path = write_service_account(
+            os.path.join(self._workdir, 'service-account.json'), self.url + 'token')
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._workdir:
+            for name in os.listdir(self._workdir):
+                os.remove(os.path.join(self._workdir, name))
+            os.rmdir(self._workdir)
+            self._workdir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def write_service_account(path, token_uri):
+    """A service account key file with a freshly generated key, for `token_uri`"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption()).decode('ascii')
+    with open(path, 'w') as f:
+        json.dump({'type': 'service_account', 'project_id': 'fake-sheets', 'private_key_id': 'fake-sheets',
+                   'private_key': pem, 'client_email': 'fake-sheets@fake-sheets.iam.gserviceaccount.com',
+                   'client_id': '0', 'token_uri': token_uri}, f)
+    os.chmod(path, 0o600)
+    return path
+
+
+_STATUS = {400: 'INVALID_ARGUMENT', 404: 'NOT_FOUND'}
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, as googleapis.com
+
+        def log_message(self, format, *args):
+            pass
+
+        def reply(self, status, payload):
+            if server.latency:
+                time.sleep(server.latency)
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def error(self, status, message):
+            self.reply(status, {'error': {'code': status, 'message': message, 'status': _STATUS[status]}})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+            if self.headers.get('X-HTTP-Method-Override') == 'GET':
+                # googleapiclient sends GETs with long URLs this way
+                return self.do_GET(body)
+            if urlsplit(self.path).path == '/token':
+                server.count('token')
+                return self.reply(200, {'access_token': f"fake-token-{time.time_ns()}", 'expires_in': 3600,
+                                        'token_type': 'Bearer'})
+            self.error(404, f"Method not found: POST {self.path}")
+
+        def do_GET(self, form=''):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            for key, values in parse_qs(form).items():
+                query.setdefault(key, []).extend(values)
+            parts = url.path.split('/')
+            if parts[1:4] == ['drive', 'v3', 'files'] and len(parts) == 5:
+                spreadsheet = server.spreadsheets.get(unquote(parts[4]))
+                if spreadsheet is None:
+                    return self.error(404, f"File not found: {unquote(parts[4])}.")
+                server.count('drive.get')
+                return self.reply(200, spreadsheet.drive_file())
+            if len(parts) < 4 or parts[1:3] != ['v4', 'spreadsheets']:
+                return self.error(404, f"Method not found: GET {url.path}")
+            spreadsheet_id, _, method = unquote(parts[3]).partition(':')
+            spreadsheet = server.spreadsheets.get(spreadsheet_id)
+            if spreadsheet is None:
+                return self.error(404, 'Requested entity was not found.')
+            try:
+                if len(parts) == 4 and not method:
+                    server.count('get')
+                    return self.reply(200, spreadsheet.metadata())
+                if len(parts) == 5 and parts[4] == 'values:batchGet':
+                    server.count('values.batchGet')
+                    return self.reply(200, {'spreadsheetId': spreadsheet_id,
+                                            'valueRanges': [spreadsheet.values(a1) for a1 in query.get('ranges', [])]})
+                if len(parts) >= 6 and parts[4] == 'values':
+                    server.count('values.get')
+                    return self.reply(200, spreadsheet.values(unquote('/'.join(parts[5:]))))
+            except RangeError as e:
+                return self.error(400, str(e))
+            self.error(404, f"Method not found: GET {url.path}")
+
+    return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve a fake Google Sheets v4 API locally')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--rows', type=int, default=20000, help='rows in the fake inventory sheet')
+    parser.add_argument('--columns', type=int, default=len(HEADER))
+    parser.add_argument('--latency', type=float, default=0.0, help='milliseconds added to every response')
+    args = parser.parse_args()
+
+    with FakeSheetsServer(rows=args.rows, columns=args.columns, latency=args.latency / 1000, port=args.port) as server:
+        print(f"🧪 Fake Sheets API on {server.url} ({args.rows:,} rows, {args.latency:g} ms latency)")
+        print(f"   spreadsheet id:  {DEFAULT_ID}")
+        print(f"   service account: {server.service_account_path}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -1,10 +1,18 @@
 #!/usr/bin/env python3
 import csv
 import re
+import sys
 from collections import defaultdict
 from datetime import datetime
 
+from stage_profiler import StageProfiler
+from title_normalizer import amazon_normalizer
+from topk import TopK
+
+profiler = StageProfiler.from_argv()
+
 # Read the CSV file
+profiler.mark('load')
 orders = []
 with open('orders_from_20240707_to_20250707_20250707_1040.csv', 'r', encoding='utf-8') as f:
     reader = csv.DictReader(f)
@@ -23,8 +31,14 @@ item_analysis = defaultdict(lambda: {
     'full_titles': []
 })
 
+# Normalize the whole title column up front; repeated titles hit the cache
+profiler.mark('parse')
+normalizer = amazon_normalizer()
+normalized_titles = normalizer.normalize_many([order.get('Title', '') for order in orders])
+
 # Process each order
-for order in orders:
+profiler.mark('aggregate')
+for order, normalized_title in zip(orders, normalized_titles):
     title = order.get('Title', '')
     quantity = order.get('Quantity', '1')
     unit_price = order.get('Unit Price', '0')
@@ -46,16 +60,7 @@ for order in orders:
         total_unit_price = 0
     
     if title and total_unit_price > 0:
-        # Create a normalized key for similar items
-        # Remove size/count variations for grouping
-        normalized_title = title.lower()
-        
-        # Try to extract the main product name
-        # Remove common size/quantity patterns
-        normalized_title = re.sub(r'\b\d+\s*(count|pack|ct|oz|ounce|lb|pound|inch|in|ft|feet|meter|m|cm|mm|gallon|gal|liter|l|ml|piece|pcs|pc|sheet|roll|box|case|dozen|pair|set|kit|bundle)\b', '', normalized_title, flags=re.IGNORECASE)
-        normalized_title = re.sub(r'\([^)]*\)', '', normalized_title)  # Remove parenthetical info
-        normalized_title = re.sub(r'\s+', ' ', normalized_title).strip()
-        
+        # normalized_title has size/count variations and parenthetical info removed for grouping
         # Skip if title becomes too short after normalization
         if len(normalized_title) > 10:
             item_analysis[normalized_title]['count'] += qty
@@ -71,8 +76,9 @@ recurring_items = {
     if len(v['dates']) > 2 or v['count'] > 2
 }
 
-# Calculate savings potential
+# Calculate savings potential; the report only ever shows the top 30 by total spent
 savings_opportunities = []
+top_by_spend = TopK(30, key=lambda x: x['total_spent'])
 for item, data in recurring_items.items():
     avg_price = sum(data['unit_prices']) / len(data['unit_prices'])
     min_price = min(data['unit_prices'])
@@ -97,11 +103,14 @@ for item, data in recurring_items.items():
         'potential_savings': potential_savings,
         'savings_percent': (potential_savings / data['total_cost'] * 100) if data['total_cost'] > 0 else 0
     })
+    top_by_spend.push(savings_opportunities[-1])
 
-# Sort by total spent (highest first)
-savings_opportunities.sort(key=lambda x: x['total_spent'], reverse=True)
+# Highest total spent first
+profiler.mark('sort')
+top_savings = top_by_spend.items()
 
 # Generate markdown report
+profiler.mark('render')
 markdown_report = """# Amazon Order Analysis - Prime Day Savings Opportunities
 
 **Analysis Period**: July 7, 2024 - July 7, 2025  
@@ -117,7 +126,7 @@ Below are items ordered multiple times with the highest potential for savings:
 """.format(len(orders), len(savings_opportunities))
 
 # Add top 20 items to report
-for i, item in enumerate(savings_opportunities[:20], 1):
+for i, item in enumerate(top_savings[:20], 1):
     markdown_report += f"""
 #### {i}. {item['item'].title()}
 - **Example Products**: 
@@ -138,6 +147,7 @@ markdown_report += """
 """
 
 # Group by general categories
+profiler.mark('classify')
 categories = defaultdict(lambda: {'items': [], 'total_spent': 0})
 category_keywords = {
     'Office Supplies': ['paper', 'pen', 'pencil', 'marker', 'tape', 'staple', 'folder', 'binder', 'clipboard', 'label'],
@@ -148,7 +158,7 @@ category_keywords = {
     'Storage/Organization': ['box', 'container', 'storage', 'organizer', 'shelf', 'bag', 'zip']
 }
 
-for item in savings_opportunities[:30]:
+for item in top_savings:
     categorized = False
     item_lower = item['item'].lower()
     for category, keywords in category_keywords.items():
@@ -162,8 +172,10 @@ for item in savings_opportunities[:30]:
         categories['Other']['total_spent'] += item['total_spent']
 
 # Sort categories by total spent
+profiler.mark('sort')
 sorted_categories = sorted(categories.items(), key=lambda x: x[1]['total_spent'], reverse=True)
 
+profiler.mark('render')
 for category, data in sorted_categories[:5]:
     if data['items']:
         markdown_report += f"\n**{category}** (${data['total_spent']:.2f} annual spend)\n"
@@ -187,5 +199,10 @@ with open('amazon_savings_analysis.md', 'w', encoding='utf-8') as f:
 print(f"\nAnalysis complete! Found {len(savings_opportunities)} recurring items.")
 print(f"Report saved to: amazon_savings_analysis.md")
 print(f"\nTop 5 items by total spend:")
-for i, item in enumerate(savings_opportunities[:5], 1):
-    print(f"{i}. {item['item'][:50]}: ${item['total_spent']:.2f} ({item['times_ordered']} orders)")
\ No newline at end of file
+for i, item in enumerate(top_savings[:5], 1):
+    print(f"{i}. {item['item'][:50]}: ${item['total_spent']:.2f} ({item['times_ordered']} orders)")
+
+if '--normalizer-stats' in sys.argv:
+    normalizer.print_stats()
+
+profiler.report('analyze_amazon_orders.py')
@@ -4,7 +4,17 @@ import re
 from collections import defaultdict
 from datetime import datetime
 
+from grouped_stats import price_stats, rows as grouped_rows
+from procurement_rows import AMAZON, parse_month
+from product_clusters import ProductClusterer
+from spend_cube import SpendCube
+from stage_profiler import StageProfiler
+from topk import TopK, top_k
+
+profiler = StageProfiler.from_argv()
+
 # Read the CSV file
+profiler.mark('load')
 orders = []
 with open('orders_from_20240707_to_20250707_20250707_1040.csv', 'r', encoding='utf-8-sig') as f:
     reader = csv.DictReader(f)
@@ -13,18 +23,20 @@ with open('orders_from_20240707_to_20250707_20250707_1040.csv', 'r', encoding='u
 
 print(f"Total orders: {len(orders)}")
 
-# Analyze items
+# Analyze items: per-listing metadata, plus one row per order in parallel
+# columns for the grouped price statistics
 item_analysis = defaultdict(lambda: {
-    'count': 0,
     'total_cost': 0,
-    'prices': [],
-    'quantities': [],
-    'dates': [],
     'asins': set(),
     'full_title': ''
 })
+row_keys = []
+row_prices = []
+row_quantities = []
+row_totals = []
 
 # Process each order
+profiler.mark('parse')
 for order in orders:
     title = order.get('Title', '')
     asin = order.get('ASIN', '')
@@ -50,50 +62,68 @@ for order in orders:
         # Use ASIN as primary key if available, otherwise use title
         key = asin if asin else title
         
-        item_analysis[key]['count'] += qty
         item_analysis[key]['total_cost'] += total_price
-        item_analysis[key]['prices'].append(unit_price)
-        item_analysis[key]['quantities'].append(qty)
-        item_analysis[key]['dates'].append(order_date)
         item_analysis[key]['asins'].add(asin)
         item_analysis[key]['full_title'] = title
-
-# Filter items ordered more than twice
-recurring_items = {
-    k: v for k, v in item_analysis.items() 
-    if len(v['dates']) > 2
-}
-
-# Calculate savings potential
+        row_keys.append(key)
+        row_prices.append(unit_price)
+        row_quantities.append(qty)
+        row_totals.append(total_price)
+
+# Merge near-duplicate products (the same item sold under several ASINs or
+# slightly different titles) so recurring items and savings are per product
+profiler.mark('classify')
+clusters = ProductClusterer().cluster({k: v['full_title'] for k, v in item_analysis.items()})
+cluster_analysis = defaultdict(lambda: {
+    'asins': set(),
+    'full_title': '',
+    'title_spend': 0,
+    'listings': 0
+})
+for key, data in item_analysis.items():
+    cluster = cluster_analysis[clusters[key]]
+    cluster['asins'] |= data['asins']
+    cluster['listings'] += 1
+    # Label the cluster with its highest-spend listing
+    if data['total_cost'] > cluster['title_spend']:
+        cluster['full_title'] = data['full_title']
+        cluster['title_spend'] = data['total_cost']
+
+# Count, totals, min/max/avg price and potential savings (if every unit had
+# been bought at the minimum price) for every cluster in one grouped pass
+profiler.mark('aggregate')
+cluster_stats = price_stats([clusters[k] for k in row_keys], row_prices, row_quantities, row_totals)
+
+# Calculate savings potential for items ordered more than twice; the report
+# and CSV only ever show the top 50 by total spent
 savings_opportunities = []
-for item_key, data in recurring_items.items():
-    if data['prices']:
-        avg_price = sum(data['prices']) / len(data['prices'])
-        min_price = min(data['prices'])
-        max_price = max(data['prices'])
-        
-        # Potential savings if bought at minimum price
-        potential_savings = sum((p - min_price) * q for p, q in zip(data['prices'], data['quantities']))
-        
+top_by_spend = TopK(50, key=lambda x: x['total_spent'])
+for stats in grouped_rows(cluster_stats):
+    if stats['count'] > 2:
+        data = cluster_analysis[stats['key']]
         savings_opportunities.append({
-            'item_key': item_key,
+            'item_key': stats['key'],
             'title': data['full_title'],
-            'asins': list(data['asins']),
-            'times_ordered': len(data['dates']),
-            'total_quantity': data['count'],
-            'total_spent': data['total_cost'],
-            'avg_price': avg_price,
-            'min_price': min_price,
-            'max_price': max_price,
-            'price_variance': max_price - min_price,
-            'potential_savings': potential_savings,
-            'savings_percent': (potential_savings / data['total_cost'] * 100) if data['total_cost'] > 0 else 0
+            'asins': sorted(data['asins'], reverse=True),
+            'listings': data['listings'],
+            'times_ordered': stats['count'],
+            'total_quantity': stats['quantity'],
+            'total_spent': stats['total'],
+            'avg_price': stats['mean'],
+            'min_price': stats['min'],
+            'max_price': stats['max'],
+            'price_variance': stats['max'] - stats['min'],
+            'potential_savings': stats['savings'],
+            'savings_percent': (stats['savings'] / stats['total'] * 100) if stats['total'] > 0 else 0
         })
+        top_by_spend.push(savings_opportunities[-1])
 
-# Sort by total spent (highest first)
-savings_opportunities.sort(key=lambda x: x['total_spent'], reverse=True)
+# Highest total spent first
+profiler.mark('sort')
+top_savings = top_by_spend.items()
 
 # Generate markdown report
+profiler.mark('render')
 markdown_report = """# Amazon Order Analysis - Prime Day Savings Opportunities
 
 **Analysis Period**: July 7, 2024 - July 7, 2025  
@@ -109,11 +139,12 @@ Below are items ordered multiple times with the highest potential for savings:
 """.format(len(orders), len(savings_opportunities))
 
 # Add top 25 items to report
-for i, item in enumerate(savings_opportunities[:25], 1):
+for i, item in enumerate(top_savings[:25], 1):
+    matched_listings = f"- **Matched Listings**: {item['listings']}\n" if item['listings'] > 1 else ''
     markdown_report += f"""
 #### {i}. {item['title'][:100]}...
-- **ASIN**: {', '.join(item['asins']) if item['asins'][0] else 'N/A'}
-- **Purchase Frequency**: {item['times_ordered']} orders, {item['total_quantity']} units total
+- **ASIN**: {', '.join(a for a in item['asins'] if a) if item['asins'][0] else 'N/A'}
+{matched_listings}- **Purchase Frequency**: {item['times_ordered']} orders, {item['total_quantity']} units total
 - **Total Spent**: ${item['total_spent']:.2f}
 - **Price Range**: ${item['min_price']:.2f} - ${item['max_price']:.2f} (variance: ${item['price_variance']:.2f})
 - **Average Price**: ${item['avg_price']:.2f}
@@ -128,14 +159,16 @@ markdown_report += """
 ### Top Categories by Spending:
 """
 
-# Group by category from the data
-category_spending = defaultdict(float)
+# Fold orders into a month x category x listing cube; category totals are a roll-up
+profiler.mark('aggregate')
+spend_cube = SpendCube()
 category_items = defaultdict(list)
 
 for order in orders:
     category = order.get('Amazon-Internal Product Category', 'Unknown')
     subtotal = order.get('Item Subtotal', '0')
     title = order.get('Title', '')
+    asin = order.get('ASIN', '')
     
     try:
         amount = float(re.sub(r'[^\d.]', '', subtotal)) if subtotal else 0
@@ -143,13 +176,15 @@ for order in orders:
         amount = 0
     
     if amount > 0:
-        category_spending[category] += amount
+        spend_cube.add(parse_month(order.get('Order Date', '')), category, AMAZON, asin or title, amount)
         if title:
             category_items[category].append(title)
 
 # Sort categories by spending
-sorted_categories = sorted(category_spending.items(), key=lambda x: x[1], reverse=True)
+profiler.mark('sort')
+sorted_categories = top_k(spend_cube.totals('category').items(), 10, key=lambda x: x[1])
 
+profiler.mark('render')
 for category, total in sorted_categories[:10]:
     markdown_report += f"\n**{category}**: ${total:.2f}\n"
     # Show sample items
@@ -171,8 +206,8 @@ markdown_report += f"""
 4. **Top 5 Items to Stock Up On**:
 """
 
-# List top 5 by order frequency
-freq_sorted = sorted(savings_opportunities, key=lambda x: x['times_ordered'], reverse=True)[:5]
+# List top 5 by order frequency (ties by total spent, as in the report order)
+freq_sorted = top_k(savings_opportunities, 5, key=lambda x: (x['times_ordered'], x['total_spent']))
 for i, item in enumerate(freq_sorted, 1):
     markdown_report += f"   {i}. {item['title'][:60]}... ({item['times_ordered']} orders)\n"
 
@@ -205,7 +240,7 @@ with open('amazon_recurring_items.csv', 'w', newline='', encoding='utf-8') as f:
     writer = csv.writer(f)
     writer.writerow(['Title', 'ASIN', 'Times Ordered', 'Total Quantity', 'Total Spent', 
                      'Avg Price', 'Min Price', 'Max Price', 'Potential Savings %'])
-    for item in savings_opportunities[:50]:
+    for item in top_savings:
         writer.writerow([
             item['title'][:100],
             item['asins'][0] if item['asins'][0] else 'N/A',
@@ -223,5 +258,7 @@ print(f"Reports saved to:")
 print(f"  - amazon_savings_analysis.md")
 print(f"  - amazon_recurring_items.csv")
 print(f"\nTop 5 items by total spend:")
-for i, item in enumerate(savings_opportunities[:5], 1):
-    print(f"{i}. {item['title'][:60]}...: ${item['total_spent']:.2f} ({item['times_ordered']} orders)")
\ No newline at end of file
+for i, item in enumerate(top_savings[:5], 1):
+    print(f"{i}. {item['title'][:60]}...: ${item['total_spent']:.2f} ({item['times_ordered']} orders)")
+
+profiler.report('analyze_amazon_orders_v2.py')
@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 import csv
 import re
+import sys
 from collections import defaultdict
-from datetime import datetime
+
+from procurement_rows import AMAZON, parse_month
+from spend_cube import SpendCube
+from stage_profiler import StageProfiler
+from title_normalizer import coffee_normalizer
+from topk import TopK
+
+profiler = StageProfiler.from_argv()
 
 # Read the CSV file
+profiler.mark('load')
 orders = []
 with open('orders_from_20240707_to_20250707_20250707_1040.csv', 'r', encoding='utf-8-sig') as f:
     reader = csv.DictReader(f)
@@ -19,9 +28,12 @@ coffee_keywords = [
 ]
 
 # Analyze coffee items
+profiler.mark('classify')
 coffee_items = []
 total_coffee_spending = 0
-coffee_categories = defaultdict(lambda: {'items': [], 'total': 0, 'count': 0})
+# Coffee category, month and listing totals are rolled up from one cube
+spend_cube = SpendCube()
+top_purchases = TopK(10, key=lambda x: x['total_price'])
 
 for order in orders:
     title = order.get('Title', '').lower()
@@ -54,6 +66,7 @@ for order in orders:
                 'date': order_date
             })
             
+            top_purchases.push(coffee_items[-1])
             total_coffee_spending += total_price
             
             # Categorize the coffee item
@@ -70,14 +83,10 @@ for order in orders:
             else:
                 category = 'Other Coffee Products'
             
-            coffee_categories[category]['items'].append(coffee_items[-1])
-            coffee_categories[category]['total'] += total_price
-            coffee_categories[category]['count'] += 1
-
-# Sort items by total price
-coffee_items.sort(key=lambda x: x['total_price'], reverse=True)
+            spend_cube.add(parse_month(order_date), category, AMAZON, asin, total_price, qty)
 
 # Generate report
+profiler.mark('render')
 print(f"\n☕ COFFEE SPENDING ANALYSIS ☕")
 print(f"="*50)
 print(f"Total Coffee-Related Spending: ${total_coffee_spending:.2f}")
@@ -86,17 +95,18 @@ print(f"Average per Order: ${total_coffee_spending/len(coffee_items):.2f}" if co
 
 print(f"\n📊 SPENDING BY CATEGORY:")
 print(f"-"*50)
-for category, data in sorted(coffee_categories.items(), key=lambda x: x[1]['total'], reverse=True):
-    percentage = (data['total'] / total_coffee_spending * 100) if total_coffee_spending > 0 else 0
-    print(f"{category}: ${data['total']:.2f} ({percentage:.1f}%) - {data['count']} orders")
+for category, orders_count, _, total in spend_cube.top('category', limit=None):
+    percentage = (total / total_coffee_spending * 100) if total_coffee_spending > 0 else 0
+    print(f"{category}: ${total:.2f} ({percentage:.1f}%) - {orders_count} orders")
 
 print(f"\n🏆 TOP 10 COFFEE PURCHASES:")
 print(f"-"*50)
-for i, item in enumerate(coffee_items[:10], 1):
+for i, item in enumerate(top_purchases, 1):
     print(f"{i}. {item['title'][:80]}...")
     print(f"   ${item['total_price']:.2f} (Qty: {item['quantity']}, Unit: ${item['unit_price']:.2f})")
 
 # Analyze specific brands
+profiler.mark('classify')
 brand_spending = defaultdict(float)
 brand_items = defaultdict(list)
 
@@ -121,6 +131,7 @@ for item in coffee_items:
         brand_spending['Coffee Mate (Creamer)'] += item['total_price']
         brand_items['Coffee Mate (Creamer)'].append(item)
 
+profiler.mark('render')
 print(f"\n🏪 SPENDING BY BRAND:")
 print(f"-"*50)
 for brand, amount in sorted(brand_spending.items(), key=lambda x: x[1], reverse=True):
@@ -128,15 +139,19 @@ for brand, amount in sorted(brand_spending.items(), key=lambda x: x[1], reverse=
     percentage = (amount / total_coffee_spending * 100) if total_coffee_spending > 0 else 0
     print(f"{brand}: ${amount:.2f} ({percentage:.1f}%) - {count} orders")
 
+# The detailed CSV lists every item by total price, so it (and the frequency
+# counts below, which break ties in that order) still needs the full sort
+profiler.mark('sort')
+coffee_items.sort(key=lambda x: x['total_price'], reverse=True)
+
 # Find most frequently ordered coffee items
 from collections import Counter
-item_frequency = Counter()
-for item in coffee_items:
-    # Create a simplified key for grouping similar items
-    key = re.sub(r'\b\d+\s*(count|pack|ct|pods)\b', '', item['title'].lower())
-    key = re.sub(r'\s+', ' ', key).strip()
-    item_frequency[key] += 1
+profiler.mark('parse')
+normalizer = coffee_normalizer()
+# Simplified keys group similar items regardless of pack/pod counts
+item_frequency = Counter(normalizer.normalize_many([item['title'] for item in coffee_items]))
 
+profiler.mark('render')
 print(f"\n📈 MOST FREQUENTLY ORDERED (by product type):")
 print(f"-"*50)
 for item, count in item_frequency.most_common(10):
@@ -144,16 +159,11 @@ for item, count in item_frequency.most_common(10):
         print(f"{item[:60]}... - ordered {count} times")
 
 # Monthly spending analysis
-monthly_spending = defaultdict(float)
-for item in coffee_items:
-    if item['date']:
-        try:
-            date_obj = datetime.strptime(item['date'].split()[0], '%m/%d/%Y')
-            month_key = date_obj.strftime('%Y-%m')
-            monthly_spending[month_key] += item['total_price']
-        except:
-            pass
+profiler.mark('aggregate')
+monthly_spending = spend_cube.month_totals()
+monthly_spending.pop('', None)  # undated orders
 
+profiler.mark('render')
 print(f"\n📅 MONTHLY COFFEE SPENDING TREND:")
 print(f"-"*50)
 sorted_months = sorted(monthly_spending.items())
@@ -178,4 +188,9 @@ with open('coffee_spending_details.csv', 'w', newline='', encoding='utf-8') as f
             item['date']
         ])
 
-print(f"\n📄 Detailed report saved to: coffee_spending_details.csv")
\ No newline at end of file
+print(f"\n📄 Detailed report saved to: coffee_spending_details.csv")
+
+if '--normalizer-stats' in sys.argv:
+    normalizer.print_stats()
+
+profiler.report('analyze_coffee_spending.py')
@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
 import csv
 import re
+import sys
 from collections import defaultdict
 
+from columnar import write_table
+from price_anomalies import PriceSpikeDetector, chronological
+from procurement_rows import AMAZON, parse_date
+from stage_profiler import StageProfiler
+from topk import GroupedTopK, TopK
+
+profiler = StageProfiler.from_argv()
+
 # Read the CSV file
+profiler.mark('load')
 orders = []
 with open('orders_from_20240707_to_20250707_20250707_1040.csv', 'r', encoding='utf-8-sig') as f:
     reader = csv.DictReader(f)
@@ -59,9 +69,13 @@ excessive_categories = {
     }
 }
 
-# Individual high-cost items
-high_cost_items = []
+# Individual high-cost items; the report shows the 15 highest unit prices
+# and the 5 largest purchases per category
+profiler.mark('classify')
+high_cost_items = TopK(15, key=lambda x: x['unit_price'])
+category_top_items = GroupedTopK(5, key=lambda x: x['total_price'])
 suspicious_items = []
+priced_rows = []
 
 # Process each order
 for order in orders:
@@ -81,6 +95,16 @@ for order in orders:
         continue
     
     if total_price > 0:
+        priced_rows.append({
+            'vendor': AMAZON,
+            'item_key': asin or title_lower,
+            'title': title,
+            'unit_price': unit_price if qty > 0 else total_price,  # same as procurement_rows
+            'date': order_date,
+            'order_date': parse_date(order_date),
+            'category': category
+        })
+
         # Check for excessive categories
         categorized = False
         for cat_name, cat_data in excessive_categories.items():
@@ -93,13 +117,14 @@ for order in orders:
                     'date': order_date,
                     'category': category
                 })
+                category_top_items.push(cat_name, cat_data['items'][-1])
                 cat_data['total'] += total_price
                 categorized = True
                 break
         
         # Flag high-cost single items (over $100)
         if unit_price > 100:
-            high_cost_items.append({
+            high_cost_items.push({
                 'title': title,
                 'total_price': total_price,
                 'unit_price': unit_price,
@@ -124,6 +149,7 @@ for order in orders:
             })
 
 # Generate report
+profiler.mark('render')
 print("\n🚨 EXCESSIVE SPENDING ANALYSIS 🚨")
 print("="*80)
 print("Items that may be inappropriate for a cost-conscious medical practice:\n")
@@ -134,9 +160,7 @@ for cat_name, cat_data in excessive_categories.items():
     if cat_data['total'] > 0:
         print(f"\n{cat_name.upper().replace('_', ' ')}: ${cat_data['total']:.2f}")
         print("-"*60)
-        # Sort by price and show top items
-        cat_data['items'].sort(key=lambda x: x['total_price'], reverse=True)
-        for item in cat_data['items'][:5]:  # Top 5 per category
+        for item in category_top_items.items(cat_name):  # Top 5 per category by price
             print(f"  • {item['title'][:70]}...")
             print(f"    ${item['total_price']:.2f} (Qty: {item['quantity']}) - {item['date']}")
         if len(cat_data['items']) > 5:
@@ -146,16 +170,30 @@ for cat_name, cat_data in excessive_categories.items():
 # High-cost items analysis
 print(f"\n\n💸 HIGH-COST SINGLE ITEMS (>$100 per unit):")
 print("-"*80)
-high_cost_items.sort(key=lambda x: x['unit_price'], reverse=True)
-for item in high_cost_items[:15]:
+for item in high_cost_items:
     print(f"${item['unit_price']:.2f} - {item['title'][:70]}...")
     print(f"         Category: {item['category']}, Date: {item['date']}")
 
+# Unit prices far above (or below) the item's own recent history, which a
+# fixed dollar threshold misses for cheap items and over-flags for equipment
+profiler.mark('aggregate')
+price_detector = PriceSpikeDetector()
+price_spikes = list(price_detector.scan(chronological(priced_rows)))
+profiler.mark('render')
+print(f"\n\n📈 UNIT PRICE SPIKES vs ITEM HISTORY (|z| > {price_detector.z_threshold}):")
+print("-"*80)
+for item in price_spikes:
+    print(f"${item['unit_price']:.2f} (usually ${item['expected_price']:.2f}, z = {item['z_score']:+.1f}) - {item['title'][:60]}...")
+    print(f"         Category: {item['category']}, Date: {item['date']}")
+if not price_spikes:
+    print("No repeat purchases priced outside their usual range")
+
 # Specific problematic purchases
 print(f"\n\n🚩 SPECIFICALLY QUESTIONABLE PURCHASES:")
 print("-"*80)
 
 # Look for non-medical/non-office categories
+profiler.mark('classify')
 problematic_categories = {}
 for order in orders:
     category = order.get('Amazon-Internal Product Category', '')
@@ -175,6 +213,7 @@ for order in orders:
                 'price': total_price
             })
 
+profiler.mark('render')
 for cat, data in sorted(problematic_categories.items(), key=lambda x: x[1]['total'], reverse=True):
     if data['total'] > 0:
         print(f"\n{cat}: ${data['total']:.2f}")
@@ -218,21 +257,29 @@ savings_percentage = (total_potential_savings / total_spending * 100) if total_s
 print(f"\nThis represents {savings_percentage:.1f}% of your total Amazon spending")
 
 # Create detailed CSV of questionable items
-with open('excessive_spending_audit.csv', 'w', newline='', encoding='utf-8') as f:
-    writer = csv.writer(f)
-    writer.writerow(['Category', 'Title', 'Total Price', 'Quantity', 'Unit Price', 'Date', 'Recommendation'])
-    
-    for cat_name, cat_data in excessive_categories.items():
-        for item in cat_data['items']:
-            recommendation = 'Eliminate' if cat_name in ['decorative_non_essential', 'entertainment', 'excessive_lighting'] else 'Find cheaper alternative'
-            writer.writerow([
-                cat_name.replace('_', ' ').title(),
-                item['title'][:100],
-                f"${item['total_price']:.2f}",
-                item['quantity'],
-                f"${item['unit_price']:.2f}",
-                item['date'],
-                recommendation
-            ])
-
-print(f"\n📄 Detailed audit saved to: excessive_spending_audit.csv")
\ No newline at end of file
+AUDIT_TYPES = {'Category': 'str', 'Title': 'str', 'Total Price': 'float64', 'Quantity': 'int64',
+               'Unit Price': 'float64', 'Date': 'str', 'Recommendation': 'str'}
+audit = {name: [] for name in AUDIT_TYPES}
+for cat_name, cat_data in excessive_categories.items():
+    # The audit lists every item, most expensive first
+    for item in sorted(cat_data['items'], key=lambda x: x['total_price'], reverse=True):
+        recommendation = 'Eliminate' if cat_name in ['decorative_non_essential', 'entertainment', 'excessive_lighting'] else 'Find cheaper alternative'
+        audit['Category'].append(cat_name.replace('_', ' ').title())
+        audit['Title'].append(item['title'][:100])
+        audit['Total Price'].append(item['total_price'])
+        audit['Quantity'].append(item['quantity'])
+        audit['Unit Price'].append(item['unit_price'])
+        audit['Date'].append(item['date'])
+        audit['Recommendation'].append(recommendation)
+
+write_table('excessive_spending_audit.pcol', audit, types=AUDIT_TYPES)
+if '--no-csv' not in sys.argv:
+    with open('excessive_spending_audit.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(audit))
+        for category, title, total_price, quantity, unit_price, date, recommendation in zip(*audit.values()):
+            writer.writerow([category, title, f"${total_price:.2f}", quantity, f"${unit_price:.2f}", date, recommendation])
+    print(f"\n📄 Detailed audit saved to: excessive_spending_audit.csv")
+print(f"📄 Columnar audit saved to: excessive_spending_audit.pcol")
+
+profiler.report('analyze_excessive_spending.py')
@@ -1,77 +1,65 @@
 #!/usr/bin/env python3
 import csv
-import re
+import sys
 from collections import defaultdict
-from datetime import datetime
-
-# Read the Henry Schein CSV file
-henry_schein_orders = []
-with open('1eb6921b-e392-457b-8a1f-a08236e20da9.csv', 'r', encoding='utf-8-sig') as f:
-    reader = csv.DictReader(f)
-    headers = reader.fieldnames
-    print("Henry Schein CSV Headers:", headers[:10])  # Show first 10 headers
-    
-    for row in reader:
-        henry_schein_orders.append(row)
 
-print(f"Total Henry Schein orders: {len(henry_schein_orders)}")
+from columnar import write_table
+from csv_schema import load_typed
+from grouped_stats import price_stats, rows as grouped_rows
+from stage_profiler import StageProfiler
+from title_normalizer import henry_schein_normalizer
+from topk import top_k
+
+profiler = StageProfiler.from_argv()
+
+# Read the Henry Schein CSV file into typed columns. The column roles and
+# dtypes come from a cached schema profile after the first run.
+profiler.mark('load')
+HENRY_SCHEIN_EXPORT = '1eb6921b-e392-457b-8a1f-a08236e20da9.csv'
+profile, columns, cached_profile = load_typed(HENRY_SCHEIN_EXPORT)
+headers = profile['headers']
+print("Henry Schein CSV Headers:", headers[:10])  # Show first 10 headers
+
+order_count = len(columns[headers[0]]) if headers else 0
+print(f"Total Henry Schein orders: {order_count}")
+
+# The sample row shows the export's own cell text ("1,145.04"), not the typed values
+with open(HENRY_SCHEIN_EXPORT, 'r', encoding='utf-8-sig', newline='') as f:
+    reader = csv.reader(f)
+    next(reader, None)
+    sample_row = next(reader, [])
 
-# Try to identify key columns
-sample_row = henry_schein_orders[0] if henry_schein_orders else {}
 print("\nSample row keys:")
-for key in list(sample_row.keys())[:15]:
-    print(f"  {key}: {sample_row[key]}")
+for i, key in enumerate(headers[:15]):
+    print(f"  {key}: {sample_row[i] if i < len(sample_row) else ''}")
 
 # Analyze Henry Schein spending
+profiler.mark('classify')
 total_hs_spending = 0
 hs_categories = defaultdict(lambda: {'total': 0, 'items': []})
 hs_items = []
 
-# Try different possible column names for price/amount
-price_columns = ['Total', 'Amount', 'Price', 'Extended Price', 'Line Total', 'Total Amount', 'Net Amount']
-desc_columns = ['Description', 'Product Description', 'Item Description', 'Product Name', 'Item']
-qty_columns = ['Quantity', 'Qty', 'Units', 'Count']
-date_columns = ['Date', 'Order Date', 'Ship Date', 'Invoice Date']
-
-# Find the correct column names
-price_col = None
-desc_col = None
-qty_col = None
-date_col = None
-
-for col in sample_row.keys():
-    col_lower = col.lower()
-    if not price_col and any(pc.lower() in col_lower for pc in price_columns):
-        price_col = col
-    if not desc_col and any(dc.lower() in col_lower for dc in desc_columns):
-        desc_col = col
-    if not qty_col and any(qc.lower() in col_lower for qc in qty_columns):
-        qty_col = col
-    if not date_col and any(dc.lower() in col_lower for dc in date_columns):
-        date_col = col
-
-print(f"\nDetected columns:")
+price_col = profile['columns']['price']
+desc_col = profile['columns']['description']
+qty_col = profile['columns']['quantity']
+date_col = profile['columns']['date']
+
+print(f"\nDetected columns{' (cached profile)' if cached_profile else ''}:")
 print(f"Price: {price_col}")
 print(f"Description: {desc_col}")
 print(f"Quantity: {qty_col}")
 print(f"Date: {date_col}")
 
+prices = columns[price_col] if price_col else [0] * order_count
+descriptions = columns[desc_col] if desc_col else ['Unknown Item'] * order_count
+quantities = columns[qty_col] if qty_col else [1] * order_count
+dates = columns[date_col] if date_col else [''] * order_count
+
 # Process Henry Schein orders
-for order in henry_schein_orders:
+for price, description, qty, order_date in zip(prices, descriptions, quantities, dates):
     try:
-        # Extract price
-        price_str = order.get(price_col, '0') if price_col else '0'
-        price = float(re.sub(r'[^\d.-]', '', str(price_str))) if price_str else 0
-        
-        # Extract description
-        description = order.get(desc_col, 'Unknown Item') if desc_col else 'Unknown Item'
-        
-        # Extract quantity
-        qty_str = order.get(qty_col, '1') if qty_col else '1'
-        qty = int(re.sub(r'[^\d]', '', str(qty_str))) if qty_str and str(qty_str).strip() else 1
-        
-        # Extract date
-        order_date = order.get(date_col, '') if date_col else ''
+        price = price or 0
+        qty = qty if qty is not None else 1
         
         if price > 0:
             hs_items.append({
@@ -109,8 +97,10 @@ for order in henry_schein_orders:
         continue
 
 # Sort items by price
+profiler.mark('sort')
 hs_items.sort(key=lambda x: x['price'], reverse=True)
 
+profiler.mark('render')
 print(f"\n💊 HENRY SCHEIN SPENDING ANALYSIS")
 print(f"="*60)
 print(f"Total Henry Schein Spending: ${total_hs_spending:.2f}")
@@ -129,31 +119,29 @@ for i, item in enumerate(hs_items[:15], 1):
     print(f"{i}. {item['description'][:70]}...")
     print(f"   ${item['price']:.2f} (Qty: {item['quantity']}, Unit: ${item['unit_price']:.2f})")
 
-# Find frequently ordered items
-item_frequency = defaultdict(lambda: {'count': 0, 'total_spent': 0, 'prices': []})
-for item in hs_items:
-    # Normalize description for grouping
-    normalized = re.sub(r'\b\d+\s*(count|ct|pack|box|case|each|ea)\b', '', item['description'].lower())
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
-    
-    if len(normalized) > 10:  # Only group meaningful descriptions
-        item_frequency[normalized]['count'] += item['quantity']
-        item_frequency[normalized]['total_spent'] += item['price']
-        item_frequency[normalized]['prices'].append(item['unit_price'])
-
-frequent_items = {k: v for k, v in item_frequency.items() if len(v['prices']) > 2}
-
+# Find frequently ordered items, grouping on normalized descriptions
+profiler.mark('aggregate')
+normalizer = henry_schein_normalizer()
+normalized_descriptions = normalizer.normalize_many([item['description'] for item in hs_items])
+grouped = [(n, item) for n, item in zip(normalized_descriptions, hs_items) if len(n) > 10]  # Only group meaningful descriptions
+item_frequency = price_stats(
+    [n for n, _ in grouped],
+    [item['unit_price'] for _, item in grouped],
+    [item['quantity'] for _, item in grouped],
+    [item['price'] for _, item in grouped]
+)
+
+frequent_items = [stats for stats in grouped_rows(item_frequency) if stats['count'] > 2]
+
+profiler.mark('render')
 print(f"\n📈 FREQUENTLY ORDERED ITEMS (3+ orders):")
 print(f"-"*60)
-for item, data in sorted(frequent_items.items(), key=lambda x: x[1]['total_spent'], reverse=True)[:10]:
-    avg_price = sum(data['prices']) / len(data['prices'])
-    min_price = min(data['prices'])
-    max_price = max(data['prices'])
-    price_variance = max_price - min_price
+for data in top_k(frequent_items, 10, key=lambda x: x['total']):
+    price_variance = data['max'] - data['min']
     
-    print(f"{item[:60]}...")
-    print(f"  Orders: {len(data['prices'])}, Total: ${data['total_spent']:.2f}")
-    print(f"  Price range: ${min_price:.2f} - ${max_price:.2f} (variance: ${price_variance:.2f})")
+    print(f"{data['key'][:60]}...")
+    print(f"  Orders: {data['count']}, Total: ${data['total']:.2f}")
+    print(f"  Price range: ${data['min']:.2f} - ${data['max']:.2f} (variance: ${price_variance:.2f})")
 
 # Compare with Amazon data
 print(f"\n🔄 AMAZON vs HENRY SCHEIN COMPARISON:")
@@ -175,36 +163,44 @@ print(f"2. Items with high price variance could benefit from Provista GPO pricin
 print(f"3. Consider consolidating frequent items to one platform for better pricing")
 
 # Save detailed analysis
-with open('henry_schein_analysis.csv', 'w', newline='', encoding='utf-8') as f:
-    writer = csv.writer(f)
-    writer.writerow(['Description', 'Price', 'Quantity', 'Unit Price', 'Date', 'Category'])
-    
-    for item in hs_items:
-        # Determine category
-        desc_lower = item['description'].lower()
-        if any(word in desc_lower for word in ['glove', 'exam', 'nitrile']):
-            cat = 'Gloves/PPE'
-        elif any(word in desc_lower for word in ['syringe', 'needle']):
-            cat = 'Syringes/Needles'
-        elif any(word in desc_lower for word in ['bandage', 'gauze', 'tape']):
-            cat = 'Wound Care'
-        elif any(word in desc_lower for word in ['mask', 'face']):
-            cat = 'Masks'
-        else:
-            cat = 'Other Medical'
-            
-        writer.writerow([
-            item['description'][:100],
-            f"${item['price']:.2f}",
-            item['quantity'],
-            f"${item['unit_price']:.2f}",
-            item['date'],
-            cat
-        ])
-
-print(f"\n📄 Detailed analysis saved to: henry_schein_analysis.csv")
+ANALYSIS_TYPES = {'Description': 'str', 'Price': 'float64', 'Quantity': 'int64', 'Unit Price': 'float64',
+                  'Date': 'str', 'Category': 'str'}
+analysis = {name: [] for name in ANALYSIS_TYPES}
+for item in hs_items:
+    # Determine category
+    desc_lower = item['description'].lower()
+    if any(word in desc_lower for word in ['glove', 'exam', 'nitrile']):
+        cat = 'Gloves/PPE'
+    elif any(word in desc_lower for word in ['syringe', 'needle']):
+        cat = 'Syringes/Needles'
+    elif any(word in desc_lower for word in ['bandage', 'gauze', 'tape']):
+        cat = 'Wound Care'
+    elif any(word in desc_lower for word in ['mask', 'face']):
+        cat = 'Masks'
+    else:
+        cat = 'Other Medical'
+
+    analysis['Description'].append(item['description'][:100])
+    analysis['Price'].append(float(item['price']))
+    analysis['Quantity'].append(int(item['quantity']))
+    analysis['Unit Price'].append(float(item['unit_price']))
+    analysis['Date'].append(str(item['date'] or ''))
+    analysis['Category'].append(cat)
+
+# Typed columns for dashboards; the CSV is a formatted export of the same rows
+write_table('henry_schein_analysis.pcol', analysis, types=ANALYSIS_TYPES)
+if '--no-csv' not in sys.argv:
+    with open('henry_schein_analysis.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(analysis))
+        for description, price, quantity, unit_price, date, cat in zip(*analysis.values()):
+            writer.writerow([description, f"${price:.2f}", quantity, f"${unit_price:.2f}", date, cat])
+    print(f"\n📄 Detailed analysis saved to: henry_schein_analysis.csv")
+print(f"📄 Columnar analysis saved to: henry_schein_analysis.pcol")
 print(f"\n🎯 NEXT STEPS:")
 print(f"1. Compare your most frequent Henry Schein items with Amazon Business pricing")
 print(f"2. Look for items you're buying on both platforms")
 print(f"3. Consider Provista GPO for items with high price variance")
-print(f"4. Evaluate if consolidating to one platform provides volume discounts")
\ No newline at end of file
+print(f"4. Evaluate if consolidating to one platform provides volume discounts")
+
+profiler.report('analyze_henry_schein.py')
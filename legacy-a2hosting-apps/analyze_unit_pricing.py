@@ -1,48 +1,92 @@
 #!/usr/bin/env python3
 import csv
-import re
+import sys
 from collections import defaultdict
 
-# Read the Henry Schein data again to look at specific items
-henry_schein_orders = []
-with open('1eb6921b-e392-457b-8a1f-a08236e20da9.csv', 'r', encoding='utf-8-sig') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        henry_schein_orders.append(row)
+from columnar import write_table
+from csv_schema import load_typed
+from pack_sizes import extract_packs
+from stage_profiler import StageProfiler
+from topk import top_k
 
-# Focus on the specific items mentioned
+profiler = StageProfiler.from_argv()
+
+# Read the Henry Schein data again to look at specific items, using the
+# cached schema profile to find the description/amount/qty/uom/date columns
+profiler.mark('load')
+profile, columns, _ = load_typed('1eb6921b-e392-457b-8a1f-a08236e20da9.csv')
+roles = profile['columns']
+order_count = len(columns[profile['headers'][0]]) if profile['headers'] else 0
+
+
+def role_column(role, default):
+    return columns[roles[role]] if roles.get(role) else [default] * order_count
+
+
+# Pack size, unit count and unit of measure for every row, in one batched
+# pass over the description column
+profiler.mark('parse')
+descriptions = role_column('description', '')
+uoms = role_column('uom', '')
+packs = extract_packs(descriptions, uoms)
+
+# Focus on the specific items mentioned, and price every SKU per unit
+profiler.mark('classify')
 criterion_gloves = []
 gauze_sponges = []
+skus = {}
 
-for order in henry_schein_orders:
-    description = order.get('Extended Description', '').lower()
-    amount = float(re.sub(r'[^\d.-]', '', order.get('Amount', '0'))) if order.get('Amount') else 0
-    qty = int(re.sub(r'[^\d]', '', order.get('Qty', '1'))) if order.get('Qty') else 1
-    uom = order.get('Uom', '')
-    date = order.get('LastPurchasedDate', '')
+for full_description, amount, qty, uom, date, sku, pack in zip(descriptions, role_column('price', 0),
+                                                               role_column('quantity', 1), uoms,
+                                                               role_column('date', ''),
+                                                               role_column('sku', None), packs):
+    description = full_description.lower()
+    amount = amount or 0
+    qty = qty if qty is not None else 1
     
     if amount > 0:
+        unit_price = amount / qty if qty > 0 else amount
+        item = {
+            'description': full_description,
+            'amount': amount,
+            'qty': qty,
+            'uom': uom,
+            'unit_price': unit_price,
+            'date': date,
+            'units': pack.units,
+            'per_unit_price': unit_price / pack.units if pack.units else None,
+        }
+
         if 'criterion' in description and 'nitrile' in description and 'glove' in description:
-            criterion_gloves.append({
-                'description': order.get('Extended Description', ''),
-                'amount': amount,
-                'qty': qty,
-                'uom': uom,
-                'unit_price': amount / qty if qty > 0 else amount,
-                'date': date,
-                'price_per_glove': None  # Will calculate based on package size
-            })
+            criterion_gloves.append(item)
         
         if ('gauze' in description and 'sponge' in description) or ('cotton' in description and 'gauze' in description):
-            gauze_sponges.append({
-                'description': order.get('Extended Description', ''),
-                'amount': amount,
-                'qty': qty,
-                'uom': uom,
-                'unit_price': amount / qty if qty > 0 else amount,
-                'date': date
-            })
+            gauze_sponges.append(item)
+
+        # Rows without an item code are grouped by description instead
+        sku = str(sku) if sku is not None else full_description
+        sku_data = skus.get(sku)
+        if sku_data is None:
+            sku_data = skus[sku] = {'description': full_description, 'uoms': set(), 'purchases': 0,
+                                    'spent': 0.0, 'priced_spent': 0.0, 'units': 0, 'per_unit_prices': []}
+        sku_data['uoms'].add(pack.uom)
+        sku_data['purchases'] += 1
+        sku_data['spent'] += amount
+        if pack.units and qty > 0:
+            sku_data['priced_spent'] += amount
+            sku_data['units'] += pack.units * qty
+            sku_data['per_unit_prices'].append(item['per_unit_price'])
+
+profiler.mark('aggregate')
+for sku_data in skus.values():
+    prices = sku_data['per_unit_prices']
+    sku_data['per_unit_price'] = sku_data['priced_spent'] / sku_data['units'] if sku_data['units'] else None
+    sku_data['min_per_unit'] = min(prices) if prices else None
+    sku_data['max_per_unit'] = max(prices) if prices else None
+    sku_data['spread'] = (sku_data['max_per_unit'] - sku_data['min_per_unit']) / sku_data['min_per_unit'] * 100 \
+        if prices and sku_data['min_per_unit'] > 0 else 0
 
+profiler.mark('render')
 print("🧤 CRITERION NITRILE GLOVES - DETAILED ANALYSIS")
 print("="*80)
 print(f"Total Criterion Glove Purchases: {len(criterion_gloves)}")
@@ -53,24 +97,9 @@ for i, item in enumerate(criterion_gloves, 1):
     print(f"   Quantity: {item['qty']} {item['uom']}")
     print(f"   Total: ${item['amount']:.2f}")
     print(f"   Price per {item['uom']}: ${item['unit_price']:.2f}")
-    
-    # Try to extract glove count from description
-    desc = item['description'].lower()
-    if 'box' in desc or 'bx' in desc:
-        # Look for numbers that might indicate gloves per box
-        numbers = re.findall(r'\b(\d+)\b', desc)
-        if numbers:
-            # Common glove box sizes: 100, 200, 250
-            likely_count = None
-            for num in numbers:
-                if int(num) in [100, 200, 250, 300]:
-                    likely_count = int(num)
-                    break
-            if likely_count:
-                price_per_glove = item['unit_price'] / likely_count
-                print(f"   Estimated gloves per box: {likely_count}")
-                print(f"   Price per glove: ${price_per_glove:.4f}")
-                item['price_per_glove'] = price_per_glove
+    if item['units']:
+        print(f"   Units per {item['uom']}: {item['units']}")
+        print(f"   Price per unit: ${item['per_unit_price']:.4f}")
 
 print("\n🩹 GAUZE SPONGES - DETAILED ANALYSIS")
 print("="*80)
@@ -82,39 +111,41 @@ for i, item in enumerate(gauze_sponges, 1):
     print(f"   Quantity: {item['qty']} {item['uom']}")
     print(f"   Total: ${item['amount']:.2f}")
     print(f"   Price per {item['uom']}: ${item['unit_price']:.2f}")
-    
-    # Try to extract sponge count from description
-    desc = item['description'].lower()
-    # Look for package sizes like 200/pk, 100/bx, etc.
-    package_match = re.search(r'(\d+)/(?:pk|bx|box|pack)', desc)
-    if package_match:
-        sponges_per_pack = int(package_match.group(1))
-        price_per_sponge = item['unit_price'] / sponges_per_pack
-        print(f"   Sponges per package: {sponges_per_pack}")
-        print(f"   Price per sponge: ${price_per_sponge:.4f}")
+    if item['units']:
+        print(f"   Units per {item['uom']}: {item['units']}")
+        print(f"   Price per unit: ${item['per_unit_price']:.4f}")
 
 # Summary analysis
 print("\n📊 PRICE VARIANCE ANALYSIS")
 print("="*80)
 
-if criterion_gloves:
-    unit_prices = [item['unit_price'] for item in criterion_gloves]
-    glove_prices = [item['price_per_glove'] for item in criterion_gloves if item['price_per_glove']]
-    
-    print(f"\nCriterion Gloves:")
-    print(f"Price per package range: ${min(unit_prices):.2f} - ${max(unit_prices):.2f}")
-    if glove_prices:
-        print(f"Price per individual glove range: ${min(glove_prices):.4f} - ${max(glove_prices):.4f}")
-        if max(glove_prices) > min(glove_prices):
-            variance_pct = ((max(glove_prices) - min(glove_prices)) / min(glove_prices)) * 100
-            print(f"Per-glove price variance: {variance_pct:.1f}%")
-
-if gauze_sponges:
-    unit_prices = [item['unit_price'] for item in gauze_sponges]
-    print(f"\nGauze Sponges:")
+for label, items in [('Criterion Gloves', criterion_gloves), ('Gauze Sponges', gauze_sponges)]:
+    if not items:
+        continue
+    unit_prices = [item['unit_price'] for item in items]
+    per_unit_prices = [item['per_unit_price'] for item in items if item['per_unit_price']]
+
+    print(f"\n{label}:")
     print(f"Price per package range: ${min(unit_prices):.2f} - ${max(unit_prices):.2f}")
     variance_pct = ((max(unit_prices) - min(unit_prices)) / min(unit_prices)) * 100
     print(f"Package price variance: {variance_pct:.1f}%")
+    if per_unit_prices:
+        print(f"Price per unit range: ${min(per_unit_prices):.4f} - ${max(per_unit_prices):.4f}")
+        if max(per_unit_prices) > min(per_unit_prices):
+            variance_pct = ((max(per_unit_prices) - min(per_unit_prices)) / min(per_unit_prices)) * 100
+            print(f"Per-unit price variance: {variance_pct:.1f}%")
+
+priced_skus = sum(1 for sku_data in skus.values() if sku_data['per_unit_price'] is not None)
+print(f"\n💲 PER-UNIT PRICES BY SKU:")
+print("="*80)
+print(f"SKUs purchased: {len(skus)}")
+print(f"SKUs with a known pack size: {priced_skus} ({priced_skus / len(skus) * 100 if skus else 0:.0f}%)")
+print(f"\nWidest per-unit price spreads:")
+for sku, sku_data in top_k(skus.items(), 10, key=lambda x: x[1]['spread']):
+    if sku_data['spread'] <= 0:
+        break
+    print(f"  {sku:>10}  ${sku_data['min_per_unit']:.4f} - ${sku_data['max_per_unit']:.4f} "
+          f"({sku_data['spread']:.0f}%)  {sku_data['description'][:50]}")
 
 print("\n💡 UNIT ANALYSIS CONCLUSIONS:")
 print("="*80)
@@ -134,33 +165,58 @@ print("   - Negotiate volume pricing contracts")
 print("   - Compare per-unit costs across all purchases")
 
 # Create detailed CSV for manual review
-with open('unit_pricing_analysis.csv', 'w', newline='', encoding='utf-8') as f:
-    writer = csv.writer(f)
-    writer.writerow(['Item Type', 'Description', 'Date', 'Qty', 'UOM', 'Total Price', 'Price per UOM', 'Estimated Per-Unit Price'])
-    
-    for item in criterion_gloves:
-        per_glove = item['price_per_glove'] if item['price_per_glove'] else 'Unknown'
-        writer.writerow([
-            'Criterion Gloves',
-            item['description'][:100],
-            item['date'],
-            item['qty'],
-            item['uom'],
-            f"${item['amount']:.2f}",
-            f"${item['unit_price']:.2f}",
-            f"${per_glove:.4f}" if isinstance(per_glove, float) else per_glove
-        ])
-    
-    for item in gauze_sponges:
-        writer.writerow([
-            'Gauze Sponges',
-            item['description'][:100],
-            item['date'],
-            item['qty'],
-            item['uom'],
-            f"${item['amount']:.2f}",
-            f"${item['unit_price']:.2f}",
-            'Need to calculate'
-        ])
-
-print(f"\n📄 Detailed unit analysis saved to: unit_pricing_analysis.csv")
\ No newline at end of file
+# Per-unit prices that could not be estimated are blank (NaN) in the typed columns
+profiler.mark('export')
+ANALYSIS_TYPES = {'Item Type': 'str', 'Description': 'str', 'Date': 'str', 'Qty': 'int64', 'UOM': 'str',
+                  'Total Price': 'float64', 'Price per UOM': 'float64', 'Estimated Per-Unit Price': 'float64'}
+analysis = {name: [] for name in ANALYSIS_TYPES}
+for item_type, items in [('Criterion Gloves', criterion_gloves), ('Gauze Sponges', gauze_sponges)]:
+    for item in items:
+        analysis['Item Type'].append(item_type)
+        analysis['Description'].append(item['description'][:100])
+        analysis['Date'].append(str(item['date'] or ''))
+        analysis['Qty'].append(int(item['qty']))
+        analysis['UOM'].append(item['uom'])
+        analysis['Total Price'].append(float(item['amount']))
+        analysis['Price per UOM'].append(float(item['unit_price']))
+        analysis['Estimated Per-Unit Price'].append(item['per_unit_price'])
+
+write_table('unit_pricing_analysis.pcol', analysis, types=ANALYSIS_TYPES)
+if '--no-csv' not in sys.argv:
+    with open('unit_pricing_analysis.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(analysis))
+        for item_type, description, date, qty, uom, amount, unit_price, per_unit in zip(*analysis.values()):
+            per_unit = f"${per_unit:.4f}" if per_unit else 'Unknown'
+            writer.writerow([item_type, description, date, qty, uom, f"${amount:.2f}", f"${unit_price:.2f}", per_unit])
+    print(f"\n📄 Detailed unit analysis saved to: unit_pricing_analysis.csv")
+print(f"📄 Columnar unit analysis saved to: unit_pricing_analysis.pcol")
+
+# Every SKU with its pack-size normalized price, most spent first
+SKU_TYPES = {'SKU': 'str', 'Description': 'str', 'UOM': 'str', 'Purchases': 'int64', 'Total Spent': 'float64',
+             'Units Bought': 'int64', 'Per-Unit Price': 'float64', 'Min Per-Unit Price': 'float64',
+             'Max Per-Unit Price': 'float64'}
+sku_prices = {name: [] for name in SKU_TYPES}
+for sku, sku_data in sorted(skus.items(), key=lambda x: x[1]['spent'], reverse=True):
+    sku_prices['SKU'].append(sku)
+    sku_prices['Description'].append(sku_data['description'][:100])
+    sku_prices['UOM'].append('/'.join(sorted(sku_data['uoms'])))
+    sku_prices['Purchases'].append(sku_data['purchases'])
+    sku_prices['Total Spent'].append(float(sku_data['spent']))
+    sku_prices['Units Bought'].append(int(sku_data['units']))
+    sku_prices['Per-Unit Price'].append(sku_data['per_unit_price'])
+    sku_prices['Min Per-Unit Price'].append(sku_data['min_per_unit'])
+    sku_prices['Max Per-Unit Price'].append(sku_data['max_per_unit'])
+
+write_table('unit_pricing_skus.pcol', sku_prices, types=SKU_TYPES)
+if '--no-csv' not in sys.argv:
+    with open('unit_pricing_skus.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(sku_prices))
+        for row in zip(*sku_prices.values()):
+            writer.writerow(list(row[:4]) + [f"${row[4]:.2f}", row[5]] +
+                            [f"${price:.4f}" if price is not None else 'Unknown' for price in row[6:]])
+    print(f"📄 Per-unit prices for every SKU saved to: unit_pricing_skus.csv")
+print(f"📄 Columnar SKU prices saved to: unit_pricing_skus.pcol")
+
+profiler.report('analyze_unit_pricing.py')
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark the procurement analyzers on synthetic exports
+
+For each size, synthetic_exports.py writes both vendor exports into a
+scratch directory together with a copy of these scripts, then every stage
+(generation, the shared row parser and each analyze_*.py script) runs in
+its own process there. Wall time, CPU time, rows/sec and the process's own
+peak memory per stage, plus the stage_profiler breakdown inside it (the
+analyzers' load/parse/classify/... marks), are printed and appended as one
+JSON line per run to a history file, so a slowdown shows up against earlier
+runs at the same size.
+
+Usage:
+    python3 benchmark_analyzers.py [--rows 10000 100000 1000000] [--analyzers analyze_coffee_spending.py]
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY = os.path.join(HERE, 'benchmark_history.jsonl')
+HENRY_SCHEIN_ANALYZERS = {'analyze_henry_schein.py', 'analyze_unit_pricing.py'}
+GENERATE_STAGE = 'synthetic_exports.generate'
+PARSE_STAGE = 'procurement_rows.read_rows'
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_stage_body(stage, params, profile_path):
+    """Do one stage's work in this process, marking its sub-stages on a StageProfiler"""
+    from stage_profiler import StageProfiler
+
+    if stage == GENERATE_STAGE:
+        from synthetic_exports import (AMAZON_EXPORT, HENRY_SCHEIN_EXPORT, write_amazon,
+                                       write_henry_schein)
+        profiler = StageProfiler(enabled=True, trace_memory=False, export_path=profile_path)
+        profiler.mark('amazon')
+        write_amazon(AMAZON_EXPORT, params['amazon_rows'], params['seed'])
+        profiler.mark('henry_schein')
+        write_henry_schein(HENRY_SCHEIN_EXPORT, params['henry_schein_rows'], params['seed'])
+        profiler.report(stage)
+    elif stage == PARSE_STAGE:
+        from procurement_rows import read_rows
+        from synthetic_exports import AMAZON_EXPORT, HENRY_SCHEIN_EXPORT
+        profiler = StageProfiler(enabled=True, trace_memory=False, export_path=profile_path)
+        profiler.mark('amazon')
+        read_rows(AMAZON_EXPORT)
+        profiler.mark('henry_schein')
+        read_rows(HENRY_SCHEIN_EXPORT)
+        profiler.report(stage)
+    else:
+        # The analyzers mark their own load/parse/classify/... stages
+        sys.argv = [stage, f"--profile-time={profile_path}"]
+        runpy.run_path(stage, run_name='__main__')
+
+
+def run_child(stage, result_path, params):
+    """
+    Run one stage in this (fresh) process with stdout silenced and record its
+    cost: totals, the StageProfiler breakdown and this process's own peak RSS
+    """
+    profile_path = result_path + '.stages'
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            _run_stage_body(stage, params, profile_path)
+        finally:
+            sys.stdout = stdout
+    seconds = time.perf_counter() - started
+    cpu_seconds = time.process_time() - cpu_started
+
+    substages = []
+    if os.path.exists(profile_path):
+        with open(profile_path, 'r', encoding='utf-8') as f:
+            substages = [{k: s[k] for k in ('stage', 'calls', 'wall_seconds', 'cpu_seconds')}
+                         for s in json.load(f)['stages']]
+        os.remove(profile_path)
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'seconds': seconds,
+            'cpu_seconds': cpu_seconds,
+            'peak_rss_mb': peak_rss_mb(),
+            'substages': substages,
+        }, f)
+
+
+def run_stage(stage, workdir, timeout, params=None):
+    """Run a stage in a child process with workdir as its working directory"""
+    result_path = os.path.join(workdir, '.stage_result.json')
+    if os.path.exists(result_path):
+        os.remove(result_path)
+    # Generation runs this file from the source tree, since it reads the
+    # real exports there; every other stage runs the scratch copies
+    script = __file__ if stage == GENERATE_STAGE else os.path.join(workdir, os.path.basename(__file__))
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(script), '--child', stage, result_path, json.dumps(params or {})],
+            cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {'status': 'timeout'}
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        error = completed.stderr.strip().splitlines()
+        return {'status': 'failed', 'error': error[-1] if error else f"exit {completed.returncode}"}
+    with open(result_path, 'r', encoding='utf-8') as f:
+        result = json.load(f)
+    result['status'] = 'ok'
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def benchmark(amazon_rows, henry_schein_rows, analyzers, seed, timeout, keep=False):
+    """Generate data and time every stage at one size; returns the history record"""
+    workdir = tempfile.mkdtemp(prefix='procurement_bench_')
+    for script in glob.glob(os.path.join(HERE, '*.py')):
+        shutil.copy(script, workdir)
+
+    params = {'amazon_rows': amazon_rows, 'henry_schein_rows': henry_schein_rows, 'seed': seed}
+    stages = []
+    for stage in [GENERATE_STAGE, PARSE_STAGE] + analyzers:
+        if stage in (GENERATE_STAGE, PARSE_STAGE):
+            rows = amazon_rows + henry_schein_rows
+        else:
+            rows = henry_schein_rows if stage in HENRY_SCHEIN_ANALYZERS else amazon_rows
+        stages.append(dict(stage=stage, rows=rows, **run_stage(stage, workdir, timeout, params)))
+        if stage == GENERATE_STAGE and stages[-1]['status'] != 'ok':
+            break  # nothing to analyze
+
+    for stage in stages:
+        if stage['status'] == 'ok':
+            stage['rows_per_sec'] = stage['rows'] / stage['seconds'] if stage['seconds'] > 0 else None
+
+    if keep:
+        print(f"📁 Scratch directory kept: {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'amazon_rows': amazon_rows,
+        'henry_schein_rows': henry_schein_rows,
+        'stages': stages,
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_run(history, record):
+    """Most recent earlier run at the same sizes, for comparison"""
+    for old in reversed(history):
+        if (old['amazon_rows'], old['henry_schein_rows']) == (record['amazon_rows'], record['henry_schein_rows']):
+            return old
+    return None
+
+
+def _change(seconds, old_seconds):
+    return f"{(seconds / old_seconds - 1) * 100:+.0f}%" if old_seconds else ''
+
+
+def print_record(record, previous=None):
+    before = {s['stage']: s for s in previous['stages']} if previous else {}
+    print(f"\n📊 {record['amazon_rows']:,} Amazon + {record['henry_schein_rows']:,} Henry Schein rows")
+    print(f"{'stage':<34} {'wall (s)':>9} {'cpu (s)':>8} {'rows/s':>11} {'peak MB':>8} {'vs last':>8}")
+    print(f"-"*82)
+    for stage in record['stages']:
+        if stage['status'] != 'ok':
+            print(f"{stage['stage']:<34} {stage['status'].upper():>9}  {stage.get('error', '')[:36]}")
+            continue
+        old = before.get(stage['stage'])
+        old = old if old and old['status'] == 'ok' else {}
+        print(f"{stage['stage']:<34} {stage['seconds']:>9.2f} {stage['cpu_seconds']:>8.2f} "
+              f"{stage['rows_per_sec'] or 0:>11,.0f} {stage['peak_rss_mb']:>8.0f} "
+              f"{_change(stage['seconds'], old.get('seconds')):>8}")
+        old_substages = {s['stage']: s for s in old.get('substages', [])}
+        for substage in stage.get('substages', []):
+            old_seconds = old_substages.get(substage['stage'], {}).get('wall_seconds')
+            print(f"  {substage['stage']:<32} {substage['wall_seconds']:>9.2f} {substage['cpu_seconds']:>8.2f} "
+                  f"{'':>11} {'':>8} {_change(substage['wall_seconds'], old_seconds):>8}")
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], sys.argv[3], json.loads(sys.argv[4]))
+        return
+
+    default_analyzers = sorted(os.path.basename(p) for p in glob.glob(os.path.join(HERE, 'analyze_*.py')))
+    parser = argparse.ArgumentParser(description='Benchmark the procurement analyzers on synthetic exports')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000],
+                        help='Amazon order lines per run')
+    parser.add_argument('--henry-schein-ratio', type=float, default=0.35,
+                        help='Henry Schein lines per Amazon line (the real exports are about 0.35)')
+    parser.add_argument('--analyzers', nargs='+', default=default_analyzers)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=1800, help='seconds before a stage is abandoned')
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSON lines file runs are appended to')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch directories')
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    for amazon_rows in args.rows:
+        henry_schein_rows = max(1, int(amazon_rows * args.henry_schein_ratio))
+        record = benchmark(amazon_rows, henry_schein_rows, args.analyzers, args.seed, args.timeout, args.keep)
+        print_record(record, previous_run(history, record))
+        history.append(record)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+    print(f"\n📄 History appended to: {args.history}")
+
+
+if __name__ == "__main__":
+    main()
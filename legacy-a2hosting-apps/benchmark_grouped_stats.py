@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark grouped_stats.price_stats against the per-item list loops it replaced
+
+Usage:
+    python3 benchmark_grouped_stats.py [--sizes 10000 100000 1000000] [--groups 5000]
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+
+import grouped_stats
+from grouped_stats import price_stats
+
+
+def loop_stats(keys, prices, quantities):
+    """The analyze_amazon_orders_v2.py approach: build per-item lists, then loop over them"""
+    item_analysis = defaultdict(lambda: {'count': 0, 'total_cost': 0, 'prices': [], 'quantities': []})
+    for key, price, qty in zip(keys, prices, quantities):
+        item_analysis[key]['count'] += qty
+        item_analysis[key]['total_cost'] += price * qty
+        item_analysis[key]['prices'].append(price)
+        item_analysis[key]['quantities'].append(qty)
+
+    results = {}
+    for key, data in item_analysis.items():
+        min_price = min(data['prices'])
+        results[key] = {
+            'avg_price': sum(data['prices']) / len(data['prices']),
+            'min_price': min_price,
+            'max_price': max(data['prices']),
+            'potential_savings': sum((p - min_price) * q for p, q in zip(data['prices'], data['quantities'])),
+        }
+    return results
+
+
+def synthetic_columns(size, groups, seed=7):
+    rng = random.Random(seed)
+    base_prices = [rng.uniform(2, 200) for _ in range(groups)]
+    keys, prices, quantities = [], [], []
+    for _ in range(size):
+        g = int(rng.paretovariate(1.2)) % groups  # a few items dominate, like real order histories
+        keys.append(f"B0{g:08d}")
+        prices.append(round(base_prices[g] * rng.uniform(0.8, 1.2), 2))
+        quantities.append(rng.choice((1, 1, 1, 2, 3)))
+    return keys, prices, quantities
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark grouped price statistics')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--groups', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    backend = 'numpy' if grouped_stats.np is not None else 'pure Python'
+    print(f"Grouped backend: {backend}")
+    print(f"{'rows':>10} {'groups':>8} {'loops (s)':>10} {'grouped (s)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        keys, prices, quantities = synthetic_columns(size, args.groups)
+
+        # Both implementations must agree before their timings mean anything
+        expected = loop_stats(keys, prices, quantities)
+        stats = price_stats(keys, prices, quantities)
+        for key, savings in zip(stats['key'], stats['savings']):
+            assert abs(expected[key]['potential_savings'] - savings) < 1e-6 * max(1, savings), key
+
+        loops = best_of(lambda: loop_stats(keys, prices, quantities), args.repeat)
+        grouped = best_of(lambda: price_stats(keys, prices, quantities), args.repeat)
+        print(f"{size:>10} {len(stats['key']):>8} {loops:>10.3f} {grouped:>12.3f} {loops / grouped:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Chunked columnar binary files for analyzer results
+
+The analyzers' CSV outputs make every downstream spreadsheet or dashboard
+re-parse text. This format stores the same results as typed columns in
+chunks of rows, so readers can memory-map the file and use numeric columns
+directly without copying or parsing:
+
+    PCOL magic (8 bytes)
+    chunk buffers, each 8-byte aligned:
+        int64 / float64 / bool  -> little-endian values
+        str                     -> uint64 end offsets, then the UTF-8 bytes
+    JSON footer: schema, row counts and buffer offsets per chunk
+    footer length (uint64 little-endian), PCOL magic
+
+Blank numeric cells are stored as NaN (so such a column is float64) and
+missing strings as ''.
+
+Usage:
+    python3 columnar.py henry_schein_analysis.pcol [--head 10] [--csv out.csv]
+"""
+
+import csv
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b'PCOL\x01\x00\x00\x00'
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_ROWS = 65536
+ALIGNMENT = 8
+TYPE_CODES = {'int64': 'q', 'float64': 'd', 'bool': 'B'}
+NUMPY_TYPES = {'int64': '<i8', 'float64': '<f8', 'bool': '|u1'}
+_FOOTER_TAIL = struct.Struct('<Q8s')
+
+
+def infer_type(values):
+    """Narrowest of bool/int64/float64/str that holds every value (None allowed for floats)"""
+    kinds = {type(v) for v in values}
+    if kinds <= {bool}:
+        return 'bool'
+    if kinds <= {int}:
+        return 'int64'
+    if kinds <= {int, float, type(None)}:
+        return 'float64'
+    return 'str'
+
+
+def _encode_numeric(column_type, values):
+    if column_type == 'float64':
+        values = [math.nan if v is None else v for v in values]
+    buffer = array(TYPE_CODES[column_type], values)
+    if sys.byteorder == 'big':
+        buffer.byteswap()
+    return buffer.tobytes()
+
+
+def _encode_strings(values):
+    encoded = [('' if v is None else str(v)).encode('utf-8') for v in values]
+    offsets = array('Q')
+    end = 0
+    for value in encoded:
+        end += len(value)
+        offsets.append(end)
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets.tobytes(), b''.join(encoded)
+
+
+class ColumnarWriter:
+    """
+    Streams chunks of typed columns to a .pcol file
+
+    The file is written under a temporary name and moved into place on
+    close, so readers never see a half-written file.
+    """
+
+    def __init__(self, path, schema, chunk_rows=DEFAULT_CHUNK_ROWS, metadata=None):
+        self.path = path
+        self.schema = [(name, column_type) for name, column_type in schema]
+        for name, column_type in self.schema:
+            if column_type not in TYPE_CODES and column_type != 'str':
+                raise ValueError(f"Unsupported column type for {name!r}: {column_type}")
+        self.chunk_rows = chunk_rows
+        self.metadata = metadata or {}
+        self.chunks = []
+        self.rows = 0
+        self._tmp_path = path + '.tmp'
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(MAGIC)
+
+    def _buffer(self, data):
+        """Write one aligned buffer; returns its location"""
+        offset = self._file.tell()
+        self._file.write(data)
+        padding = -len(data) % ALIGNMENT
+        if padding:
+            self._file.write(b'\0' * padding)
+        return {'offset': offset, 'length': len(data)}
+
+    def write(self, columns):
+        """Append rows given as {column name: list of values}, split into chunks"""
+        lengths = {len(columns[name]) for name, _ in self.schema}
+        if len(lengths) != 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        count = lengths.pop()
+        for start in range(0, count, self.chunk_rows):
+            end = min(start + self.chunk_rows, count)
+            buffers = {}
+            for name, column_type in self.schema:
+                values = columns[name][start:end]
+                if column_type == 'str':
+                    offsets, data = _encode_strings(values)
+                    buffers[name] = {'offsets': self._buffer(offsets), 'data': self._buffer(data)}
+                else:
+                    buffers[name] = self._buffer(_encode_numeric(column_type, values))
+            self.chunks.append({'rows': end - start, 'buffers': buffers})
+            self.rows += end - start
+
+    def close(self):
+        if self._file is None:
+            return
+        footer = json.dumps({
+            'version': FORMAT_VERSION,
+            'rows': self.rows,
+            'schema': [{'name': name, 'type': column_type} for name, column_type in self.schema],
+            'chunks': self.chunks,
+            'metadata': self.metadata,
+        }, separators=(',', ':')).encode('utf-8')
+        self._file.write(footer)
+        self._file.write(_FOOTER_TAIL.pack(len(footer), MAGIC))
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            self._file = None
+            os.remove(self._tmp_path)
+
+
+def write_table(path, columns, types=None, chunk_rows=DEFAULT_CHUNK_ROWS, metadata=None):
+    """Write {column name: values} in one go, inferring any column types not given"""
+    types = types or {}
+    schema = [(name, types.get(name) or infer_type(values)) for name, values in columns.items()]
+    with ColumnarWriter(path, schema, chunk_rows, metadata) as writer:
+        writer.write(columns)
+    return writer.rows
+
+
+class StringColumn:
+    """Lazily decoded view of one chunk's string column"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        start = self.offsets[index - 1] if index > 0 else 0
+        return bytes(self.data[start:self.offsets[index]]).decode('utf-8')
+
+    def __iter__(self):
+        start = 0
+        for end in self.offsets:
+            yield bytes(self.data[start:end]).decode('utf-8')
+            start = end
+
+
+class ColumnarFile:
+    """
+    Memory-mapped reader for .pcol files
+
+    Numeric columns come back as memoryviews straight over the mapped file
+    (or numpy arrays via to_numpy), so nothing is copied until values are
+    used. The mapping stays open while any column view is still alive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        size = len(self._mmap)
+        if size < len(MAGIC) + _FOOTER_TAIL.size or self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a columnar results file")
+        footer_length, magic = _FOOTER_TAIL.unpack_from(self._mmap, size - _FOOTER_TAIL.size)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: truncated columnar results file")
+        footer_start = size - _FOOTER_TAIL.size - footer_length
+        footer = json.loads(bytes(self._view[footer_start:footer_start + footer_length]))
+        if footer.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported format version {footer.get('version')}")
+        self.rows = footer['rows']
+        self.schema = [(c['name'], c['type']) for c in footer['schema']]
+        self.types = dict(self.schema)
+        self.chunks = footer['chunks']
+        self.metadata = footer['metadata']
+
+    @property
+    def columns(self):
+        return [name for name, _ in self.schema]
+
+    def _slice(self, location):
+        return self._view[location['offset']:location['offset'] + location['length']]
+
+    def chunk_column(self, chunk, name):
+        """One chunk of a column: a typed memoryview, or a StringColumn for text"""
+        column_type = self.types[name]
+        buffers = self.chunks[chunk]['buffers'][name]
+        if column_type == 'str':
+            offsets = self._slice(buffers['offsets'])
+            if sys.byteorder == 'big':
+                swapped = array('Q', offsets)
+                swapped.byteswap()
+                offsets = memoryview(swapped)
+            return StringColumn(offsets.cast('Q'), self._slice(buffers['data']))
+        data = self._slice(buffers)
+        if sys.byteorder == 'big':
+            swapped = array(TYPE_CODES[column_type], data)
+            swapped.byteswap()
+            return memoryview(swapped)
+        return data.cast('?' if column_type == 'bool' else TYPE_CODES[column_type])
+
+    def column(self, name):
+        """Every chunk of a column, in order"""
+        return [self.chunk_column(i, name) for i in range(len(self.chunks))]
+
+    def to_numpy(self, name):
+        """Numeric column as a numpy array; zero-copy when the file has a single chunk"""
+        if np is None:
+            raise RuntimeError('numpy is not installed')
+        column_type = self.types[name]
+        if column_type == 'str':
+            raise TypeError(f"{name!r} is a string column")
+        dtype = np.dtype(NUMPY_TYPES[column_type])
+        parts = [np.frombuffer(self._mmap, dtype=dtype, count=chunk['rows'],
+                               offset=chunk['buffers'][name]['offset']) for chunk in self.chunks]
+        if column_type == 'bool':
+            parts = [part.view(np.bool_) for part in parts]
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    def to_pylist(self, name):
+        return [v for part in self.column(name) for v in part]
+
+    def iter_rows(self):
+        """Rows as dicts, decoding one chunk at a time"""
+        names = self.columns
+        for i, chunk in enumerate(self.chunks):
+            parts = [self.chunk_column(i, name) for name in names]
+            for r in range(chunk['rows']):
+                yield {name: part[r] for name, part in zip(names, parts)}
+
+    def close(self):
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            pass  # a caller still holds a column view; the mapping closes when it is released
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_csv(columnar, path):
+    """Write a .pcol file's rows out as CSV"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columnar.columns)
+        for row in columnar.iter_rows():
+            writer.writerow('' if isinstance(v, float) and math.isnan(v) else v for v in row.values())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or export a columnar results file')
+    parser.add_argument('path')
+    parser.add_argument('--head', type=int, default=5, help='rows to show')
+    parser.add_argument('--csv', help='export all rows to this CSV file')
+    args = parser.parse_args()
+
+    with ColumnarFile(args.path) as results:
+        print(f"{args.path}: {results.rows} rows in {len(results.chunks)} chunk(s)")
+        for name, column_type in results.schema:
+            print(f"  {name:30} {column_type}")
+        for key, value in results.metadata.items():
+            print(f"  [{key}] {value}")
+        for i, row in enumerate(results.iter_rows()):
+            if i >= args.head:
+                break
+            print(row)
+        if args.csv:
+            export_csv(results, args.csv)
+            print(f"📄 Exported to: {args.csv}")
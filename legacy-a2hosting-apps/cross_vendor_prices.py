@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Cross-vendor per-unit price index for Amazon and Henry Schein purchases
+
+Normalizes every item to a per-unit price using its pack size, then matches
+Amazon items to Henry Schein items through an inverted token index so each
+item is only scored against the items it shares informative tokens with,
+instead of every item on the other side.
+
+Units only compare when they hold the same amount of product: when both
+titles state a content size (50 oz, 1 gallon, 10 yards) the pair is priced
+per fl oz, oz or yard instead, and a pair where only one side states a size,
+or the sizes measure different things, is skipped. Spreads are given as a
+share of the higher price.
+
+Usage:
+    python3 cross_vendor_prices.py [--amazon FILE] [--henry-schein FILE] [--min-score 0.35]
+"""
+
+import argparse
+import csv
+import math
+import re
+from collections import defaultdict
+
+from pack_sizes import units_per_purchase
+from procurement_rows import AMAZON, HENRY_SCHEIN, read_rows
+
+AMAZON_EXPORT = 'orders_from_20240707_to_20250707_20250707_1040.csv'
+HENRY_SCHEIN_EXPORT = '1eb6921b-e392-457b-8a1f-a08236e20da9.csv'
+
+_TOKEN = re.compile(r'[a-z][a-z0-9\-]+')
+_STOPWORDS = {
+    'the', 'and', 'for', 'with', 'of', 'to', 'in', 'by', 'or', 'on', 'pack', 'count', 'box', 'case',
+    'each', 'non', 'not', 'made', 'free', 'use', 'size', 'inch', 'pcs', 'piece', 'pieces',
+}
+
+# Content size stated in a title (also after the "x" of 2"x11yd), and each
+# unit's factor per fl oz (volume), oz (weight) or yard (length); a bare "oz"
+# is read as whichever of fl oz and oz the other title uses
+_CONTENT = re.compile(
+    r'(?:(?<=x)|(?<![\w.]))(\d+(?:\.\d+)?)\s*-?\s*(fl\.?\s*oz|fluid\s+ounces?|ounces?|oz|gallons?|gal|quarts?|qt|liters?|litres?|ltr'
+    r'|ml|l|cc|pounds?|lbs?|kg|grams?|g|yards?|yds?|feet|ft)\b', re.IGNORECASE)
+CONTENT_UNITS = {
+    'fl oz': {'fl oz': 1}, 'oz': {'fl oz': 1, 'oz': 1},
+    'gal': {'fl oz': 128}, 'qt': {'fl oz': 32}, 'l': {'fl oz': 33.814}, 'ml': {'fl oz': 1 / 29.5735},
+    'lb': {'oz': 16}, 'kg': {'oz': 35.274}, 'g': {'oz': 1 / 28.3495},
+    'yd': {'yd': 1}, 'ft': {'yd': 1 / 3},
+}
+_CONTENT_SPELLINGS = {
+    'fluid ounce': 'fl oz', 'ounce': 'oz', 'gallon': 'gal', 'quart': 'qt', 'liter': 'l', 'litre': 'l', 'ltr': 'l',
+    'cc': 'ml', 'pound': 'lb', 'lbs': 'lb', 'gram': 'g', 'yard': 'yd', 'yds': 'yd', 'feet': 'ft',
+}
+
+# Tokens appearing in more than this share of the indexed items carry little
+# signal and would make posting lists long, so they're left out of the index.
+MAX_DOCUMENT_FREQUENCY = 0.05
+
+
+def tokens(text):
+    return {t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS}
+
+
+def unit_content(title):
+    """First content size in `title` as (amount, unit), e.g. (50.0, 'oz'), or None"""
+    match = _CONTENT.search(title)
+    if not match:
+        return None
+    unit = re.sub(r'[\s.]+', ' ', match.group(2).lower())
+    if unit.startswith('fl'):
+        unit = 'fl oz'
+    unit = unit.rstrip('s') if unit not in ('lbs', 'yds') else unit
+    return float(match.group(1)), _CONTENT_SPELLINGS.get(unit, unit)
+
+
+def comparable_contents(a, b):
+    """
+    Amounts of two unit contents in a shared measure, as (amount_a, amount_b, measure)
+
+    (1, 1, 'unit') when neither states a size; None when only one does or
+    they measure different things (volume against weight).
+    """
+    if a is None and b is None:
+        return 1, 1, 'unit'
+    if a is None or b is None:
+        return None
+    factors_a, factors_b = CONTENT_UNITS[a[1]], CONTENT_UNITS[b[1]]
+    shared = sorted(factors_a.keys() & factors_b.keys())
+    if not shared:
+        return None
+    measure = shared[0]
+    return a[0] * factors_a[measure], b[0] * factors_b[measure], measure
+
+
+def priced_items(rows):
+    """
+    Collapse purchase rows into items with a per-unit price (skipping unknown pack sizes)
+
+    Units are counted row by row, so an item whose rows hold different pack
+    sizes is priced over the units actually bought.
+    """
+    items = {}
+    for row in rows:
+        units = units_per_purchase(row)
+        if not units:
+            continue
+        item = items.get(row['item_key'])
+        if item is None:
+            item = items[row['item_key']] = {
+                'vendor': row['vendor'],
+                'item_key': row['item_key'],
+                'title': row['title'],
+                'content': unit_content(row['title']),
+                'units': 0,
+                'quantity': 0,
+                'total': 0.0,
+            }
+        item['units'] += row['quantity'] * units
+        item['quantity'] += row['quantity']
+        item['total'] += row['amount']
+    for item in items.values():
+        item['per_unit'] = item['total'] / item['units']
+    return list(items.values())
+
+
+class TokenIndex:
+    """Inverted index from token to the items containing it, with IDF weights"""
+
+    def __init__(self, items):
+        self.items = items
+        self.item_tokens = [tokens(item['title']) for item in items]
+        postings = defaultdict(list)
+        for i, item_tokens in enumerate(self.item_tokens):
+            for token in item_tokens:
+                postings[token].append(i)
+
+        n = max(len(items), 1)
+        max_postings = max(2, int(n * MAX_DOCUMENT_FREQUENCY))
+        self.idf = {token: math.log(1 + n / len(ids)) for token, ids in postings.items()}
+        self.postings = {token: ids for token, ids in postings.items() if len(ids) <= max_postings}
+        self.norms = [math.sqrt(sum(self.idf[t] ** 2 for t in item_tokens)) for item_tokens in self.item_tokens]
+
+    def best_match(self, title, min_score):
+        """Highest cosine-scored indexed item sharing tokens with `title`, as (index, score)"""
+        query = tokens(title)
+        weights = {t: self.idf.get(t, math.log(1 + len(self.items))) for t in query}
+        query_norm = math.sqrt(sum(w ** 2 for w in weights.values()))
+        if not query_norm:
+            return None, 0.0
+
+        scores = defaultdict(float)
+        for token in query:
+            for i in self.postings.get(token, ()):
+                scores[i] += weights[token] * self.idf[token]
+
+        best, best_score = None, min_score
+        for i, dot in scores.items():
+            score = dot / (query_norm * self.norms[i])
+            if score >= best_score:
+                best, best_score = i, score
+        return best, (best_score if best is not None else 0.0)
+
+
+def match_vendors(amazon_items, henry_schein_items, min_score=0.35):
+    """
+    Pair each Amazon item with its closest Henry Schein item and compute the spread
+
+    Prices are compared per unit, or per fl oz/oz/yard when both titles state
+    a content size. Pairs whose units aren't comparable are left out and
+    returned as the second value.
+    """
+    index = TokenIndex(henry_schein_items)
+    matches = []
+    skipped = []
+    for item in amazon_items:
+        i, score = index.best_match(item['title'], min_score)
+        if i is None:
+            continue
+        other = henry_schein_items[i]
+        contents = comparable_contents(item['content'], other['content'])
+        if contents is None:
+            skipped.append((item, other))
+            continue
+        amount, other_amount, measure = contents
+        price, other_price = item['per_unit'] / amount, other['per_unit'] / other_amount
+        spread = price - other_price
+        higher = max(price, other_price)
+        matches.append({
+            'amazon': item,
+            'henry_schein': other,
+            'score': score,
+            'measure': measure,
+            'amazon_price': price,
+            'henry_schein_price': other_price,
+            'spread': spread,
+            'spread_percent': abs(spread) / higher * 100 if higher > 0 else 0,
+            'cheaper_vendor': 'Amazon' if spread < 0 else 'Henry Schein',
+        })
+    matches.sort(key=lambda m: m['spread_percent'], reverse=True)
+    return matches, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-unit price spreads between Amazon and Henry Schein')
+    parser.add_argument('--amazon', default=AMAZON_EXPORT)
+    parser.add_argument('--henry-schein', default=HENRY_SCHEIN_EXPORT)
+    parser.add_argument('--min-score', type=float, default=0.35, help='minimum title similarity (0-1)')
+    parser.add_argument('--output', default='cross_vendor_price_index.csv')
+    args = parser.parse_args()
+
+    vendor_rows = {}
+    for path in (args.amazon, args.henry_schein):
+        vendor, rows = read_rows(path)
+        vendor_rows[vendor] = rows
+
+    amazon_items = priced_items(vendor_rows.get(AMAZON, []))
+    henry_schein_items = priced_items(vendor_rows.get(HENRY_SCHEIN, []))
+    matches, skipped = match_vendors(amazon_items, henry_schein_items, args.min_score)
+
+    print(f"\n🔄 CROSS-VENDOR PER-UNIT PRICE INDEX")
+    print(f"="*80)
+    print(f"Amazon items with known pack size: {len(amazon_items)}")
+    print(f"Henry Schein items with known pack size: {len(henry_schein_items)}")
+    print(f"Matched pairs: {len(matches)}")
+    print(f"Skipped pairs with sizes that don't compare: {len(skipped)}")
+
+    print(f"\n💲 LARGEST PER-UNIT PRICE SPREADS:")
+    print(f"-"*80)
+    for m in matches[:15]:
+        print(f"{m['amazon']['title'][:70]}...")
+        print(f"  ≈ {m['henry_schein']['title'][:70]}... (match {m['score']:.2f})")
+        print(f"  Amazon ${m['amazon_price']:.4f}/{m['measure']} vs Henry Schein ${m['henry_schein_price']:.4f}/{m['measure']}"
+              f" - {m['cheaper_vendor']} cheaper by {m['spread_percent']:.1f}% of the higher price")
+
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Amazon Item', 'Henry Schein Item', 'Match Score', 'Amazon Units Bought', 'Amazon Per-Unit',
+                         'Henry Schein Units Bought', 'Henry Schein Per-Unit', 'Compared Per', 'Amazon Price',
+                         'Henry Schein Price', 'Spread', 'Spread % of Higher Price', 'Cheaper Vendor'])
+        for m in matches:
+            writer.writerow([
+                m['amazon']['title'][:100],
+                m['henry_schein']['title'][:100],
+                f"{m['score']:.2f}",
+                m['amazon']['units'],
+                f"${m['amazon']['per_unit']:.4f}",
+                m['henry_schein']['units'],
+                f"${m['henry_schein']['per_unit']:.4f}",
+                m['measure'],
+                f"${m['amazon_price']:.4f}",
+                f"${m['henry_schein_price']:.4f}",
+                f"${m['spread']:.4f}",
+                f"{m['spread_percent']:.1f}%",
+                m['cheaper_vendor']
+            ])
+
+    print(f"\n📄 Price index saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Cached schema profiles for vendor CSV exports
+
+analyze_henry_schein.py guesses its price/description/quantity/date columns
+by matching headers against keyword lists. This module does that sniffing
+once per header layout, infers a dtype for every column from a sample of
+rows, and saves the result as a profile keyed by a fingerprint of the
+header row. Later loads of any export with the same headers skip detection
+and parse straight into typed columns.
+
+Usage:
+    python3 csv_schema.py 1eb6921b-*.csv      # show (and cache) the profile
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+PROFILE_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_profiles.json')
+PROFILE_VERSION = 4
+SAMPLE_ROWS = 200
+
+# Keyword lists from analyze_henry_schein.py; a header matches a role when it
+# contains one of the keywords, and the first matching header wins.
+ROLE_KEYWORDS = {
+    'price': ['Total', 'Amount', 'Price', 'Extended Price', 'Line Total', 'Total Amount', 'Net Amount'],
+    'description': ['Description', 'Product Description', 'Item Description', 'Product Name', 'Item'],
+    'quantity': ['Quantity', 'Qty', 'Units', 'Count'],
+    'date': ['Date', 'Order Date', 'Ship Date', 'Invoice Date'],
+    'uom': ['Uom', 'Unit of Measure'],
+    'sku': ['Item Code', 'SKU', 'Product Code', 'Catalog Number'],
+}
+
+# Roles whose columns feed the spend and quantity totals; their dtype is
+# never narrowed to str by a stray 'N/A' or 'TBD' cell
+NUMERIC_ROLES = ('price', 'quantity')
+
+# Identifier columns: numeric-looking values here ('1118536', '00409196607')
+# are codes and always stay text
+CODE_HEADER = re.compile(r'\b(?:code|sku|catalog|number|id|zip|asin|unspsc|upc|ndc|model|part)\b', re.IGNORECASE)
+
+_CURRENCY = re.compile(r'^-?\$?-?[\d,]*\.?\d+$')
+_INTEGER = re.compile(r'^-?\d[\d,]*$')
+_DATE = re.compile(r'^\d{1,2}/\d{1,2}/\d{4}( \d{1,2}:\d{2}(:\d{2})?)?$')
+
+
+def header_fingerprint(headers):
+    """Stable identifier for a header layout"""
+    return hashlib.sha1('\x1f'.join(headers).encode('utf-8')).hexdigest()[:16]
+
+
+def detect_columns(headers):
+    """Resolve each role to the first header containing one of its keywords"""
+    columns = {role: None for role in ROLE_KEYWORDS}
+    for header in headers:
+        header_lower = header.lower()
+        for role, keywords in ROLE_KEYWORDS.items():
+            if not columns[role] and any(k.lower() in header_lower for k in keywords):
+                columns[role] = header
+    return columns
+
+
+def infer_dtype(values):
+    """Narrowest of int/float/date/str that every non-blank sample value fits"""
+    values = [v.strip() for v in values if v and v.strip()]
+    if not values:
+        return 'str'
+    if any(len(v) > 1 and v[0] == '0' and v[1].isdigit() for v in values):
+        return 'str'  # codes like '0123' must keep their leading zeros
+    if all(_INTEGER.match(v) for v in values):
+        return 'int'
+    if all(_CURRENCY.match(v) for v in values):
+        return 'float'
+    if all(_DATE.match(v) for v in values):
+        return 'date'
+    return 'str'
+
+
+def column_dtype(header, values, numeric=False):
+    """
+    dtype for one column: code columns are always str, numeric role columns
+    are int or float from their numeric-looking values, others are inferred
+    """
+    if CODE_HEADER.search(header):
+        return 'str'
+    if numeric:
+        numbers = [v.strip() for v in values if v and _CURRENCY.match(v.strip())]
+        return 'int' if numbers and all(_INTEGER.match(v) for v in numbers) else 'float'
+    return infer_dtype(values)
+
+
+def _to_int(value):
+    value = value.strip()
+    return int(value.replace(',', '')) if value else None
+
+
+def _to_float(value):
+    value = value.strip()
+    return float(re.sub(r'[^\d.-]', '', value)) if value else None
+
+
+def _to_date(value):
+    value = value.strip()
+    if not value:
+        return None
+    return datetime.strptime(value.split()[0], '%m/%d/%Y').date()
+
+
+CONVERTERS = {'int': _to_int, 'float': _to_float, 'date': _to_date, 'str': str}
+
+
+class ProfileStore:
+    """JSON file of schema profiles keyed by header fingerprint"""
+
+    def __init__(self, path=PROFILE_STORE):
+        self.path = path
+        self.profiles = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == PROFILE_VERSION:
+                self.profiles = data['profiles']
+
+    def get(self, fingerprint):
+        return self.profiles.get(fingerprint)
+
+    def put(self, profile):
+        self.profiles[profile['fingerprint']] = profile
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': PROFILE_VERSION, 'profiles': self.profiles}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def build_profile(headers, sample_rows):
+    """Detect column roles and dtypes from a header row and sample data rows"""
+    columns = detect_columns(headers)
+    numeric = {columns[role] for role in NUMERIC_ROLES}
+    return {
+        'fingerprint': header_fingerprint(headers),
+        'headers': list(headers),
+        'columns': columns,
+        'dtypes': {h: column_dtype(h, [row[i] if i < len(row) else '' for row in sample_rows], h in numeric)
+                   for i, h in enumerate(headers)},
+        'profiled_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def load_typed(path, store=None, parse_dates=False):
+    """
+    Read a CSV export into typed columns using its cached profile
+
+    Returns (profile, columns, cached) where columns maps header -> list of
+    values. Blank cells become None. Dtypes come from a sample of rows, so a
+    later cell can fail to convert ('N/A' in an Amount column); it becomes
+    None too, is counted in profile['unconverted'] and reported on stderr,
+    and the column keeps its dtype. The cached profile is never rewritten
+    from a load. Date columns stay as text unless parse_dates is set, since
+    the reports print them verbatim.
+    """
+    store = store or ProfileStore()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        headers = next(reader, [])
+        rows = list(reader)
+
+    profile = store.get(header_fingerprint(headers))
+    cached = profile is not None
+    if not cached:
+        profile = build_profile(headers, rows[:SAMPLE_ROWS])
+        store.put(profile)
+
+    columns = {}
+    unconverted = {}
+    for i, header in enumerate(headers):
+        cells = [row[i] if i < len(row) else '' for row in rows]
+        dtype = profile['dtypes'][header]
+        columns[header], failed = _convert(cells, dtype, parse_dates)
+        if failed:
+            unconverted[header] = failed
+            print(f"⚠️  {os.path.basename(path)}: {len(failed)} {header!r} cell(s) not {dtype}, read as blank "
+                  f"(e.g. {failed[0]!r})", file=sys.stderr)
+    return dict(profile, unconverted={h: len(f) for h, f in unconverted.items()}), columns, cached
+
+
+def _convert(cells, dtype, parse_dates):
+    """Convert cell by cell; returns (values, texts of the cells that failed)"""
+    if dtype == 'date' and not parse_dates:
+        dtype = 'str'
+    convert = CONVERTERS[dtype]
+    values, failed = [], []
+    for cell in cells:
+        try:
+            values.append(convert(cell))
+        except ValueError:
+            values.append(None)
+            failed.append(cell)
+    return values, failed
+
+
+if __name__ == "__main__":
+    for export in sys.argv[1:]:
+        profile, columns, cached = load_typed(export)
+        row_count = len(next(iter(columns.values()), []))
+        print(f"{export}: {row_count} rows, profile {profile['fingerprint']} ({'cached' if cached else 'new'})")
+        for role, header in profile['columns'].items():
+            print(f"  {role:12} -> {header}")
+        for header, dtype in profile['dtypes'].items():
+            print(f"  {header:30} {dtype}")
+        for header, count in profile['unconverted'].items():
+            print(f"  {header:30} {count} cell(s) unconverted")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Grouped reductions over columnar purchase data
+
+Replaces the per-item Python lists the analyzers build (prices, quantities,
+...) followed by a loop of sum()/min()/max() calls. Group keys are
+factorized to integer codes once; sums come from a hash-style bincount and
+min/max from reductions over a stable sort by code, so every statistic is
+computed for all groups in one vectorized pass.
+
+numpy is used when installed. Without it the same statistics are
+accumulated in a single pure-Python pass over the rows.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # the analyzers must keep running on a bare Python install
+    np = None
+
+
+def factorize(keys):
+    """Map keys to dense integer codes in first-seen order; returns (codes, unique keys)"""
+    index = {}
+    codes = [index.setdefault(key, len(index)) for key in keys]
+    return codes, list(index)
+
+
+def _numpy_stats(codes, groups, prices, quantities, totals):
+    codes = np.asarray(codes, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities)
+    integer_quantities = np.issubdtype(quantities.dtype, np.integer)
+    quantities = quantities.astype(np.float64)
+    totals = prices * quantities if totals is None else np.asarray(totals, dtype=np.float64)
+
+    counts = np.bincount(codes, minlength=groups)
+    price_sum = np.bincount(codes, weights=prices, minlength=groups)
+
+    order = np.argsort(codes, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sorted_prices = prices[order]
+    min_price = np.minimum.reduceat(sorted_prices, starts)
+    max_price = np.maximum.reduceat(sorted_prices, starts)
+    quantity = np.bincount(codes, weights=quantities, minlength=groups)
+    if integer_quantities:
+        quantity = np.rint(quantity).astype(np.int64)
+
+    return {
+        'count': counts.tolist(),
+        'quantity': quantity.tolist(),
+        'total': np.bincount(codes, weights=totals, minlength=groups).tolist(),
+        'price_sum': price_sum.tolist(),
+        'mean': (price_sum / counts).tolist(),
+        'min': min_price.tolist(),
+        'max': max_price.tolist(),
+        'savings': np.bincount(codes, weights=(prices - min_price[codes]) * quantities, minlength=groups).tolist(),
+    }
+
+
+def _python_stats(codes, groups, prices, quantities, totals):
+    count = [0] * groups
+    quantity = [0] * groups
+    total = [0.0] * groups
+    price_sum = [0.0] * groups
+    weighted_sum = [0.0] * groups
+    min_price = [float('inf')] * groups
+    max_price = [float('-inf')] * groups
+    if totals is None:
+        totals = [p * q for p, q in zip(prices, quantities)]
+
+    for code, p, q, t in zip(codes, prices, quantities, totals):
+        count[code] += 1
+        quantity[code] += q
+        total[code] += t
+        price_sum[code] += p
+        weighted_sum[code] += p * q
+        if p < min_price[code]:
+            min_price[code] = p
+        if p > max_price[code]:
+            max_price[code] = p
+
+    return {
+        'count': count,
+        'quantity': quantity,
+        'total': total,
+        'price_sum': price_sum,
+        'mean': [s / c for s, c in zip(price_sum, count)],
+        'min': min_price,
+        'max': max_price,
+        # sum((p - min) * q) == sum(p * q) - min * sum(q)
+        'savings': [w - m * q for w, m, q in zip(weighted_sum, min_price, quantity)],
+    }
+
+
+def price_stats(keys, prices, quantities, totals=None):
+    """
+    Per-group count, quantity, total, mean/min/max price and potential savings
+
+    Savings are what the group would have cost at its lowest price:
+    sum((price - min_price) * quantity). `totals` defaults to price * quantity
+    when the caller has no separate line-total column.
+    """
+    codes, unique_keys = factorize(keys)
+    compute = _numpy_stats if np is not None else _python_stats
+    stats = {'key': unique_keys}
+    if unique_keys:
+        stats.update(compute(codes, len(unique_keys), prices, quantities, totals))
+    else:
+        stats.update({name: [] for name in ('count', 'quantity', 'total', 'price_sum', 'mean', 'min', 'max', 'savings')})
+    return stats
+
+
+def rows(stats):
+    """Turn price_stats() columns into one dict per group"""
+    names = list(stats)
+    return [dict(zip(names, values)) for values in zip(*stats.values())]
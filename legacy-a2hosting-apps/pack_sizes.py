@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Pack-size parsing for per-unit price comparisons
+
+Generalizes the `(\\d+)/(?:pk|bx|box|pack)` lookup in analyze_unit_pricing.py
+so any Henry Schein description or Amazon title can be reduced to the number
+of individual units in one purchased unit of measure.
+
+extract_packs() does the same for a whole description column at once: each
+pattern runs once over all distinct descriptions joined together, instead of
+once per pattern per row, and the matches are handed back to their rows.
+
+Usage:
+    python3 pack_sizes.py [1eb6921b-e392-457b-8a1f-a08236e20da9.csv] [--check]
+"""
+
+import re
+from bisect import bisect_right
+from collections import namedtuple
+
+# Henry Schein unit-of-measure codes and the words used for them in descriptions
+CONTAINER_CODES = {
+    'bx': 'BX', 'box': 'BX',
+    'pk': 'PK', 'pack': 'PK', 'package': 'PK', 'pkg': 'PK',
+    'ca': 'CA', 'cs': 'CA', 'case': 'CA',
+    'bt': 'BT', 'bottle': 'BT',
+    'cn': 'CN', 'can': 'CN', 'canister': 'CN',
+    'bg': 'BG', 'bag': 'BG',
+    'rl': 'RL', 'roll': 'RL',
+    'tu': 'TU', 'tube': 'TU',
+    'vl': 'VL', 'vial': 'VL',
+    'ea': 'EA', 'each': 'EA',
+}
+SINGLE_UNIT_CODES = {'EA', 'VL'}
+
+_CONTAINERS = '|'.join(sorted(CONTAINER_CODES, key=len, reverse=True))
+
+# "100/Box", "10/Pk", "160/Can"
+INNER_COUNT = re.compile(r'\b(\d+)\s*/\s*(' + _CONTAINERS + r')\b', re.IGNORECASE)
+# "10 BX/CA", "12 BT/CA"
+OUTER_COUNT = re.compile(r'\b(\d+)\s*(' + _CONTAINERS + r')\s*/\s*(' + _CONTAINERS + r')\b', re.IGNORECASE)
+
+# Amazon title phrasings
+PACKS_OF = re.compile(r'\b(\d+)\s*packs?\s+of\s+(\d+)\b', re.IGNORECASE)
+UNIT_COUNT = re.compile(r'\b(\d[\d,]*)\s*[- ]?(?:count|ct|pcs|pieces|pc|wipes|sheets|gloves)\b', re.IGNORECASE)
+PACK_OF = re.compile(r'\b(?:pack|case|box|set|bag)\s+of\s+(\d+)\b', re.IGNORECASE)
+N_PACK = re.compile(r'\b(\d+)\s*[- ]?(?:pack|pk)\b', re.IGNORECASE)
+
+
+# What one purchased unit of measure holds: `units` individual items (None if
+# the description doesn't say), made up of `pack_size` boxes/packs (1 when the
+# purchase is a single container), bought by `uom` (normalized code)
+Pack = namedtuple('Pack', ['units', 'pack_size', 'uom'])
+
+# Descriptions whose units per uom are known; --check verifies them
+CHECK_PACKS = [
+    ('Sodium Chloride Bacteriostatic Injection 0.9% MDV 30mL 25/Package, 4 BX/CA', 'BX', 25),
+    ('Sodium Chloride Bacteriostatic Injection 0.9% MDV 30mL 25/Package, 4 BX/CA', 'CA', 100),
+    ('Criterion N100 Nitrile Exam Gloves Medium Standard Blue Non-Sterile Chemo Tested, 10 BX/CA', 'BX', None),
+    ('Criterion N100 Nitrile Exam Gloves Medium Standard Blue Non-Sterile Chemo Tested, 10 BX/CA', 'CA', None),
+    ('Kleenex Facial Tissue White 2 Ply Flat Box 100/Box, 36 BX/CA', 'CA', 3600),
+    ('Sani-Cloth Large 6 in x 6.75 in Canister 160/Can, 12 CN/CA', 'CA', 1920),
+    ('Keyes Dermal Biopsy Punch 3mm Sterile Disposable Each, 50 EA/CA', 'CA', 50),
+]
+
+# Joins descriptions for batched scanning. None of the patterns can match
+# across it, and csv refuses NUL bytes, so no description contains one.
+_SEPARATOR = '\0'
+
+
+def _int(text):
+    return int(text.replace(',', ''))
+
+
+def uom_code(uom):
+    """Normalized unit-of-measure code: 'box' and 'Bx' both become 'BX'"""
+    uom = (uom or '').strip()
+    return CONTAINER_CODES.get(uom.lower(), uom.upper())
+
+
+def _henry_schein_pack(inner_counts, outer_counts, uom):
+    """Pack from a description's INNER_COUNT and OUTER_COUNT matches, bought by `uom`"""
+    if uom in SINGLE_UNIT_CODES:
+        return Pack(1, 1, uom)
+
+    per_container = {}
+    for count, container in inner_counts:
+        per_container.setdefault(CONTAINER_CODES[container.lower()], int(count))
+    containers_per_case = None
+    for count, inner, outer in outer_counts:
+        if CONTAINER_CODES[outer.lower()] == 'CA':
+            containers_per_case = (CONTAINER_CODES[inner.lower()], int(count))
+            break
+
+    if uom in per_container:
+        return Pack(per_container[uom], 1, uom)
+    if uom == 'CA' and containers_per_case:
+        # Units per case are units per container times containers per case;
+        # a count of boxes alone ("10 BX/CA" gloves) says nothing about units
+        inner, count = containers_per_case
+        if inner in SINGLE_UNIT_CODES:
+            return Pack(count, count, uom)
+        if inner in per_container:
+            return Pack(per_container[inner] * count, count, uom)
+        if len(per_container) == 1:
+            # "25/Package, 4 BX/CA": the one inner count names the box differently
+            return Pack(next(iter(per_container.values())) * count, count, uom)
+        return Pack(None, count, uom)
+    if len(per_container) == 1 and uom != 'CA':
+        # "Wrap 240/Case" bought by the box or similar; trust the only count given
+        return Pack(next(iter(per_container.values())), 1, uom)
+    return Pack(None, 1, uom)
+
+
+def _amazon_pack(packs_of, count, pack_of, n_pack):
+    """Pack from the first PACKS_OF, UNIT_COUNT, PACK_OF and N_PACK matches of a title (None if absent)"""
+    if packs_of:
+        return Pack(int(packs_of[0]) * int(packs_of[1]), int(packs_of[0]), 'PK')
+    if count and pack_of:
+        return Pack(_int(count[0]) * int(pack_of[0]), int(pack_of[0]), 'PK')
+    if count:
+        return Pack(_int(count[0]), 1, 'EA')
+    if pack_of:
+        return Pack(int(pack_of[0]), int(pack_of[0]), 'PK')
+    if n_pack:
+        return Pack(int(n_pack[0]), int(n_pack[0]), 'PK')
+    return Pack(None, 1, 'EA')
+
+
+def _groups(match):
+    return match.groups() if match else None
+
+
+def henry_schein_pack(description, uom):
+    """Pack for one Henry Schein item bought by `uom`"""
+    return _henry_schein_pack(INNER_COUNT.findall(description), OUTER_COUNT.findall(description), uom_code(uom))
+
+
+def amazon_pack(title):
+    """Pack for one Amazon listing"""
+    return _amazon_pack(*(_groups(pattern.search(title)) for pattern in (PACKS_OF, UNIT_COUNT, PACK_OF, N_PACK)))
+
+
+def henry_schein_units(description, uom):
+    """Individual units in one `uom` of a Henry Schein item, or None if the description doesn't say"""
+    return henry_schein_pack(description, uom).units
+
+
+def amazon_units(title):
+    """Individual units in one Amazon listing, or None if the title doesn't say"""
+    return amazon_pack(title).units
+
+
+def units_per_purchase(row):
+    """Units in one purchased quantity of a procurement_rows row"""
+    if row['vendor'] == 'henry_schein':
+        return henry_schein_units(row['title'], row.get('uom', ''))
+    return amazon_units(row['title'])
+
+
+def scan(pattern, texts, first_only=False):
+    """
+    Every match of `pattern` in each of `texts`, as lists of group tuples
+
+    The texts are joined and scanned in one pass, then each match is given
+    to the text it falls in. With first_only, each text gets its first
+    match's groups or None, like pattern.search.
+    """
+    ends = []
+    end = -1
+    for text in texts:
+        end += len(text) + 1
+        ends.append(end)
+    found = [None] * len(texts) if first_only else [[] for _ in texts]
+    for match in pattern.finditer(_SEPARATOR.join(texts)):
+        i = bisect_right(ends, match.start())
+        if not first_only:
+            found[i].append(match.groups())
+        elif found[i] is None:
+            found[i] = match.groups()
+    return found
+
+
+def extract_packs(descriptions, uoms=None, vendor='henry_schein'):
+    """
+    Pack for every row of a description column (and its unit of measure column)
+
+    Gives the same results as henry_schein_pack/amazon_pack row by row, but
+    scans each distinct description once with each pattern in one batch.
+    """
+    descriptions = ['' if d is None else str(d) for d in descriptions]
+    distinct = list(dict.fromkeys(descriptions))
+    if vendor == 'henry_schein':
+        inner_counts = dict(zip(distinct, scan(INNER_COUNT, distinct)))
+        outer_counts = dict(zip(distinct, scan(OUTER_COUNT, distinct)))
+        uoms = [''] * len(descriptions) if uoms is None else uoms
+        packs = {}
+        results = []
+        for description, uom in zip(descriptions, uoms):
+            pack = packs.get((description, uom))
+            if pack is None:
+                pack = packs[description, uom] = _henry_schein_pack(
+                    inner_counts[description], outer_counts[description], uom_code(uom))
+            results.append(pack)
+        return results
+
+    matches = [scan(pattern, distinct, first_only=True) for pattern in (PACKS_OF, UNIT_COUNT, PACK_OF, N_PACK)]
+    packs = {description: _amazon_pack(*found) for description, *found in zip(distinct, *matches)}
+    return [packs[description] for description in descriptions]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from csv_schema import load_typed
+
+    parser = argparse.ArgumentParser(description='Extract pack sizes from a Henry Schein export')
+    parser.add_argument('path', nargs='?', default='1eb6921b-e392-457b-8a1f-a08236e20da9.csv')
+    parser.add_argument('--check', action='store_true', help='compare against row-by-row parsing')
+    args = parser.parse_args()
+
+    profile, columns, _ = load_typed(args.path)
+    roles = profile['columns']
+    descriptions = columns[roles['description']]
+    uoms = columns[roles['uom']] if roles.get('uom') else None
+
+    started = time.perf_counter()
+    packs = extract_packs(descriptions, uoms)
+    elapsed = time.perf_counter() - started
+    known = sum(1 for pack in packs if pack.units)
+    print(f"{args.path}: {len(packs)} rows, {known} with a unit count ({elapsed * 1000:.1f} ms)")
+
+    if args.check:
+        wrong = 0
+        for description, uom, expected in CHECK_PACKS:
+            units = henry_schein_units(description, uom)
+            if units != expected:
+                wrong += 1
+                print(f"❌ {description[-40:]} by {uom}: {units} units, expected {expected}")
+        print(f"known packs: {len(CHECK_PACKS) - wrong}/{len(CHECK_PACKS)} as expected")
+        started = time.perf_counter()
+        expected = [henry_schein_pack(d or '', u) for d, u in zip(descriptions, uoms or [''] * len(descriptions))]
+        elapsed = time.perf_counter() - started
+        mismatches = sum(1 for a, b in zip(packs, expected) if a != b)
+        print(f"row by row: {elapsed * 1000:.1f} ms, {mismatches} mismatches")
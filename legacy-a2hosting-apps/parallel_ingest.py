@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Parallel parsing of many vendor export files
+
+Finance keeps dozens of monthly exports per vendor. Each file is parsed in
+its own worker process with procurement_rows, the results are merged in a
+stable order (input order, then row order within a file) and order lines
+that appear in more than one export because of overlapping date ranges are
+kept only once.
+
+Workers send every parsed row back to the parent, which the ingest commands
+need anyway (procurement_db stores each row). Pickling the rows costs about
+a tenth of parsing them, so extra workers only pay off with spare cores: on
+a 1-CPU box, 300k Amazon rows in 317 files took 11.6 s with 1 worker and
+15.0 s with 2. The default is one worker per CPU, which is serial there.
+
+Usage:
+    python3 parallel_ingest.py exports/ 'amazon/orders_from_*.csv' [--workers 8]
+"""
+
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from procurement_rows import UnrecognizedExport, read_rows
+
+
+def expand_inputs(inputs):
+    """Expand directories (their *.csv files) and glob patterns into a sorted, de-duplicated file list"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(glob.glob(os.path.join(item, '*.csv')))
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item))
+        else:
+            matches = [item]
+        paths.extend(matches)
+
+    seen = set()
+    unique = []
+    for path in paths:
+        real = os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            unique.append(path)
+    return unique
+
+
+def _parse(path):
+    try:
+        vendor, rows = read_rows(path)
+    except UnrecognizedExport:
+        return path, None, []
+    return path, vendor, rows
+
+
+def parse_files(paths, workers=None):
+    """Parse files in a process pool; results come back in input order"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        return [_parse(path) for path in paths]
+    workers = min(workers, len(paths))
+    # Hand files out in chunks so many small exports don't pay a round trip each
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_parse, paths, chunksize=chunksize))
+
+
+def merge(parsed):
+    """
+    Drop order lines already seen in an earlier file
+
+    Returns a list of (path, vendor, rows read, unique rows) in input order.
+    Files that aren't vendor exports (a directory also holds the analyzers'
+    own CSV reports) are skipped with a warning.
+    """
+    seen = set()
+    merged = []
+    for path, vendor, rows in parsed:
+        if vendor is None:
+            print(f"⚠️  Skipping {path}: not an Amazon or Henry Schein export", file=sys.stderr)
+            continue
+        unique = []
+        for row in rows:
+            if row['row_id'] not in seen:
+                seen.add(row['row_id'])
+                unique.append(row)
+        merged.append((path, vendor, len(rows), unique))
+    return merged
+
+
+def ingest_inputs(inputs, workers=None):
+    """Expand, parse in parallel and merge; the entry point used by the ingest commands"""
+    paths = expand_inputs(inputs)
+    if not paths:
+        raise FileNotFoundError(f"No export files matched: {' '.join(inputs)}")
+    return merge(parse_files(paths, workers))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Parse vendor exports in parallel')
+    parser.add_argument('inputs', nargs='+', help='files, directories or glob patterns')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = ingest_inputs(args.inputs, args.workers)
+    elapsed = time.perf_counter() - started
+
+    total_read = sum(read for _, _, read, _ in results)
+    total_unique = sum(len(rows) for _, _, _, rows in results)
+    for path, vendor, read, rows in results:
+        print(f"{path}: {read} {vendor} rows, {len(rows)} unique")
+    print(f"\n{len(results)} files, {total_read} rows, {total_unique} unique, "
+          f"{total_read - total_unique} overlapping duplicates dropped in {elapsed:.2f} s "
+          f"({total_read / elapsed:,.0f} rows/s)")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Streaming unit-price spike detection
+
+Keeps an exponentially weighted moving mean and variance of each item's unit
+price (three numbers per item) and flags a purchase whose price is more than
+a configurable number of standard deviations from that item's running mean,
+as rows arrive. Cheap enough to run inline while ingesting large exports.
+
+Usage:
+    python3 price_anomalies.py orders_from_*.csv 1eb6921b-*.csv [--z 3.0] [--alpha 0.3]
+"""
+
+import math
+
+DEFAULT_Z = 3.0
+DEFAULT_ALPHA = 0.3
+MIN_OBSERVATIONS = 3
+# Items bought at one steady price have ~zero variance, which would flag any
+# cent-level change; the deviation is floored at this fraction of the mean.
+MIN_RELATIVE_STD = 0.05
+
+
+class PriceSpikeDetector:
+    """Per-item EWMA mean/variance of unit price with z-score flagging"""
+
+    def __init__(self, z_threshold=DEFAULT_Z, alpha=DEFAULT_ALPHA, min_observations=MIN_OBSERVATIONS,
+                 min_relative_std=MIN_RELATIVE_STD, state=None):
+        self.z_threshold = z_threshold
+        self.alpha = alpha
+        self.min_observations = min_observations
+        self.min_relative_std = min_relative_std
+        # vendor|item_key|uom -> [observations, mean, variance]
+        self.state = state if state is not None else {}
+
+    def observe(self, key, price):
+        """
+        Score a price against the item's history, then fold it in
+
+        Returns the z-score when the item has enough history to judge, else None.
+        """
+        stats = self.state.get(key)
+        if stats is None:
+            self.state[key] = [1, price, 0.0]
+            return None
+
+        n, mean, variance = stats
+        z = None
+        if n >= self.min_observations:
+            std = max(math.sqrt(variance), abs(mean) * self.min_relative_std)
+            z = (price - mean) / std if std > 0 else 0.0
+
+        diff = price - mean
+        increment = self.alpha * diff
+        stats[0] = n + 1
+        stats[1] = mean + increment
+        stats[2] = (1 - self.alpha) * (variance + diff * increment)
+        return z
+
+    def is_anomaly(self, z):
+        return z is not None and abs(z) > self.z_threshold
+
+    def check(self, row):
+        """Observe one procurement row; returns the row with its score if flagged, else None"""
+        key = item_key(row)
+        stats = self.state.get(key)
+        expected = stats[1] if stats else None
+        z = self.observe(key, row['unit_price'])
+        if self.is_anomaly(z):
+            return dict(row, z_score=z, expected_price=expected)
+        return None
+
+    def scan(self, rows):
+        """Stream procurement rows (oldest first) and yield each flagged row"""
+        for row in rows:
+            anomaly = self.check(row)
+            if anomaly:
+                yield anomaly
+
+
+def item_key(row):
+    """vendor|item_key|uom: a box and a case of one item are separate price series"""
+    return f"{row['vendor']}|{row['item_key']}|{row.get('uom', '')}"
+
+
+def chronological(rows):
+    """Exports list newest orders first; the detector needs them oldest first"""
+    return sorted(rows, key=lambda row: row.get('order_date', ''))
+
+
+if __name__ == "__main__":
+    import argparse
+    from parallel_ingest import ingest_inputs
+
+    parser = argparse.ArgumentParser(description='Flag unit-price spikes in vendor exports')
+    parser.add_argument('inputs', nargs='+', help='files, directories or glob patterns')
+    parser.add_argument('--z', type=float, default=DEFAULT_Z, help='z-score threshold')
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help='EWMA smoothing factor')
+    args = parser.parse_args()
+
+    rows = [row for _, _, _, file_rows in ingest_inputs(args.inputs) for row in file_rows]
+    detector = PriceSpikeDetector(args.z, args.alpha)
+    anomalies = list(detector.scan(chronological(rows)))
+
+    print(f"\n📈 UNIT PRICE ANOMALIES (|z| > {args.z}, alpha {args.alpha})")
+    print(f"="*80)
+    print(f"Rows scanned: {len(rows)}, items tracked: {len(detector.state)}, flagged: {len(anomalies)}")
+    for a in anomalies:
+        direction = 'above' if a['z_score'] > 0 else 'below'
+        print(f"\n{a['date']} [{a['vendor']}] {a['title'][:70]}...")
+        print(f"   ${a['unit_price']:.2f} vs expected ${a['expected_price']:.2f} "
+              f"(z = {a['z_score']:+.1f}, {direction} trend)")
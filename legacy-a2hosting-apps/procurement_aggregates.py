@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Incremental procurement aggregate store
+
+Keeps per-item, per-month purchase aggregates for Amazon and Henry Schein
+exports in a JSON file so a new monthly export can be absorbed without
+re-running the analyzers over the full history. Unit-price spikes are
+flagged inline as rows are absorbed, against rolling per-item statistics
+kept in the same store.
+
+Usage:
+    python3 procurement_aggregates.py ingest orders_from_*.csv 1eb6921b-*.csv
+    python3 procurement_aggregates.py ingest exports/ --workers 8
+    python3 procurement_aggregates.py report --vendor amazon --top 25
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+from parallel_ingest import ingest_inputs
+from price_anomalies import DEFAULT_Z, PriceSpikeDetector, chronological
+from procurement_rows import read_rows
+
+DEFAULT_STORE = 'procurement_aggregates.json'
+STORE_VERSION = 1
+ANOMALY_FIELDS = ['vendor', 'item_key', 'title', 'date', 'quantity', 'unit_price', 'expected_price', 'z_score']
+
+
+class AggregateStore:
+    """Per-item monthly totals, price extremes and counts, deduped by order line"""
+
+    def __init__(self, path=DEFAULT_STORE, z_threshold=DEFAULT_Z):
+        self.path = path
+        self.sources = {}
+        self.seen = set()
+        self.items = {}
+        self.anomalies = []
+        price_state = {}
+        if os.path.exists(path):
+            price_state = self._load()
+        self.detector = PriceSpikeDetector(z_threshold, state=price_state)
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != STORE_VERSION:
+            raise ValueError(f"{self.path}: unsupported store version {data.get('version')}")
+        self.sources = data['sources']
+        self.seen = set(data['seen'])
+        self.items = data['items']
+        self.anomalies = data.get('anomalies', [])
+        return data.get('price_state', {})
+
+    def save(self):
+        """Write the store atomically so an interrupted save never corrupts it"""
+        data = {
+            'version': STORE_VERSION,
+            'sources': self.sources,
+            'seen': sorted(self.seen),
+            'items': self.items,
+            'price_state': self.detector.state,
+            'anomalies': self.anomalies,
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def add_row(self, row):
+        """Fold one purchase row into its item/month bucket; returns False for duplicates"""
+        if row['row_id'] in self.seen:
+            return False
+        self.seen.add(row['row_id'])
+
+        key = f"{row['vendor']}|{row['item_key']}"
+        item = self.items.get(key)
+        if item is None:
+            item = self.items[key] = {
+                'vendor': row['vendor'],
+                'item_key': row['item_key'],
+                'title': row['title'],
+                'months': {},
+            }
+        item['title'] = row['title']
+
+        month = item['months'].get(row['month'])
+        unit_price = row['unit_price']
+        if month is None:
+            item['months'][row['month']] = {
+                'orders': 1,
+                'quantity': row['quantity'],
+                'total': row['amount'],
+                'price_sum': unit_price,
+                'min_price': unit_price,
+                'max_price': unit_price,
+            }
+        else:
+            month['orders'] += 1
+            month['quantity'] += row['quantity']
+            month['total'] += row['amount']
+            month['price_sum'] += unit_price
+            month['min_price'] = min(month['min_price'], unit_price)
+            month['max_price'] = max(month['max_price'], unit_price)
+
+        anomaly = self.detector.check(row)
+        if anomaly:
+            self.anomalies.append({k: anomaly[k] for k in ANOMALY_FIELDS})
+        return True
+
+    def ingest(self, path, vendor=None, rows=None, read=None):
+        """
+        Absorb one export file (or its already parsed rows); returns (vendor, rows read, rows added)
+
+        `read` is the number of rows in the file when `rows` has already had
+        overlapping lines dropped (as parallel_ingest does).
+        """
+        if rows is None:
+            vendor, rows = read_rows(path)
+        read = len(rows) if read is None else read
+        added = sum(1 for row in chronological(rows) if self.add_row(row))
+        self.sources[os.path.basename(path)] = {
+            'vendor': vendor,
+            'rows': read,
+            'added': added,
+            'ingested_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        return vendor, read, added
+
+    def item_summaries(self, vendor=None, min_orders=3):
+        """Roll each item's months up into the savings_opportunities shape used by the analyzers"""
+        summaries = []
+        for item in self.items.values():
+            if vendor and item['vendor'] != vendor:
+                continue
+            months = item['months'].values()
+            orders = sum(m['orders'] for m in months)
+            if orders < min_orders:
+                continue
+            quantity = sum(m['quantity'] for m in months)
+            total = sum(m['total'] for m in months)
+            min_price = min(m['min_price'] for m in months)
+            max_price = max(m['max_price'] for m in months)
+            # sum((p - min_price) * q) == total - min_price * quantity
+            potential_savings = total - min_price * quantity
+            summaries.append({
+                'vendor': item['vendor'],
+                'item_key': item['item_key'],
+                'title': item['title'],
+                'times_ordered': orders,
+                'total_quantity': quantity,
+                'total_spent': total,
+                'avg_price': sum(m['price_sum'] for m in months) / orders,
+                'min_price': min_price,
+                'max_price': max_price,
+                'price_variance': max_price - min_price,
+                'potential_savings': potential_savings,
+                'savings_percent': (potential_savings / total * 100) if total > 0 else 0,
+            })
+        summaries.sort(key=lambda x: x['total_spent'], reverse=True)
+        return summaries
+
+    def monthly_totals(self, vendor=None):
+        """Total spend per YYYY-MM month"""
+        totals = {}
+        for item in self.items.values():
+            if vendor and item['vendor'] != vendor:
+                continue
+            for month, data in item['months'].items():
+                totals[month] = totals.get(month, 0) + data['total']
+        return dict(sorted(totals.items()))
+
+
+def print_report(store, vendor=None, top=25, csv_path=None):
+    started = time.perf_counter()
+    summaries = store.item_summaries(vendor)
+    monthly = store.monthly_totals(vendor)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\n📦 PROCUREMENT AGGREGATES ({vendor or 'all vendors'})")
+    print(f"="*60)
+    print(f"Sources ingested: {len(store.sources)}")
+    print(f"Order lines: {len(store.seen)}")
+    print(f"Distinct items: {len(store.items)}")
+    print(f"Items ordered 3+ times: {len(summaries)}")
+    print(f"Total potential savings: ${sum(s['potential_savings'] for s in summaries):.2f}")
+
+    print(f"\n🏆 TOP {top} RECURRING ITEMS BY TOTAL SPENT:")
+    print(f"-"*60)
+    for i, item in enumerate(summaries[:top], 1):
+        print(f"{i}. {item['title'][:70]}...")
+        print(f"   ${item['total_spent']:.2f} ({item['times_ordered']} orders, {item['total_quantity']} units), "
+              f"${item['min_price']:.2f} - ${item['max_price']:.2f}, savings ${item['potential_savings']:.2f}")
+
+    anomalies = [a for a in store.anomalies if not vendor or a['vendor'] == vendor]
+    print(f"\n📈 UNIT PRICE SPIKES (|z| > {store.detector.z_threshold}): {len(anomalies)}")
+    print(f"-"*60)
+    for a in anomalies[-top:]:
+        print(f"{a['date']} {a['title'][:60]}...")
+        print(f"   ${a['unit_price']:.2f} vs expected ${a['expected_price']:.2f} (z = {a['z_score']:+.1f})")
+
+    print(f"\n📅 MONTHLY SPENDING:")
+    print(f"-"*60)
+    for month, amount in monthly.items():
+        print(f"{month or 'undated'}: ${amount:.2f}")
+
+    if csv_path:
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Vendor', 'Title', 'Item Key', 'Times Ordered', 'Total Quantity', 'Total Spent',
+                             'Avg Price', 'Min Price', 'Max Price', 'Potential Savings %'])
+            for item in summaries:
+                writer.writerow([
+                    item['vendor'],
+                    item['title'][:100],
+                    item['item_key'],
+                    item['times_ordered'],
+                    item['total_quantity'],
+                    f"${item['total_spent']:.2f}",
+                    f"${item['avg_price']:.2f}",
+                    f"${item['min_price']:.2f}",
+                    f"${item['max_price']:.2f}",
+                    f"{item['savings_percent']:.1f}%"
+                ])
+        print(f"\n📄 Recurring items saved to: {csv_path}")
+
+    print(f"\n⏱️  Report computed from aggregates in {elapsed_ms:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental procurement aggregate store')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='aggregate store file')
+    parser.add_argument('--z', type=float, default=DEFAULT_Z, help='z-score threshold for price spikes')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help='absorb one or more vendor exports')
+    ingest_parser.add_argument('files', nargs='+', help='files, directories or glob patterns')
+    ingest_parser.add_argument('--workers', type=int, help='parser processes (default: CPU count)')
+
+    report_parser = subparsers.add_parser('report', help='print reports from the stored aggregates')
+    report_parser.add_argument('--vendor', choices=['amazon', 'henry_schein'])
+    report_parser.add_argument('--top', type=int, default=25)
+    report_parser.add_argument('--csv', help='also write recurring items to this CSV')
+
+    args = parser.parse_args()
+    store = AggregateStore(args.store, args.z)
+
+    if args.command == 'ingest':
+        for path, vendor, read, rows in ingest_inputs(args.files, args.workers):
+            flagged = len(store.anomalies)
+            _, _, added = store.ingest(path, vendor, rows, read)
+            print(f"✅ {path}: {read} {vendor} rows, {added} new, {read - added} duplicates skipped, "
+                  f"{len(store.anomalies) - flagged} price spikes")
+        store.save()
+        print(f"📦 Store saved to: {args.store}")
+    else:
+        print_report(store, args.vendor, args.top, args.csv)
+
+
+if __name__ == "__main__":
+    main()
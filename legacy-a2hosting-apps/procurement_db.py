@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Local SQLite query layer over Amazon and Henry Schein purchases
+
+Bulk-loads vendor exports into an indexed SQLite database once, so new
+spending questions become a query instead of another analyze_*.py script
+that re-parses the CSV. Pre-built views reproduce the existing reports.
+
+Usage:
+    python3 procurement_db.py ingest orders_from_*.csv 1eb6921b-*.csv
+    python3 procurement_db.py ingest exports/ --workers 8
+    python3 procurement_db.py views
+    python3 procurement_db.py query --view recurring_items --limit 25
+    python3 procurement_db.py query "SELECT location, month, SUM(amount) FROM purchases
+                                     WHERE title LIKE '%glove%' GROUP BY 1, 2"
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from parallel_ingest import ingest_inputs
+from procurement_rows import read_rows
+
+DEFAULT_DB = 'procurement.db'
+
+# Same keyword lists as analyze_coffee_spending.py
+COFFEE_KEYWORDS = [
+    'coffee', 'keurig', 'k-cup', 'k cup', 'kcup', 'starbucks', 'folgers',
+    'creamer', 'coffee mate', 'coffeemate', 'espresso', 'cappuccino',
+    'latte', 'brew', 'roast', 'cafe', 'caffeine', 'pods'
+]
+COFFEE_CATEGORIES = [
+    ('K-Cups/Pods', ['k-cup', 'k cup', 'kcup', 'keurig', 'pod']),
+    ('Creamers', ['creamer', 'coffee mate', 'coffeemate']),
+    ('Ground/Whole Bean Coffee', ['ground', 'whole bean', 'bag', 'canister']),
+    ('Instant Coffee', ['instant', 'stick', 'packet']),
+    ('Coffee Filters/Accessories', ['filter', 'paper']),
+]
+
+PURCHASE_COLUMNS = ['row_id', 'vendor', 'item_key', 'title', 'quantity', 'amount', 'unit_price',
+                    'date', 'order_date', 'month', 'category', 'location', 'uom']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS purchases (
+    row_id TEXT PRIMARY KEY,
+    vendor TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    title TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    unit_price REAL NOT NULL,
+    date TEXT,
+    order_date TEXT,
+    month TEXT,
+    category TEXT,
+    location TEXT,
+    uom TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_purchases_item ON purchases (vendor, item_key);
+CREATE INDEX IF NOT EXISTS idx_purchases_month ON purchases (month);
+CREATE INDEX IF NOT EXISTS idx_purchases_category ON purchases (vendor, category);
+CREATE INDEX IF NOT EXISTS idx_purchases_location ON purchases (location, month);
+
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    vendor TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+
+def _like_any(column, keywords):
+    return '(' + ' OR '.join(f"lower({column}) LIKE '%{k}%'" for k in keywords) + ')'
+
+
+def _case_category(column, categories, default):
+    whens = ' '.join(f"WHEN {_like_any(column, words)} THEN '{name}'" for name, words in categories)
+    return f"CASE {whens} ELSE '{default}' END"
+
+
+VIEWS = {
+    # analyze_amazon_orders_v2.py: items ordered 3+ times with potential savings
+    'recurring_items': """
+        SELECT vendor, item_key, uom, MAX(title) AS title, COUNT(*) AS times_ordered,
+               SUM(quantity) AS total_quantity, ROUND(SUM(amount), 2) AS total_spent,
+               ROUND(AVG(unit_price), 2) AS avg_price, ROUND(MIN(unit_price), 2) AS min_price,
+               ROUND(MAX(unit_price), 2) AS max_price,
+               ROUND(SUM(amount) - MIN(unit_price) * SUM(quantity), 2) AS potential_savings
+        FROM purchases
+        GROUP BY vendor, item_key, uom
+        HAVING COUNT(*) > 2
+        ORDER BY total_spent DESC
+    """,
+    # analyze_amazon_orders_v2.py / analyze_henry_schein.py: spending by category
+    'category_spending': """
+        SELECT vendor, category, COUNT(*) AS orders, ROUND(SUM(amount), 2) AS total_spent
+        FROM purchases
+        GROUP BY vendor, category
+        ORDER BY total_spent DESC
+    """,
+    'monthly_spending': """
+        SELECT vendor, month, COUNT(*) AS orders, ROUND(SUM(amount), 2) AS total_spent
+        FROM purchases
+        GROUP BY vendor, month
+        ORDER BY month, vendor
+    """,
+    'location_category_monthly': """
+        SELECT location, category, month, COUNT(*) AS orders, ROUND(SUM(amount), 2) AS total_spent
+        FROM purchases
+        WHERE location != ''
+        GROUP BY location, category, month
+        ORDER BY location, month, total_spent DESC
+    """,
+    # analyze_coffee_spending.py
+    'coffee_purchases': f"""
+        SELECT title, item_key AS asin, quantity, ROUND(amount, 2) AS total_price,
+               ROUND(unit_price, 2) AS unit_price, date,
+               {_case_category('title', COFFEE_CATEGORIES, 'Other Coffee Products')} AS coffee_category
+        FROM purchases
+        WHERE vendor = 'amazon' AND {_like_any('title', COFFEE_KEYWORDS)}
+        ORDER BY amount DESC
+    """,
+    'coffee_categories': """
+        SELECT coffee_category, COUNT(*) AS orders, ROUND(SUM(total_price), 2) AS total
+        FROM v_coffee_purchases
+        GROUP BY coffee_category
+        ORDER BY total DESC
+    """,
+    'coffee_monthly': f"""
+        SELECT month, ROUND(SUM(amount), 2) AS total
+        FROM purchases
+        WHERE vendor = 'amazon' AND {_like_any('title', COFFEE_KEYWORDS)} AND month != ''
+        GROUP BY month
+        ORDER BY month
+    """,
+    # analyze_henry_schein.py: top purchases
+    'henry_schein_top_purchases': """
+        SELECT title AS description, ROUND(amount, 2) AS price, quantity,
+               ROUND(unit_price, 2) AS unit_price, date, category
+        FROM purchases
+        WHERE vendor = 'henry_schein'
+        ORDER BY amount DESC
+    """,
+}
+
+
+def connect(path=DEFAULT_DB):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    for name, sql in VIEWS.items():
+        conn.execute(f"DROP VIEW IF EXISTS v_{name}")
+        conn.execute(f"CREATE VIEW v_{name} AS {sql}")
+    conn.commit()
+    return conn
+
+
+def ingest(conn, path, rows=None, vendor=None, read=None):
+    """
+    Load one export in a single transaction; rows already present (same row_id) are skipped
+
+    `read` is the number of rows in the file when `rows` has already had
+    overlapping lines dropped (as parallel_ingest does).
+    """
+    if rows is None:
+        vendor, rows = read_rows(path)
+    read = len(rows) if read is None else read
+    source = os.path.basename(path)
+    placeholders = ', '.join('?' * (len(PURCHASE_COLUMNS) + 1))
+    with conn:
+        before = conn.total_changes
+        conn.executemany(
+            f"INSERT OR IGNORE INTO purchases ({', '.join(PURCHASE_COLUMNS)}, source) VALUES ({placeholders})",
+            ([row.get(c, '') for c in PURCHASE_COLUMNS] + [source] for row in rows)
+        )
+        added = conn.total_changes - before
+        conn.execute(
+            "INSERT OR REPLACE INTO sources (source, vendor, rows, added, ingested_at) VALUES (?, ?, ?, ?, ?)",
+            (source, vendor, read, added, datetime.now().isoformat(timespec='seconds'))
+        )
+    return vendor, read, added
+
+
+def print_table(cursor, output=sys.stdout, as_csv=False):
+    headers = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    if as_csv:
+        writer = csv.writer(output)
+        writer.writerow(headers)
+        writer.writerows(rows)
+        return len(rows)
+
+    cells = [[('' if v is None else str(v))[:60] for v in row] for row in rows]
+    widths = [max([len(h)] + [len(r[i]) for r in cells]) for i, h in enumerate(headers)]
+    print('  '.join(h.ljust(w) for h, w in zip(headers, widths)), file=output)
+    print('  '.join('-' * w for w in widths), file=output)
+    for row in cells:
+        print('  '.join(v.ljust(w) for v, w in zip(row, widths)), file=output)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite query layer over procurement exports')
+    parser.add_argument('--db', default=DEFAULT_DB, help='SQLite database file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help='bulk-load vendor exports')
+    ingest_parser.add_argument('files', nargs='+', help='files, directories or glob patterns')
+    ingest_parser.add_argument('--workers', type=int, help='parser processes (default: CPU count)')
+
+    subparsers.add_parser('views', help='list the pre-built report views')
+
+    query_parser = subparsers.add_parser('query', help='run SQL or a pre-built view')
+    query_parser.add_argument('sql', nargs='?', help='SQL to run')
+    query_parser.add_argument('--view', choices=sorted(VIEWS), help='pre-built view to show')
+    query_parser.add_argument('--limit', type=int, help='maximum rows to show')
+    query_parser.add_argument('--csv', action='store_true', help='print results as CSV')
+
+    args = parser.parse_args()
+    conn = connect(args.db)
+
+    if args.command == 'ingest':
+        started = time.perf_counter()
+        for path, vendor, read, rows in ingest_inputs(args.files, args.workers):
+            _, _, added = ingest(conn, path, rows, vendor, read)
+            print(f"✅ {path}: {read} {vendor} rows, {added} new")
+        print(f"⏱️  Ingested in {(time.perf_counter() - started) * 1000:.0f} ms")
+        conn.execute('ANALYZE')
+        print(f"🗄️  Database: {args.db}")
+    elif args.command == 'views':
+        for name in sorted(VIEWS):
+            print(f"v_{name}")
+    else:
+        if bool(args.sql) == bool(args.view):
+            parser.error('query needs either SQL or --view')
+        sql = args.sql or f"SELECT * FROM v_{args.view}"
+        if args.limit:
+            sql = f"SELECT * FROM ({sql}) LIMIT {int(args.limit)}"
+        started = time.perf_counter()
+        cursor = conn.execute(sql)
+        try:
+            count = print_table(cursor, as_csv=args.csv)
+            if not args.csv:
+                print(f"\n{count} rows in {(time.perf_counter() - started) * 1000:.1f} ms")
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader (head, less) went away; point stdout at devnull so the
+            # flush at interpreter exit doesn't raise again
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
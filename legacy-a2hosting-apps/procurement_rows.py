@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Shared row parsing for Amazon Business and Henry Schein exports
+
+Turns a raw vendor CSV into uniform purchase rows so the aggregate store and
+other tooling don't each re-implement the currency/quantity/date cleanup that
+the analyze_*.py scripts do inline.
+"""
+
+import csv
+import re
+from collections import defaultdict
+from datetime import datetime
+
+AMAZON = 'amazon'
+HENRY_SCHEIN = 'henry_schein'
+
+AMAZON_HEADERS = {'Order ID', 'ASIN', 'Title', 'Item Quantity', 'Item Subtotal'}
+HENRY_SCHEIN_HEADERS = {'Extended Description', 'Item Code', 'Qty', 'Amount'}
+
+HENRY_SCHEIN_CATEGORIES = [
+    ('Gloves/PPE', ['glove', 'exam', 'nitrile', 'latex']),
+    ('Syringes/Needles', ['syringe', 'needle', 'injection']),
+    ('Wound Care', ['bandage', 'gauze', 'tape', 'wound']),
+    ('Masks/Face Protection', ['mask', 'face', 'surgical']),
+    ('Antiseptics/Sanitizers', ['antiseptic', 'alcohol', 'sanitizer', 'disinfect']),
+    ('Paper Products', ['paper', 'towel', 'tissue']),
+    ('Pharmaceuticals', ['drug', 'medication', 'pharmaceutical']),
+]
+
+
+class UnrecognizedExport(ValueError):
+    """A CSV whose header row matches no known vendor export"""
+
+
+_NON_NUMERIC = re.compile(r'[^\d.-]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def parse_amount(value):
+    """Parse a currency string like '$1,145.04' into a float (0 when blank or invalid)"""
+    if not value:
+        return 0.0
+    try:
+        return float(_NON_NUMERIC.sub('', str(value)) or 0)
+    except ValueError:
+        return 0.0
+
+
+def parse_quantity(value):
+    """Parse a quantity, treating blank or non-positive values as a single unit"""
+    try:
+        qty = int(re.sub(r'[^\d]', '', str(value))) if value and str(value).strip() else 1
+    except ValueError:
+        qty = 1
+    return qty if qty > 0 else 1
+
+
+def parse_date(value):
+    """Return the ISO YYYY-MM-DD form of an 'M/D/YYYY' or 'M/D/YYYY H:MM' date, or '' if unparseable"""
+    if not value:
+        return ''
+    try:
+        return datetime.strptime(value.split()[0], '%m/%d/%Y').strftime('%Y-%m-%d')
+    except ValueError:
+        return ''
+
+
+def parse_month(value):
+    """Return the YYYY-MM month of an 'M/D/YYYY' or 'M/D/YYYY H:MM' date, or '' if unparseable"""
+    return parse_date(value)[:7]
+
+
+def title_key(title):
+    """Grouping key for items without an ASIN"""
+    return _WHITESPACE.sub(' ', title.lower()).strip()
+
+
+def henry_schein_item_key(item, uom):
+    """Grouping key for a Henry Schein item bought in a unit of measure: '1118536/BX'"""
+    return f"{item}/{uom}" if uom else item
+
+
+def henry_schein_category(description):
+    """Keyword category used by analyze_henry_schein.py"""
+    desc_lower = description.lower()
+    for category, words in HENRY_SCHEIN_CATEGORIES:
+        if any(word in desc_lower for word in words):
+            return category
+    return 'Other Medical Supplies'
+
+
+def detect_vendor(fieldnames):
+    """Identify which vendor produced an export from its header row"""
+    headers = set(fieldnames or [])
+    if AMAZON_HEADERS <= headers:
+        return AMAZON
+    if HENRY_SCHEIN_HEADERS <= headers:
+        return HENRY_SCHEIN
+    raise UnrecognizedExport(f"Unrecognized export format (headers: {sorted(headers)[:10]})")
+
+
+def _amazon_rows(reader):
+    # An order can contain the same ASIN more than once, so the line number is
+    # the occurrence of that ASIN within the order. Overlapping exports list
+    # an order's lines identically, which keeps the dedupe key stable.
+    occurrences = defaultdict(int)
+    for row in reader:
+        title = row.get('Title', '')
+        amount = parse_amount(row.get('Item Subtotal'))
+        if not title or amount <= 0:
+            continue
+        order_id = row.get('Order ID', '')
+        asin = row.get('ASIN', '')
+        occurrences[(order_id, asin or title)] += 1
+        line = occurrences[(order_id, asin or title)]
+        qty = parse_quantity(row.get('Item Quantity'))
+        yield {
+            'vendor': AMAZON,
+            'row_id': f"{AMAZON}:{order_id}:{asin or title_key(title)}:{line}",
+            'item_key': asin if asin else title_key(title),
+            'title': title,
+            'quantity': qty,
+            'amount': amount,
+            'unit_price': amount / qty,
+            'date': row.get('Order Date', ''),
+            'order_date': parse_date(row.get('Order Date', '')),
+            'month': parse_month(row.get('Order Date', '')),
+            'category': row.get('Amazon-Internal Product Category', '') or 'Unknown',
+            'location': row.get('Location', ''),
+            'uom': '',
+        }
+
+
+def _henry_schein_rows(reader):
+    # Henry Schein exports have no order ID; a purchase is identified by the
+    # location, item code, unit of measure and purchase date. The same item
+    # code is sold by the box and by the case, so the unit is part of the key.
+    occurrences = defaultdict(int)
+    for row in reader:
+        description = row.get('Extended Description', '')
+        amount = parse_amount(row.get('Amount'))
+        if not description or amount <= 0:
+            continue
+        item_code = row.get('Item Code', '')
+        uom = row.get('Uom', '')
+        location = row.get('Shipped Location Nickname', '')
+        date = row.get('LastPurchasedDate', '')
+        occurrences[(location, item_code, uom, date)] += 1
+        line = occurrences[(location, item_code, uom, date)]
+        qty = parse_quantity(row.get('Qty'))
+        item_key = henry_schein_item_key(item_code or title_key(description), uom)
+        yield {
+            'vendor': HENRY_SCHEIN,
+            'row_id': f"{HENRY_SCHEIN}:{location}:{item_key}:{date}:{line}",
+            'item_key': item_key,
+            'title': description,
+            'quantity': qty,
+            'amount': amount,
+            'unit_price': amount / qty,
+            'date': date,
+            'order_date': parse_date(date),
+            'month': parse_month(date),
+            'category': henry_schein_category(description),
+            'location': location,
+            'uom': uom,
+        }
+
+
+def read_rows(path):
+    """Read a vendor export and return (vendor, list of purchase rows)"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        vendor = detect_vendor(reader.fieldnames)
+        parse = _amazon_rows if vendor == AMAZON else _henry_schein_rows
+        return vendor, list(parse(reader))
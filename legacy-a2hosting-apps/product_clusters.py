@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+MinHash/LSH clustering of near-duplicate products
+
+The same glove or K-cup product is often sold under several ASINs or with
+slightly different titles. Comparing every pair of titles is quadratic, so
+each title is reduced to a MinHash signature of its word shingles and
+locality-sensitive hashing buckets signatures by band; only titles that share
+a bucket are compared.
+
+The normalizer strips sizes and counts, so similar titles are only merged
+when they are the same variant: the same measured sizes (12-gauge vs
+10-gauge wire, 6" vs 8" ties, 28 fl oz) and the same number of units (Pack
+of 4 vs a single bottle). Other numbers, such as model numbers, don't
+count. A listing that swaps a few words for others in the same place, like
+a color, scent or design ("Skull" vs "Elephant" wine stoppers), is a
+different variant as well, while a re-listing that only adds or drops words
+("Cleaner Spray" vs "Cleaner") is not.
+
+Usage:
+    python3 product_clusters.py orders_from_*.csv [--threshold 0.4]
+    python3 product_clusters.py --check
+"""
+
+import hashlib
+import re
+from array import array
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from pack_sizes import INNER_COUNT, OUTER_COUNT, amazon_units, uom_code
+from title_normalizer import amazon_normalizer
+
+# Estimated Jaccard similarity of normalized titles needed to merge. Tuned on
+# the Amazon export: the one real re-listing there (GOJO 1911-02 handwash
+# under two ASINs) scores 0.44, and with the variant checks no pair of
+# different products above 0.35 gets through.
+DEFAULT_THRESHOLD = 0.4
+
+# Members of a bucket compared against each new arrival; large buckets are
+# almost always one product, so a handful of comparisons is enough to link it.
+BUCKET_COMPARISONS = 8
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_STOPWORDS = {'the', 'and', 'for', 'with', 'of', 'a', 'an', 'to', 'in', 'by', 'or', 'on'}
+# Measured sizes and the unit each spelling stands for
+SIZE_UNITS = {
+    'fl oz': 'oz', 'fl. oz': 'oz', 'oz': 'oz', 'ounce': 'oz', 'ounces': 'oz',
+    'gal': 'gal', 'gallon': 'gal', 'gallons': 'gal', 'qt': 'qt', 'quart': 'qt', 'quarts': 'qt',
+    'ml': 'ml', 'l': 'l', 'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l',
+    'lb': 'lb', 'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb', 'g': 'g', 'gram': 'g', 'grams': 'g', 'kg': 'kg',
+    'in': 'in', 'inch': 'in', 'inches': 'in', '"': 'in', 'ft': 'ft', 'feet': 'ft', 'foot': 'ft',
+    'mm': 'mm', 'cm': 'cm', 'mil': 'mil', 'sq ft': 'sq ft', 'cu ft': 'cu ft', 'cu.ft': 'cu ft',
+    'gauge': 'gauge', 'awg': 'gauge', 'w': 'w', 'watt': 'w', 'watts': 'w', 'v': 'v', 'volt': 'v',
+    'volts': 'v', 'va': 'va', 'mah': 'mah', 'cc': 'ml', 'ply': 'ply', '%': '%',
+}
+_SIZE_NUMBER = r'\d+(?:\.\d+)?(?:/\d+)?'
+_SIZE_UNIT = '|'.join(re.escape(unit).replace('\\ ', r'\s*') for unit in sorted(SIZE_UNITS, key=len, reverse=True))
+_SIZE = re.compile(rf'(?<![\d.])({_SIZE_NUMBER})\s*-?\s*({_SIZE_UNIT})(?![a-z])')
+# "10 x 7.9 x 3.1 inch", '10" x 7.9" x 4.7"': every number takes the unit at the end
+_DIMENSIONS = re.compile(rf'(?<![\d.])({_SIZE_NUMBER}(?:\s*"?\s*[x\u00d7]\s*{_SIZE_NUMBER})+)\s*-?\s*({_SIZE_UNIT})?(?![a-z])')
+# Sizes without a unit: blade/catalog numbers (#10), suture sizes (4-0) and
+# garment/glove sizes (Large vs X-Large)
+_DESIGNATOR = re.compile(r'#\s*(\d+)|(?<![\d-])(\d+-0)(?![\d-])|\b((?:x{1,3}-?)?(?:small|large)|medium)\b')
+
+# Word swaps of at most this many words on each side are a different
+# variant (a color, scent or design name)
+ATTRIBUTE_WORDS = 4
+
+
+def shingles(normalized_title):
+    """Word unigrams and bigrams of a normalized title"""
+    tokens = [t for t in _TOKEN.findall(normalized_title) if t not in _STOPWORDS]
+    result = set(tokens)
+    result.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return result
+
+
+def _number(text):
+    return text if '/' in text else f"{float(text):g}"
+
+
+def _unit(text):
+    return SIZE_UNITS[re.sub(r'\s+', ' ', text)]
+
+
+def variant(raw_title):
+    """
+    What must match for two similar titles to be the same product
+
+    The measured sizes in the raw title (28 fl oz, 12-gauge, 10 x 7.9 x 3.1
+    inch), size designators (#10 blade, 4-0 suture, X-Large) and the number
+    of units it holds (Pack of 4; 1 when not stated).
+    """
+    title = (raw_title or '').lower()
+    sizes = set()
+    for numbers, unit in _DIMENSIONS.findall(title):
+        unit = _unit(unit) if unit else 'in' if '"' in numbers else 'x'
+        sizes.update((_number(number), unit) for number in re.findall(_SIZE_NUMBER, numbers))
+    sizes.update((_number(number), _unit(unit)) for number, unit in _SIZE.findall(_DIMENSIONS.sub(' ', title)))
+    sizes.update((number or suture or size.replace('-', ''), '#' if number else 'size')
+                 for number, suture, size in _DESIGNATOR.findall(title))
+    # Henry Schein pack counts: "100/Box", "30 BX/CA"
+    sizes.update((count, '/' + uom_code(container)) for count, container in INNER_COUNT.findall(title))
+    sizes.update((count, uom_code(inner) + '/' + uom_code(outer)) for count, inner, outer in OUTER_COUNT.findall(title))
+    return frozenset(sizes), amazon_units(title) or 1
+
+
+def title_words(raw_title):
+    """Words of a raw title in order, without stopwords"""
+    return [t for t in _TOKEN.findall((raw_title or '').lower()) if t not in _STOPWORDS]
+
+
+def swapped_words(words_a, words_b):
+    """
+    Whether one title swaps a few words for others in the same place
+
+    Swaps of up to ATTRIBUTE_WORDS words without digits name a different
+    color, scent or design, and different leading words a different brand.
+    Rewordings where every word of one side shares its stem with a word of
+    the other ('cleaning' vs 'cleans') don't count.
+    """
+    matcher = SequenceMatcher(None, words_a, words_b, autojunk=False)
+    for op, a_start, a_end, b_start, b_end in matcher.get_opcodes():
+        if op != 'replace':
+            continue
+        if a_start == b_start == 0:
+            return True
+        if a_end - a_start > ATTRIBUTE_WORDS or b_end - b_start > ATTRIBUTE_WORDS:
+            continue
+        a, b = words_a[a_start:a_end], words_b[b_start:b_end]
+        if any(c.isdigit() for w in a + b for c in w):
+            continue
+        stems_a, stems_b = {w[:4] for w in a}, {w[:4] for w in b}
+        if not (stems_a <= stems_b or stems_b <= stems_a):
+            return True
+    return False
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+class ProductClusterer:
+    """Groups item keys whose titles have an estimated Jaccard similarity above a threshold"""
+
+    def __init__(self, num_perm=64, bands=32, threshold=DEFAULT_THRESHOLD, seed=b'ganger', normalizer=None):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.seed = seed
+        self.normalizer = normalizer or amazon_normalizer()
+        self._shingle_hashes = {}
+
+    def _hashes(self, shingle):
+        # One extendable-output digest supplies all num_perm 32-bit hash
+        # functions for a shingle; shingles recur across titles, so cache them.
+        hashes = self._shingle_hashes.get(shingle)
+        if hashes is None:
+            digest = hashlib.shake_128(self.seed + shingle.encode('utf-8')).digest(4 * self.num_perm)
+            hashes = self._shingle_hashes[shingle] = array('I', digest)
+        return hashes
+
+    def signature(self, shingle_set):
+        """MinHash signature: per hash function, the minimum hash over all shingles"""
+        if not shingle_set:
+            return None
+        return tuple(map(min, zip(*map(self._hashes, shingle_set))))
+
+    def similarity(self, sig_a, sig_b):
+        """Estimated Jaccard similarity: fraction of agreeing signature positions"""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / self.num_perm
+
+    def cluster(self, titles_by_key):
+        """Map each item key to a cluster id (the first key of its cluster in input order)"""
+        keys = list(titles_by_key)
+        normalized = self.normalizer.normalize_many([titles_by_key[k] for k in keys])
+        variants = [variant(titles_by_key[k]) for k in keys]
+        words = [title_words(titles_by_key[k]) for k in keys]
+
+        # Identical normalized titles share one signature
+        signature_cache = {}
+        signatures = []
+        for title in normalized:
+            if title not in signature_cache:
+                signature_cache[title] = self.signature(shingles(title))
+            signatures.append(signature_cache[title])
+
+        groups = _UnionFind(len(keys))
+        members = {i: [i] for i in range(len(keys))}
+        buckets = defaultdict(list)
+        for i, sig in enumerate(signatures):
+            if sig is None:
+                continue
+            for band in range(self.bands):
+                start = band * self.rows
+                bucket = buckets[(band, sig[start:start + self.rows])]
+                for j in bucket[:BUCKET_COMPARISONS]:
+                    # Equal variants are an equivalence, but word swaps are
+                    # checked against every member of both clusters so a
+                    # chain of unions can't join two colors or scents
+                    root_i, root_j = groups.find(i), groups.find(j)
+                    if variants[i] != variants[j] or root_i == root_j or \
+                            self.similarity(sig, signatures[j]) < self.threshold or \
+                            any(swapped_words(words[a], words[b]) for a in members[root_i] for b in members[root_j]):
+                        continue
+                    groups.union(i, j)
+                    root = groups.find(i)
+                    members[root] = members.pop(root_i) + members.pop(root_j)
+                bucket.append(i)
+
+        return {key: keys[groups.find(i)] for i, key in enumerate(keys)}
+
+
+def cluster_members(assignments):
+    """Invert key -> cluster id into cluster id -> [keys]"""
+    members = defaultdict(list)
+    for key, cluster_id in assignments.items():
+        members[cluster_id].append(key)
+    return members
+
+
+# Similar titles from the Amazon and Henry Schein exports that are different
+# products: sizes, counts, colors, scents, designs and brands
+CHECK_DISTINCT = [
+    ('Wirefy 12/2 Low Voltage Landscape Lighting Copper Wire - Outdoor Direct Burial - 12-Gauge 2-Conductor 250 Feet',
+     'Wirefy 10/2 Low Voltage Landscape Lighting Copper Wire - Outdoor Direct Burial - 10-Gauge 2-Conductor 200 Feet'),
+    ('Nettbe 210 PCS 6 Inches Reusable Cable Ties, Adjustable Cord Straps, Wire Organizer, Cord Wrap and Hook Loop '
+     'Cable Management - Black',
+     'Nettbe 210 PCS 8 Inches Reusable Cable Ties, Adjustable Cord Straps, Wire Organizer, Cord Wrap and Hook Loop '
+     'Cable Management - Black'),
+    ('GeilSpace 6 Pack 3/4" × 60" Pre-Cut Black Metal Pipe, Industrial Steel Fits Standard Three Quarters Inch Black '
+     'Threaded Pipes and Fittings - Vintage DIY Industrial Shelving (3/4" × 60", Black)',
+     'GeilSpace 6 Pack 3/4" × 36" Pre-Cut Black Metal Pipe, Industrial Steel Fits Standard Three Quarters Inch Black '
+     'Threaded Pipes and Fittings - Vintage DIY Industrial Shelving (3/4" × 36", Black)'),
+    ('LeMotech Junction Box, ABS Plastic IP65 Waterproof and Dustproof, Universal Electrical Enclosure, Outdoor and '
+     'Indoor Project Box 5.9X 5.9X 3.9 inch (150 x 150 x 100 mm)',
+     'LeMotech Junction Box, ABS Plastic IP65 Waterproof and Dustproof, Universal Electrical Enclosure, Outdoor and '
+     'Indoor Project Box 10 x 7.9 x 3.1 inch (255 x 200 x 80 mm)'),
+    ('LeMotech Junction Box, ABS Plastic IP65 Waterproof and Dustproof, Universal Electrical Enclosure, Outdoor and '
+     'Indoor Project Box, 10" x 7.9" x 4.7", White',
+     'LeMotech Junction Box, ABS Plastic IP65 Waterproof and Dustproof, Universal Electrical Enclosure, Outdoor and '
+     'Indoor Project Box 10 x 7.9 x 3.1 inch (255 x 200 x 80 mm)'),
+    ('Method All-Purpose Cleaner Spray, French Lavender, Plant-Based and Biodegradable Formula Perfect for Most '
+     'Counters, Tiles and More, 28 Fl Oz, (Pack of 1)',
+     'Method All-Purpose Cleaner Spray, Lime + Sea Salt, Plant-Based and Biodegradable Formula Perfect for Most '
+     'Counters, Tiles, Stone, and More, 28 oz Spray Bottles, (Pack of 1)'),
+    ('Method All-Purpose Cleaner Spray, Pink Grapefruit, Plant-Based and Biodegradable Formula Perfect for Most '
+     'Counters, Tiles and More, 28 Fl Oz, (Pack of 4)',
+     'Method All-Purpose Cleaner, Pink Grapefruit, Plant-Based and Biodegradable Formula Perfect for Most Counters, '
+     'Tiles, Stone, and More, 28 oz spray bottle'),
+    ('Homestia Wine Stoppers for Wine Bottles, Skull Wine Beverage Bottle Stopper, Stainless Steel Reusable Wine '
+     'Corks with Silicone Seal, Bottle Cover Leak proof Keep Fresh',
+     'Homestia Wine Stoppers for Wine Bottles, Elephant Wine Beverage Bottle Stopper, Stainless Steel Reusable Wine '
+     'Corks with Silicone Seal, Bottle Cover Leak proof Keep Fresh'),
+    ('Nestle Coffee mate Coffee Creamer, Original, Liquid Creamer Singles, Non Dairy, No Refrigeration, 0.375 fl oz '
+     'Tubs (Pack of 180)',
+     'Nestle Coffee mate Coffee Creamer, French Vanilla, Liquid Creamer Singles, Non Dairy, No Refrigeration, 0.375 '
+     'fl oz Tubs (Pack of 180)'),
+    ("Hanes Men's Short Sleeve Beefy-T (Pack of 2), Black, XX-Large",
+     "Hanes Men's Short Sleeve Beefy-T (Pack of 2), Navy, XX-Large"),
+    ('Method All-Purpose Cleaner, Pink Grapefruit, Plant-Based and Biodegradable Formula Perfect for Most Counters, '
+     'Tiles, Stone, and More, 28 oz spray bottle',
+     'Method All-Purpose Cleaner Spray, Lime + Sea Salt, Plant-Based and Biodegradable Formula Perfect for Most '
+     'Counters, Tiles, Stone, and More, 28 oz Spray Bottles, (Pack of 1)'),
+    ('Silicone Griddle Tools Mat for Blackstone, Silicone Grill Mats for Outdoor Grill, Blackstone Silicone Mat, Food '
+     'Grade Silicone Mat for Barbecue, Kitchen Collapsible Silicone Mat (Orange)',
+     'Silicone Griddle Tools Mat for Blackstone, Silicone Grill Side Shelf Mat, Blackstone Silicone Mat, Grill Mats for '
+     'Outdoor, Food Grade Silicone Mat for Barbecue, Kitchen Collapsible Silicone Mat (Grey)'),
+    ('Ugrade Titanium Cutting Boards - Pure Titanium Cutting Boards Board Steel Metal Cutting Board for Board Outdoor '
+     'BBQ Party Perfect for Cutting Meat Vegetables Cheese Cutting Boards11.81x7.48in (Small)',
+     'Ugrade Titanium Cutting Boards - Pure Titanium Cutting Boards Board Steel Metal Cutting Board for Board Outdoor '
+     'BBQ Party Perfect for Cutting Meat Vegetables Cheese Cutting Boards18.11x12 in (Large)'),
+    ('FosPower Banana Plugs 12 Pairs / 24 pcs, Closed Screw 24K Gold Plated Speaker Plug Connectors for Speaker Wire, '
+     'Wall Plate, Home Theater, Audio/Video Receiver, Amplifiers and Sound Systems',
+     'FosPower Right Angle Banana Plugs (6 Pairs / 12 pcs), Closed Screw 24K Gold Plated Banana Speaker Plug '
+     'Connectors for Speaker Wire, Wall Plate, Home Theater, Audio/Video Receiver, and Sound Systems'),
+    ('Amazon Basics Flextra Tall Kitchen Drawstring Trash Bags, 13 Gallon, 90 Count',
+     'Amazon Basics Trash Bags, Tall Kitchen Drawstring, Unscented, 13 Gallon, 120 Count, Pack of 1'),
+    ('Disinfectant Surface CaviWipes Large 6 in x 6.75 in Canister 160/Can, 12 CN/CA',
+     'Wipes Germicidal Super Sani-Cloth Large 6 in x 6.75 in Canister 160/Can, 12 CN/CA'),
+    ('Criterion N100 Nitrile Exam Gloves Large Standard Blue Non-Sterile Chemo Tested, 10 BX/CA',
+     'Criterion N100 Nitrile Exam Gloves X-Large Standard Blue Non-Sterile Chemo Tested, 10 BX/CA'),
+    ('Surgipro II Suture Polypropylene Monofilament 4-0 18" Non-Absorbable P-12 Premium Reverse Cutting 3/8 Circle '
+     'Needle 19mm Uncoated Blue 12/Case',
+     'Surgipro II Suture Polypropylene Monofilament 5-0 18" Non-Absorbable P-12 Premium Reverse Cutting 3/8 Circle '
+     'Needle 19mm Uncoated Blue 12/Case'),
+]
+
+# Re-listings of one product that must be merged: the GOJO refill sold under
+# two ASINs, a Henry Schein item under two item codes, and rewordings
+CHECK_SAME = [
+    ('GOJO 1911-02 Clear and Mild Foam Handwash 1200 mL Refill for GOJO LTX-12 Dispenser (Pack of 2)',
+     'GOJO Clear & Mild Foam Handwash, EcoLogo Certified, 1200 mL Foam Hand Soap Refill LTX-12 Touch-Free Dispenser '
+     '(Pack of 2) - 1911-02'),
+    ('Disinfectant Surface CaviWipes Large 6 in x 6.75 in Canister 160/Can, 12 CN/CA',
+     'Disinfectant Surface CaviWipes Large 6 in x 6.75 in Canister 160/Can, 12 CN/CA'),
+    ('Wirefy 12/2 Low Voltage Landscape Lighting Copper Wire - Outdoor Direct Burial - 12-Gauge 2-Conductor 250 Feet',
+     'Wirefy 12/2 Low Voltage Landscape Lighting Wire - Outdoor Direct Burial - 12-Gauge 2-Conductor - 250 Feet'),
+    ('Method All-Purpose Cleaner Spray, French Lavender, Plant-Based and Biodegradable Formula Perfect for Most '
+     'Counters, Tiles and More, 28 Fl Oz, (Pack of 1)',
+     'Method All Purpose Cleaner Spray, French Lavender, Plant-Based and Biodegradable Formula Perfect for Most '
+     'Counters, Tiles, and More, 28 Fl Oz (Pack of 1)'),
+]
+
+
+def check(clusterer=None):
+    """Pairs from CHECK_DISTINCT/CHECK_SAME that cluster the wrong way"""
+    clusterer = clusterer or ProductClusterer()
+    failures = []
+    for expected, pairs in ((False, CHECK_DISTINCT), (True, CHECK_SAME)):
+        for a, b in pairs:
+            assignments = clusterer.cluster({'a': a, 'b': b})
+            if (assignments['a'] == assignments['b']) != expected:
+                failures.append((expected, a, b))
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+    from procurement_rows import read_rows
+
+    parser = argparse.ArgumentParser(description='Cluster near-duplicate products in a vendor export')
+    parser.add_argument('file', nargs='?')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--check', action='store_true', help='check known distinct and duplicate listings')
+    args = parser.parse_args()
+
+    if args.check:
+        failures = check(ProductClusterer(threshold=args.threshold))
+        for expected, a, b in failures:
+            print(f"❌ {'not merged' if expected else 'merged'}:\n   {a[:80]}\n   {b[:80]}")
+        total = len(CHECK_DISTINCT) + len(CHECK_SAME)
+        print(f"{total - len(failures)}/{total} pairs clustered as expected")
+        raise SystemExit(1 if failures else 0)
+    if args.file is None:
+        parser.error('a file is required unless --check is given')
+
+    _, rows = read_rows(args.file)
+    titles = {}
+    for row in rows:
+        titles.setdefault(row['item_key'], row['title'])
+
+    clusters = cluster_members(ProductClusterer(threshold=args.threshold).cluster(titles))
+    merged = {cid: keys for cid, keys in clusters.items() if len(keys) > 1}
+
+    print(f"Items: {len(titles)}, clusters: {len(clusters)}, multi-item clusters: {len(merged)}")
+    for cluster_id, keys in sorted(merged.items(), key=lambda x: len(x[1]), reverse=True):
+        print(f"\n[{len(keys)} items] {titles[cluster_id][:80]}")
+        for key in keys[1:]:
+            print(f"   ~ {titles[key][:80]}")
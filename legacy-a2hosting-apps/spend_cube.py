@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Precomputed month x category x vendor x item-cluster spend cube
+
+Purchase rows are folded once into cells of (orders, quantity, total) keyed
+by the four dimensions. Month totals, top categories, per-vendor splits and
+year-over-year comparisons are then roll-ups over the cells rather than
+another pass over every order, and the cube is saved to disk so the
+questions can be asked again without the raw exports.
+
+Usage:
+    python3 spend_cube.py build orders_from_*.csv 1eb6921b-*.csv [--no-clusters]
+    python3 spend_cube.py rollup month vendor
+    python3 spend_cube.py top category --limit 10 --where vendor=amazon
+    python3 spend_cube.py yoy --where category=Grocery
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+DIMENSIONS = ('month', 'category', 'vendor', 'cluster')
+DEFAULT_CUBE = 'spend_cube.json'
+CUBE_VERSION = 1
+
+
+class SpendCube:
+    """Sparse cube of [orders, quantity, total] cells keyed by DIMENSIONS"""
+
+    def __init__(self):
+        self.cells = {}
+        self.rows = 0
+
+    def add(self, month, category, vendor, cluster, amount, quantity=1):
+        key = (month, category, vendor, cluster)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [1, quantity, amount]
+        else:
+            cell[0] += 1
+            cell[1] += quantity
+            cell[2] += amount
+        self.rows += 1
+
+    def add_rows(self, rows, cluster_of=None):
+        """Fold procurement_rows rows in; cluster_of maps vendor|item_key to a cluster id"""
+        for row in rows:
+            key = f"{row['vendor']}|{row['item_key']}"
+            cluster = cluster_of.get(key, key) if cluster_of else key
+            self.add(row['month'], row['category'], row['vendor'], cluster, row['amount'], row['quantity'])
+        return self
+
+    def _matches(self, key, filters):
+        for i, wanted in filters:
+            value = key[i]
+            if isinstance(wanted, (set, frozenset, list, tuple)):
+                if value not in wanted:
+                    return False
+            elif value != wanted:
+                return False
+        return True
+
+    def _filters(self, where):
+        unknown = set(where) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown cube dimension(s): {', '.join(sorted(unknown))}")
+        return [(DIMENSIONS.index(dim), value) for dim, value in where.items()]
+
+    def rollup(self, *dims, **where):
+        """
+        Sum cells over every dimension not in dims, after filtering on where
+
+        rollup('month', vendor='amazon') -> {('2025-01',): [orders, quantity, total], ...}
+        """
+        filters = self._filters(where)
+        indexes = [DIMENSIONS.index(dim) for dim in dims]
+        totals = defaultdict(lambda: [0, 0, 0.0])
+        for key, (orders, quantity, total) in self.cells.items():
+            if filters and not self._matches(key, filters):
+                continue
+            group = totals[tuple(key[i] for i in indexes)]
+            group[0] += orders
+            group[1] += quantity
+            group[2] += total
+        return dict(totals)
+
+    def totals(self, dim, **where):
+        """Total spend per value of one dimension"""
+        return {group[0]: cell[2] for group, cell in self.rollup(dim, **where).items()}
+
+    def month_totals(self, **where):
+        """Total spend per YYYY-MM month, in month order"""
+        return dict(sorted(self.totals('month', **where).items()))
+
+    def top(self, dim, limit=10, **where):
+        """(value, orders, quantity, total) for the highest-spend values of a dimension"""
+        groups = sorted(self.rollup(dim, **where).items(), key=lambda x: x[1][2], reverse=True)
+        return [(group[0], *cell) for group, cell in groups[:limit]]
+
+    def year_over_year(self, **where):
+        """(month, total, same month a year earlier or None, change % or None) per month"""
+        monthly = self.month_totals(**where)
+        comparison = []
+        for month, total in monthly.items():
+            if not month:
+                continue
+            prior_month = f"{int(month[:4]) - 1}{month[4:]}"
+            prior = monthly.get(prior_month)
+            change = (total - prior) / prior * 100 if prior else None
+            comparison.append((month, total, prior, change))
+        return comparison
+
+    def save(self, path=DEFAULT_CUBE):
+        """Write the cube atomically as one JSON row per cell"""
+        data = {
+            'version': CUBE_VERSION,
+            'dimensions': DIMENSIONS,
+            'rows': self.rows,
+            'cells': [list(key) + cell for key, cell in self.cells.items()],
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_CUBE):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CUBE_VERSION:
+            raise ValueError(f"{path}: unsupported cube version {data.get('version')}")
+        cube = cls()
+        cube.rows = data['rows']
+        width = len(DIMENSIONS)
+        for cell in data['cells']:
+            cube.cells[tuple(cell[:width])] = cell[width:]
+        return cube
+
+
+def cluster_rows(rows):
+    """Map vendor|item_key to a product cluster, clustering each vendor's titles separately"""
+    from product_clusters import ProductClusterer
+
+    titles = defaultdict(dict)
+    for row in rows:
+        titles[row['vendor']][f"{row['vendor']}|{row['item_key']}"] = row['title']
+    cluster_of = {}
+    for vendor_titles in titles.values():
+        cluster_of.update(ProductClusterer().cluster(vendor_titles))
+    return cluster_of
+
+
+def parse_where(conditions):
+    """['vendor=amazon', 'month=2025-01,2025-02'] -> {'vendor': 'amazon', 'month': {...}}"""
+    where = {}
+    for condition in conditions or []:
+        dim, _, value = condition.partition('=')
+        where[dim] = set(value.split(',')) if ',' in value else value
+    return where
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Month x category x vendor x item-cluster spend cube')
+    parser.add_argument('--cube', default=DEFAULT_CUBE, help='cube file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='build the cube from vendor exports')
+    build_parser.add_argument('files', nargs='+', help='files, directories or glob patterns')
+    build_parser.add_argument('--workers', type=int, help='parser processes (default: CPU count)')
+    build_parser.add_argument('--no-clusters', action='store_true',
+                              help='use each listing as its own cluster instead of clustering titles')
+
+    for name, help_text in [('rollup', 'total spend grouped by dimensions'),
+                            ('top', 'highest-spend values of one dimension'),
+                            ('yoy', 'monthly spend against the same month a year earlier')]:
+        sub = subparsers.add_parser(name, help=help_text)
+        if name == 'rollup':
+            sub.add_argument('dims', nargs='*', metavar='DIM', help=f"dimensions to keep ({', '.join(DIMENSIONS)})")
+        elif name == 'top':
+            sub.add_argument('dim', choices=DIMENSIONS)
+            sub.add_argument('--limit', type=int, default=10)
+        sub.add_argument('--where', action='append', metavar='DIM=VALUE[,VALUE]', help='filter cells')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        from parallel_ingest import ingest_inputs
+
+        started = time.perf_counter()
+        rows = [row for _, _, _, file_rows in ingest_inputs(args.files, args.workers) for row in file_rows]
+        cluster_of = None if args.no_clusters else cluster_rows(rows)
+        cube = SpendCube().add_rows(rows, cluster_of)
+        cube.save(args.cube)
+        print(f"🧊 {cube.rows} rows folded into {len(cube.cells)} cells in "
+              f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        print(f"💾 Cube saved to: {args.cube}")
+        return
+
+    cube = SpendCube.load(args.cube)
+    where = parse_where(args.where)
+    unknown = (set(getattr(args, 'dims', [])) | set(where)) - set(DIMENSIONS)
+    if unknown:
+        parser.error(f"unknown dimension(s): {', '.join(sorted(unknown))}")
+    started = time.perf_counter()
+
+    if args.command == 'rollup':
+        groups = sorted(cube.rollup(*args.dims, **where).items())
+        for group, (orders, quantity, total) in groups:
+            print(f"{' | '.join(v or '-' for v in group) or 'all'}: ${total:.2f} ({orders} orders, {quantity} units)")
+    elif args.command == 'top':
+        for i, (value, orders, quantity, total) in enumerate(cube.top(args.dim, args.limit, **where), 1):
+            print(f"{i}. {value or '-'}: ${total:.2f} ({orders} orders)")
+    else:
+        for month, total, prior, change in cube.year_over_year(**where):
+            if prior is None:
+                print(f"{month}: ${total:.2f}")
+            else:
+                print(f"{month}: ${total:.2f} vs ${prior:.2f} ({change:+.1f}%)")
+
+    print(f"\n⏱️  Answered from {len(cube.cells)} cells in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling for the analyze_*.py scripts
+
+A script marks where each stage (load, parse, classify, aggregate, render)
+begins; the profiler charges wall time, CPU time, entry counts and traced
+memory (net allocation and peak above the stage's start) to whichever stage
+is current. When profiling is off, mark() returns immediately, so the marks
+can stay in the scripts.
+
+    from stage_profiler import StageProfiler
+    profiler = StageProfiler.from_argv()
+    profiler.mark('load')
+    ...
+    profiler.mark('render')
+    ...
+    profiler.report()
+
+Run a script with --profile to print the summary, or --profile=stages.json
+to also export it. Memory tracing (tracemalloc) slows Python code down, so
+timings under --profile are relative, not absolute; --profile-time[=PATH]
+profiles time only, for absolute stage timings (benchmark_analyzers.py).
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class StageProfiler:
+    """Charges time and allocations to the current stage between marks"""
+
+    def __init__(self, enabled=False, trace_memory=True, export_path=None):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.export_path = export_path
+        # stage name -> [entries, wall seconds, cpu seconds, net bytes, peak bytes]
+        self.stages = {}
+        self._current = None
+        self._started = 0.0
+        self._cpu_started = 0.0
+        self._memory_started = 0
+        self._total_started = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_argv(cls, argv=None):
+        """
+        Enabled by --profile or --profile-time (no memory tracing); either
+        with =PATH also exports the summary as JSON
+        """
+        for arg in sys.argv[1:] if argv is None else argv:
+            option, _, path = arg.partition('=')
+            if option in ('--profile', '--profile-time'):
+                return cls(enabled=True, trace_memory=option == '--profile', export_path=path or None)
+        return cls()
+
+    def mark(self, name):
+        """End the current stage (if any) and start charging to `name`"""
+        if not self.enabled:
+            return
+        self._close()
+        self._current = name
+        stage = self.stages.setdefault(name, [0, 0.0, 0.0, 0, 0])
+        stage[0] += 1
+        if self.trace_memory:
+            self._memory_started = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._cpu_started = time.process_time()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        """End the current stage without starting another"""
+        if self.enabled:
+            self._close()
+            self._current = None
+
+    @contextmanager
+    def stage(self, name):
+        """Charge a block to `name`, then resume the stage that was running before it"""
+        previous = self._current
+        self.mark(name)
+        try:
+            yield
+        finally:
+            if previous is None:
+                self.stop()
+            else:
+                self.mark(previous)
+                self.stages[previous][0] -= 1  # resuming is not a new entry
+
+    def _close(self):
+        if self._current is None:
+            return
+        wall = time.perf_counter() - self._started
+        cpu = time.process_time() - self._cpu_started
+        stage = self.stages[self._current]
+        stage[1] += wall
+        stage[2] += cpu
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            stage[3] += current - self._memory_started
+            stage[4] = max(stage[4], peak - self._memory_started)
+
+    def summary(self):
+        """One dict per stage, in the order stages were first entered"""
+        return [{
+            'stage': name,
+            'calls': calls,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'allocated_bytes': allocated if self.trace_memory else None,
+            'peak_bytes': peak if self.trace_memory else None,
+        } for name, (calls, wall, cpu, allocated, peak) in self.stages.items()]
+
+    def report(self, script=None):
+        """Close the last stage, then print (and optionally export) the summary when enabled"""
+        if not self.enabled:
+            return
+        self.stop()
+        stages = self.summary()
+        total_wall = time.perf_counter() - self._total_started
+
+        print(f"\n⏱️  STAGE PROFILE{f' ({script})' if script else ''}:")
+        print(f"-"*78)
+        print(f"{'stage':<16} {'calls':>6} {'wall (ms)':>11} {'cpu (ms)':>10} {'wall %':>7} {'net MB':>9} {'peak MB':>9}")
+        for s in stages:
+            memory = (f"{s['allocated_bytes'] / 1e6:>9.2f} {s['peak_bytes'] / 1e6:>9.2f}"
+                      if self.trace_memory else f"{'-':>9} {'-':>9}")
+            share = s['wall_seconds'] / total_wall * 100 if total_wall > 0 else 0
+            print(f"{s['stage']:<16} {s['calls']:>6} {s['wall_seconds'] * 1000:>11.1f} "
+                  f"{s['cpu_seconds'] * 1000:>10.1f} {share:>6.1f}% {memory}")
+        print(f"{'total':<16} {'':>6} {total_wall * 1000:>11.1f}")
+
+        if self.export_path:
+            with open(self.export_path, 'w', encoding='utf-8') as f:
+                json.dump({'script': script, 'total_wall_seconds': total_wall,
+                           'memory_traced': self.trace_memory, 'stages': stages}, f, indent=2)
+            print(f"📄 Stage profile saved to: {self.export_path}")
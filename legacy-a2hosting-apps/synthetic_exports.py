@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Synthetic Amazon Business and Henry Schein exports at any scale
+
+Products, categories and price levels are sampled from the real exports
+next to this script, with popularity skewed so a few items dominate the way
+they do in real order histories. Larger runs add pack-size variants so the
+catalog keeps growing with the row count. Account users are replaced with
+placeholder buyers. Files are written row by row with the exact column
+layouts and the hardcoded file names the analyze_*.py scripts expect, so any
+analyzer can be pointed at a directory of synthetic data.
+
+Usage:
+    python3 synthetic_exports.py --out /tmp/synthetic --amazon-rows 1000000 --henry-schein-rows 300000
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import string
+from datetime import date, timedelta
+
+from procurement_rows import parse_amount, parse_quantity
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+AMAZON_EXPORT = 'orders_from_20240707_to_20250707_20250707_1040.csv'
+HENRY_SCHEIN_EXPORT = '1eb6921b-e392-457b-8a1f-a08236e20da9.csv'
+
+AMAZON_HEADERS = [
+    'Order Date', 'Order ID', 'Account User', 'Account User Email', 'Currency', 'Total Amount',
+    'Amazon-Internal Product Category', 'ASIN', 'Title', 'UNSPSC', 'Manufacturer', 'National Stock Number',
+    'Item model number', 'Part number', 'Item Quantity', 'Item Subtotal', 'Item Shipping & Handling',
+    'Item Promotion', 'Pricing Discount Applied', 'Received Quantity', 'Received Date', 'Department',
+    'Cost Center', 'Location', 'Seller Name'
+]
+HENRY_SCHEIN_HEADERS = [
+    'Shipped Location Nickname', 'Extended Description', 'Item Code', 'Manufacturer', 'Manufacturer Code',
+    'Uom', 'Qty', 'Amount', 'LastPurchasedDate'
+]
+AMAZON_CATALOG_FIELDS = ['Amazon-Internal Product Category', 'ASIN', 'Title', 'UNSPSC', 'Manufacturer',
+                         'Item model number', 'Part number', 'Seller Name']
+HENRY_SCHEIN_CATALOG_FIELDS = ['Extended Description', 'Item Code', 'Manufacturer', 'Manufacturer Code', 'Uom']
+
+BUYERS = [(f"Buyer {i}", f"buyer{i}@example.com") for i in range(1, 6)]
+DEFAULT_START = date(2024, 7, 7)
+DEFAULT_END = date(2025, 7, 7)
+# Roughly the spread of the real exports: mostly single units, a long tail of bulk buys
+AMAZON_QUANTITIES = [(1, 70), (2, 12), (3, 5), (4, 4), (5, 3), (10, 2), (0, 1), (6, 2), (12, 1)]
+HENRY_SCHEIN_QUANTITIES = [(1, 25), (2, 20), (3, 10), (4, 12), (5, 6), (6, 6), (10, 8), (12, 5), (20, 4), (50, 4)]
+PACK_SIZES = [2, 3, 4, 6, 10, 12, 24]
+
+
+def _load_catalog(filename, fields, amount_column, quantity_column):
+    """One entry per distinct product in a real export: its descriptive fields and median unit price"""
+    prices = {}
+    products = {}
+    with open(os.path.join(HERE, filename), 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            amount = parse_amount(row.get(amount_column))
+            if amount <= 0:
+                continue
+            key = tuple(row.get(field, '') for field in fields)
+            products.setdefault(key, dict(zip(fields, key)))
+            prices.setdefault(key, []).append(amount / parse_quantity(row.get(quantity_column)))
+    catalog = []
+    for key, product in products.items():
+        item_prices = sorted(prices[key])
+        product['price'] = item_prices[len(item_prices) // 2]
+        catalog.append(product)
+    return catalog
+
+
+def _variant(rng, product, id_field, title_field):
+    """A pack-size variant of a real product with its own id, so large runs have more distinct items"""
+    pack = rng.choice(PACK_SIZES)
+    variant = dict(product)
+    variant[title_field] = f"{product[title_field]} - Pack of {pack}"
+    if id_field == 'ASIN':
+        variant[id_field] = 'B0' + ''.join(rng.choices(string.ascii_uppercase + string.digits, k=8))
+    else:
+        variant[id_field] = str(rng.randint(1000000, 9999999))
+    variant['price'] = round(product['price'] * pack * rng.uniform(0.8, 0.95), 2)
+    return variant
+
+
+def build_catalog(rng, base, rows, id_field, title_field, rows_per_item=8):
+    """Real products plus enough variants for about one distinct item per rows_per_item rows"""
+    catalog = list(base)
+    rng.shuffle(catalog)
+    # Variants go after the real products so the real ones stay the most popular
+    while len(catalog) < rows // rows_per_item:
+        catalog.append(_variant(rng, rng.choice(base), id_field, title_field))
+    # Zipf-like popularity: the n-th product is ordered about 1/n as often as the first
+    weights = [1 / (rank ** 0.9) for rank in range(1, len(catalog) + 1)]
+    return catalog, list(_cumulative(weights))
+
+
+def _cumulative(weights):
+    total = 0
+    for weight in weights:
+        total += weight
+        yield total
+
+
+def descending_dates(rng, count, start, end):
+    """count sorted-descending random dates in [start, end] without holding them all in memory"""
+    days = (end - start).days
+    current = 1.0
+    for remaining in range(count, 0, -1):
+        # Largest of `remaining` uniforms below `current` (order statistics, generated top-down)
+        current *= rng.random() ** (1 / remaining)
+        yield start + timedelta(days=int(current * (days + 1)))
+
+
+def _us_date(day):
+    return f"{day.month}/{day.day}/{day.year}"
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return lambda: rng.choices(values, weights)[0]
+
+
+def _jitter(rng, price):
+    return price * math.exp(rng.gauss(0, 0.08))
+
+
+def write_amazon(path, rows, seed=0, start=DEFAULT_START, end=DEFAULT_END):
+    """Write an Amazon Business order export of `rows` order lines, newest first"""
+    rng = random.Random(seed)
+    catalog, cumulative = build_catalog(rng, _load_catalog(AMAZON_EXPORT, AMAZON_CATALOG_FIELDS,
+                                                           'Item Subtotal', 'Item Quantity'),
+                                        rows, 'ASIN', 'Title')
+    quantity = _weighted(rng, AMAZON_QUANTITIES)
+    order_lines_left = 0
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(AMAZON_HEADERS)
+        for day in descending_dates(rng, rows, start, end):
+            if order_lines_left == 0:
+                order_id = f"{rng.randint(111, 114)}-{rng.randint(0, 9999999):07d}-{rng.randint(0, 9999999):07d}"
+                buyer, email = rng.choice(BUYERS)
+                order_lines_left = rng.choice((1, 1, 1, 2, 2, 3, 4))
+            order_lines_left -= 1
+
+            product = rng.choices(catalog, cum_weights=cumulative)[0]
+            qty = quantity()
+            subtotal = _jitter(rng, product['price']) * max(qty, 1)
+            writer.writerow([
+                _us_date(day), order_id, buyer, email, 'N/A', 'N/A',
+                product['Amazon-Internal Product Category'], product['ASIN'], product['Title'],
+                product['UNSPSC'], product['Manufacturer'], '', product['Item model number'],
+                product['Part number'], qty, f"{subtotal:.2f}", 0, '', 0, '', 'N/A', '', '', '',
+                product['Seller Name']
+            ])
+    return rows
+
+
+def write_henry_schein(path, rows, seed=0, start=DEFAULT_START, end=DEFAULT_END):
+    """Write a Henry Schein purchase history export of `rows` lines across the practice locations"""
+    rng = random.Random(seed + 1)
+    base = _load_catalog(HENRY_SCHEIN_EXPORT, HENRY_SCHEIN_CATALOG_FIELDS, 'Amount', 'Qty')
+    catalog, cumulative = build_catalog(rng, base, rows, 'Item Code', 'Extended Description')
+    with open(os.path.join(HERE, HENRY_SCHEIN_EXPORT), 'r', encoding='utf-8-sig', newline='') as f:
+        locations = sorted({row['Shipped Location Nickname'] for row in csv.DictReader(f)})
+    quantity = _weighted(rng, HENRY_SCHEIN_QUANTITIES)
+    days = (end - start).days
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(HENRY_SCHEIN_HEADERS)
+        for _ in range(rows):
+            product = rng.choices(catalog, cum_weights=cumulative)[0]
+            qty = quantity()
+            day = start + timedelta(days=rng.randint(0, days))
+            writer.writerow([
+                rng.choice(locations), product['Extended Description'], product['Item Code'],
+                product['Manufacturer'], product['Manufacturer Code'], product['Uom'], qty,
+                f"{_jitter(rng, product['price']) * qty:,.2f}", f"{_us_date(day)} 0:00"
+            ])
+    return rows
+
+
+def generate(out_dir, amazon_rows, henry_schein_rows, seed=0, start=DEFAULT_START, end=DEFAULT_END):
+    """Write both exports into out_dir under the analyzers' file names; returns their paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    amazon_path = os.path.join(out_dir, AMAZON_EXPORT)
+    henry_schein_path = os.path.join(out_dir, HENRY_SCHEIN_EXPORT)
+    write_amazon(amazon_path, amazon_rows, seed, start, end)
+    write_henry_schein(henry_schein_path, henry_schein_rows, seed, start, end)
+    return amazon_path, henry_schein_path
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description='Generate synthetic vendor exports')
+    parser.add_argument('--out', required=True, help='output directory')
+    parser.add_argument('--amazon-rows', type=int, default=100_000)
+    parser.add_argument('--henry-schein-rows', type=int, default=30_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', type=date.fromisoformat, default=DEFAULT_START, help='YYYY-MM-DD')
+    parser.add_argument('--end', type=date.fromisoformat, default=DEFAULT_END, help='YYYY-MM-DD')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = generate(args.out, args.amazon_rows, args.henry_schein_rows, args.seed, args.start, args.end)
+    elapsed = time.perf_counter() - started
+    total = args.amazon_rows + args.henry_schein_rows
+    for path in paths:
+        print(f"✅ {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"⏱️  {total:,} rows in {elapsed:.1f} s ({total / elapsed:,.0f} rows/s)")
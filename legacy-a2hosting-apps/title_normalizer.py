@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Shared product-title normalizer for the procurement analyzers
+
+Strips size/count noise from product titles so repeat purchases of the same
+product group together. Titles repeat heavily across orders, so every stage
+keeps a bounded LRU cache of its results along with hit and timing counters.
+"""
+
+import re
+import time
+from collections import OrderedDict
+
+AMAZON_UNITS = [
+    'count', 'pack', 'ct', 'oz', 'ounce', 'lb', 'pound', 'inch', 'in', 'ft', 'feet', 'meter', 'm', 'cm',
+    'mm', 'gallon', 'gal', 'liter', 'l', 'ml', 'piece', 'pcs', 'pc', 'sheet', 'roll', 'box', 'case',
+    'dozen', 'pair', 'set', 'kit', 'bundle'
+]
+COFFEE_UNITS = ['count', 'pack', 'ct', 'pods']
+HENRY_SCHEIN_UNITS = ['count', 'ct', 'pack', 'box', 'case', 'each', 'ea']
+
+DEFAULT_CACHE_SIZE = 8192
+
+
+class _Stage:
+    """One regex substitution with its own LRU cache and counters"""
+
+    def __init__(self, name, pattern, replacement, cache_size, strip=False):
+        self.name = name
+        self.pattern = pattern
+        self.replacement = replacement
+        self.strip = strip
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.calls = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def __call__(self, text):
+        self.calls += 1
+        cache = self.cache
+        if text in cache:
+            self.hits += 1
+            cache.move_to_end(text)
+            return cache[text]
+        started = time.perf_counter()
+        result = self.pattern.sub(self.replacement, text)
+        if self.strip:
+            result = result.strip()
+        self.seconds += time.perf_counter() - started
+        cache[text] = result
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return result
+
+
+class TitleNormalizer:
+    """Lowercase a title, strip unit/count phrases, parentheticals and extra whitespace"""
+
+    def __init__(self, units, strip_parentheticals=True, cache_size=DEFAULT_CACHE_SIZE):
+        unit_pattern = re.compile(r'\b\d+\s*(' + '|'.join(units) + r')\b', re.IGNORECASE)
+        self.stages = [_Stage('units', unit_pattern, '', cache_size)]
+        if strip_parentheticals:
+            self.stages.append(_Stage('parentheticals', re.compile(r'\([^)]*\)'), '', cache_size))
+        self.stages.append(_Stage('whitespace', re.compile(r'\s+'), ' ', cache_size, strip=True))
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.calls = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def normalize(self, title):
+        """Normalize one title, answering repeats from the result cache"""
+        self.calls += 1
+        cache = self.cache
+        if title in cache:
+            self.hits += 1
+            cache.move_to_end(title)
+            return cache[title]
+        started = time.perf_counter()
+        result = title.lower()
+        for stage in self.stages:
+            result = stage(result)
+        self.seconds += time.perf_counter() - started
+        cache[title] = result
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return result
+
+    def normalize_many(self, titles):
+        """Normalize a whole column, running the stages once per distinct title"""
+        distinct = {title: None for title in titles}
+        for title in distinct:
+            distinct[title] = self.normalize(title)
+        repeats = len(titles) - len(distinct)
+        self.calls += repeats
+        self.hits += repeats
+        return [distinct[title] for title in titles]
+
+    def stats(self):
+        """Calls, cache hit rate and time spent for the whole normalizer and each stage"""
+        counters = [('normalize', self)] + [(stage.name, stage) for stage in self.stages]
+        return {
+            name: {
+                'calls': c.calls,
+                'hits': c.hits,
+                'hit_rate': c.hits / c.calls if c.calls else 0.0,
+                'seconds': c.seconds,
+                'cached': len(c.cache),
+            }
+            for name, c in counters
+        }
+
+    def print_stats(self):
+        print(f"\n🧮 TITLE NORMALIZER STATS:")
+        print(f"-"*60)
+        for name, s in self.stats().items():
+            print(f"{name:15} calls: {s['calls']:7}  hit rate: {s['hit_rate']*100:5.1f}%  "
+                  f"time: {s['seconds']*1000:8.2f} ms  cached: {s['cached']}")
+
+
+def amazon_normalizer(cache_size=DEFAULT_CACHE_SIZE):
+    """Normalizer matching analyze_amazon_orders.py's grouping rules"""
+    return TitleNormalizer(AMAZON_UNITS, strip_parentheticals=True, cache_size=cache_size)
+
+
+def coffee_normalizer(cache_size=DEFAULT_CACHE_SIZE):
+    """Normalizer matching analyze_coffee_spending.py's product-type grouping"""
+    return TitleNormalizer(COFFEE_UNITS, strip_parentheticals=False, cache_size=cache_size)
+
+
+def henry_schein_normalizer(cache_size=DEFAULT_CACHE_SIZE):
+    """Normalizer matching analyze_henry_schein.py's description grouping"""
+    return TitleNormalizer(HENRY_SCHEIN_UNITS, strip_parentheticals=False, cache_size=cache_size)
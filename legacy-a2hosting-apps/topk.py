@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Bounded-heap top-K selection for analyzer reports
+
+The reports print the first 5, 10 or 20 entries of lists they sort in
+full. TopK keeps only the K best items seen so far in a min-heap, so
+selecting them is O(n log K) time and O(K) memory, and can happen while
+rows are being aggregated. GroupedTopK keeps one such heap per group (top
+items per category). Ties keep the item seen first, so results match
+`sorted(items, key=key, reverse=True)[:k]` exactly.
+
+Usage:
+    python3 topk.py [--size 1000000] [--k 10]    # benchmark against a full sort
+"""
+
+import heapq
+from itertools import count
+
+
+class TopK:
+    """The k items with the largest key, in descending order"""
+
+    def __init__(self, k, key=None):
+        self.k = max(k, 0)
+        self.key = key or (lambda item: item)
+        self.seen = 0
+        self._heap = []
+        self._order = count()
+
+    def push(self, item):
+        self.seen += 1
+        value = self.key(item)
+        heap = self._heap
+        if len(heap) < self.k:
+            # Later arrivals rank lower on ties, so they are evicted first
+            heapq.heappush(heap, (value, -next(self._order), item))
+        elif heap and value > heap[0][0]:
+            heapq.heapreplace(heap, (value, -next(self._order), item))
+
+    def extend(self, items):
+        for item in items:
+            self.push(item)
+        return self
+
+    def items(self):
+        return [entry[2] for entry in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        return iter(self.items())
+
+
+class GroupedTopK:
+    """A TopK per group, plus how many items each group has seen"""
+
+    def __init__(self, k, key=None):
+        self.k = k
+        self.key = key
+        self.groups = {}
+
+    def push(self, group, item):
+        top = self.groups.get(group)
+        if top is None:
+            top = self.groups[group] = TopK(self.k, self.key)
+        top.push(item)
+
+    def items(self, group):
+        top = self.groups.get(group)
+        return top.items() if top else []
+
+    def seen(self, group):
+        top = self.groups.get(group)
+        return top.seen if top else 0
+
+
+def top_k(items, k, key=None):
+    """sorted(items, key=key, reverse=True)[:k] without sorting everything"""
+    return heapq.nlargest(k, items, key=key)
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description='Benchmark bounded-heap top-K against a full sort')
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    items = [{'total_price': round(rng.uniform(1, 500), 2)} for _ in range(args.size)]
+    key = lambda x: x['total_price']
+
+    started = time.perf_counter()
+    expected = sorted(items, key=key, reverse=True)[:args.k]
+    sort_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    selected = top_k(items, args.k, key)
+    heap_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    streamed = TopK(args.k, key).extend(items).items()
+    stream_seconds = time.perf_counter() - started
+
+    for result in (selected, streamed):
+        assert all(a is b for a, b in zip(result, expected)) and len(result) == len(expected)
+    print(f"{args.size:,} items, k={args.k}: full sort {sort_seconds:.3f} s, "
+          f"top_k {heap_seconds:.3f} s ({sort_seconds / heap_seconds:.1f}x), "
+          f"streaming TopK {stream_seconds:.3f} s ({sort_seconds / stream_seconds:.1f}x)")
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Append-only, hash-chained audit log for HIPAA timestamp events
+
+Each entry is one JSON line:
+
+    {"seq":1,"ts_ns":1760000000123456789,"time":"2025-10-09T08:53:20.123456789Z",
+     "event":{...},"prev":"<sha256 of entry 0>","hash":"<sha256 of this line up to ,"hash">"}
+
+Sequence numbers increase by one from 1, timestamps are UTC with
+nanosecond resolution, and every hash covers the previous entry's hash, so
+editing, dropping or reordering an entry breaks the chain from that point.
+
+Writers use group commit: appends are hashed in order under a lock, and
+whichever caller finds no flush in progress writes and fsyncs everything
+pending in one go while later callers queue behind it. One fsync therefore
+covers a whole batch of concurrent events.
+
+The verifier memory-maps the log and re-checks the chain in one streaming
+pass without parsing the events.
+
+Usage:
+    python3 audit_log.py verify time_audit.log
+    python3 audit_log.py benchmark [--events 100000] [--threads 16] [--path /tmp/audit_bench.log]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+
+GENESIS = '0' * 64
+_HASH_FIELD = b',"hash":"'
+# A line is the hashed prefix, then ,"hash":"<64 hex digits>"} and a newline;
+# the prefix itself ends with "prev":"<64 hex digits>"
+_SUFFIX = len(_HASH_FIELD) + 64 + 3
+
+
+class AuditLogError(Exception):
+    """The log's chain, sequence or framing is broken"""
+
+
+@lru_cache(maxsize=4)
+def _format_second(seconds):
+    return datetime.fromtimestamp(seconds, dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def format_ns(ts_ns):
+    """UTC ISO 8601 with all nine fractional digits"""
+    seconds, nanoseconds = divmod(ts_ns, 1_000_000_000)
+    # Consecutive entries almost always share the second, so its text is cached
+    return f"{_format_second(seconds)}.{nanoseconds:09d}Z"
+
+
+def encode_entry(seq, ts_ns, event_json, prev):
+    """(line bytes, hash) for one entry; event_json is the event already serialized"""
+    prefix = (f'{{"seq":{seq},"ts_ns":{ts_ns},"time":"{format_ns(ts_ns)}",'
+              f'"event":{event_json},"prev":"{prev}"').encode('utf-8')
+    digest = hashlib.sha256(prefix).hexdigest()
+    return prefix + _HASH_FIELD + digest.encode('ascii') + b'"}\n', digest
+
+
+def _line_seq(line):
+    return int(line[7:line.index(b',', 7)])
+
+
+def _line_hash(line):
+    return line[-_SUFFIX + len(_HASH_FIELD):-3].decode('ascii')
+
+
+def _check_line(line, expected_seq, expected_prev, offset):
+    """Hash of a verified entry line (including its newline), or AuditLogError"""
+    if len(line) < _SUFFIX + 80 or line[-_SUFFIX:-_SUFFIX + len(_HASH_FIELD)] != _HASH_FIELD \
+            or not line.startswith(b'{"seq":'):
+        raise AuditLogError(f"Malformed entry at byte {offset}")
+    prefix = line[:-_SUFFIX]
+    digest = _line_hash(line)
+    try:
+        seq = _line_seq(prefix)
+    except ValueError:
+        raise AuditLogError(f"Malformed entry at byte {offset}") from None
+    if seq != expected_seq:
+        raise AuditLogError(f"Sequence gap at byte {offset}: expected {expected_seq}, found {seq}")
+    if prefix[-65:-1].decode('ascii', 'replace') != expected_prev:
+        raise AuditLogError(f"Chain broken at seq {seq}: prev does not match entry {seq - 1}")
+    if hashlib.sha256(prefix).hexdigest() != digest:
+        raise AuditLogError(f"Hash mismatch at seq {seq}: entry was modified")
+    return digest
+
+
+def verify(path):
+    """
+    Re-check a log's whole chain; returns (entries, last hash, bytes verified)
+
+    Bytes after the last newline are a write that never completed and are
+    reported as `bytes verified` < file size rather than as an error.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0, GENESIS, 0
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log:
+        seq, prev, offset = 0, GENESIS, 0
+        while True:
+            end = log.find(b'\n', offset)
+            if end < 0:
+                break
+            seq += 1
+            prev = _check_line(log[offset:end + 1], seq, prev, offset)
+            offset = end + 1
+    return seq, prev, offset
+
+
+def _tail(path):
+    """(last seq, last hash, end of the last complete line) from the end of an existing log"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        window = 4096
+        while True:
+            start = max(size - window, 0)
+            f.seek(start)
+            data = f.read(size - start)
+            end = data.rfind(b'\n')
+            if end < 0 and start > 0:
+                window *= 2
+                continue
+            if end < 0:
+                return 0, GENESIS, 0
+            line_start = data.rfind(b'\n', 0, end) + 1
+            if line_start == 0 and start > 0:
+                window *= 2
+                continue
+            line = data[line_start:end + 1]
+            try:
+                seq = _line_seq(line)
+            except ValueError:
+                raise AuditLogError(f"{path}: last entry is malformed") from None
+            return seq, _line_hash(line), start + end + 1
+
+
+class AuditLog:
+    """
+    Appends events to a hash-chained log with group-committed fsyncs
+
+    append() returns once the entry is on disk (or immediately with
+    wait=False; flush() then makes everything appended so far durable).
+    Safe to share between threads. With sync=False entries are written but
+    not fsynced, for tests and benchmarks.
+    """
+
+    def __init__(self, path, sync=True):
+        self.path = path
+        self.sync = sync
+        if os.path.exists(path) and os.path.getsize(path):
+            self._seq, self._hash, end = _tail(path)
+            if end < os.path.getsize(path):
+                # A write cut short by a crash was never acknowledged; drop it
+                os.truncate(path, end)
+        else:
+            self._seq, self._hash = 0, GENESIS
+        self._file = open(path, 'ab', buffering=0)
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._pending = []
+        self._durable_seq = self._seq
+        self._flushing = False
+        self._failed = None
+        self.commits = 0
+
+    @property
+    def seq(self):
+        """Sequence number of the last appended entry"""
+        return self._seq
+
+    def append(self, event, wait=True):
+        """Add an event (any JSON-serializable value); returns its sequence number"""
+        event_json = json.dumps(event, separators=(',', ':'), sort_keys=True, default=str)
+        with self._lock:
+            if self._failed:
+                raise AuditLogError(f"{self.path}: an earlier write failed ({self._failed!r}); reopen the log") \
+                    from self._failed
+            seq = self._seq + 1
+            line, self._hash = encode_entry(seq, time.time_ns(), event_json, self._hash)
+            self._seq = seq
+            self._pending.append(line)
+            if wait:
+                self._commit(seq)
+        return seq
+
+    def flush(self):
+        """Make every entry appended so far durable"""
+        with self._lock:
+            self._commit(self._seq)
+
+    def _commit(self, seq):
+        """Called with the lock held; returns once entry `seq` is durable"""
+        while self._durable_seq < seq:
+            if self._failed:
+                raise AuditLogError(f"{self.path}: write failed ({self._failed!r})") from self._failed
+            if self._flushing:
+                self._flushed.wait()
+                continue
+            # Lead this group: take everything pending and write it outside the lock
+            self._flushing = True
+            batch, self._pending = self._pending, []
+            last = self._seq
+            self._lock.release()
+            try:
+                self._write(b''.join(batch))
+                if self.sync:
+                    os.fsync(self._file.fileno())
+            except BaseException as e:
+                # Entries after this batch would chain to hashes that never
+                # reached the file, so the log refuses further appends and
+                # the callers queued behind this group raise too
+                self._failed = e
+                raise
+            finally:
+                self._lock.acquire()
+                self._flushing = False
+                self._flushed.notify_all()
+            self._durable_seq = last
+            self.commits += 1
+
+    def _write(self, data):
+        """Write all of `data`; the unbuffered file may accept only part of it per call"""
+        view = memoryview(data)
+        while view:
+            written = self._file.write(view)
+            if not written:
+                raise OSError(f"{self.path}: write made no progress")
+            view = view[written:]
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            if not self._failed:
+                self.flush()
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def benchmark(path, events, threads, sync=True):
+    """Append `events` from `threads` writers; returns (seconds, fsyncs)"""
+    if os.path.exists(path):
+        os.remove(path)
+    per_thread = events // threads
+
+    with AuditLog(path, sync=sync) as log:
+        def writer(n):
+            for i in range(per_thread):
+                log.append({'tool': 'get_current_time', 'timezone': 'UTC', 'writer': n, 'i': i})
+
+        workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        return elapsed, log.commits
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import tempfile
+
+    parser = argparse.ArgumentParser(description='Verify or benchmark hash-chained audit logs')
+    commands = parser.add_subparsers(dest='command', required=True)
+    verify_command = commands.add_parser('verify', help='re-check every entry of a log')
+    verify_command.add_argument('path')
+    bench_command = commands.add_parser('benchmark', help='measure group-committed append throughput')
+    bench_command.add_argument('--events', type=int, default=100_000)
+    bench_command.add_argument('--threads', type=int, default=16)
+    bench_command.add_argument('--path', default=os.path.join(tempfile.gettempdir(), 'audit_bench.log'))
+    bench_command.add_argument('--no-sync', action='store_true', help='skip fsync')
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        started = time.perf_counter()
+        try:
+            entries, last_hash, verified = verify(args.path)
+        except AuditLogError as e:
+            sys.exit(f"❌ {args.path}: {e}")
+        elapsed = time.perf_counter() - started
+        print(f"✅ {args.path}: {entries:,} entries verified in {elapsed:.2f} s, head {last_hash[:16]}")
+        size = os.path.getsize(args.path)
+        if verified < size:
+            print(f"⚠️  {size - verified} trailing bytes from an incomplete write")
+    else:
+        elapsed, commits = benchmark(args.path, args.events, args.threads, sync=not args.no_sync)
+        total = args.events // args.threads * args.threads
+        print(f"{total:,} events from {args.threads} threads in {elapsed:.2f} s "
+              f"({total / elapsed:,.0f} events/s, {commits:,} fsyncs, {total / max(commits, 1):.0f} events/fsync)")
+        started = time.perf_counter()
+        entries, _, _ = verify(args.path)
+        elapsed = time.perf_counter() - started
+        print(f"verified {entries:,} entries in {elapsed:.2f} s ({entries / elapsed:,.0f} entries/s)")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Precomputed DST transition index per time zone
+
+A zone's UTC offset and DST flag only change at its transition instants,
+so for a range of years those instants are collected once into a sorted
+array (with the offset and flag that start at each), and any lookup inside
+the range is then a single bisect instead of a tz rule evaluation. Instants
+outside the range fall back to zoneinfo. `--verify` compares the index
+against zoneinfo exhaustively: every quarter hour across the range, and
+every second within an hour either side of each transition. `--test` runs
+that check for every practice zone over the default year range.
+
+Usage:
+    python3 dst_index.py --test
+    python3 dst_index.py --verify [--zones America/New_York ...] [--years 2000 2040]
+    python3 dst_index.py --benchmark [--lookups 1000000]
+"""
+
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone as dt_timezone
+
+EPOCH = datetime(1970, 1, 1)
+SCAN_STEP = 6 * 3600
+# Offsets in the tz database stay within a day of UTC, and transitions are
+# always further apart than this, so a day either side of a wall-clock time
+# reaches the offsets in effect before and after any change near it
+NEIGHBOURHOOD = 86400
+YEARS_BACK = 10
+YEARS_AHEAD = 10
+PRACTICE_ZONES = ['America/Los_Angeles', 'America/Chicago', 'America/New_York', 'UTC']
+
+
+def year_start(year):
+    """UTC epoch second at which `year` begins"""
+    return int((datetime(year, 1, 1) - EPOCH).total_seconds())
+
+
+def zone_state(zone, epoch):
+    """(UTC offset in seconds, is_dst) of `zone` at a UTC epoch second, from zoneinfo"""
+    moment = datetime.fromtimestamp(epoch, zone)
+    return int(moment.utcoffset().total_seconds()), bool(moment.dst())
+
+
+def zone_transitions(zone, start, end, step=SCAN_STEP):
+    """
+    [(UTC epoch second, offset, is_dst)] for the state at `start` and every
+    change in (start, end)
+
+    zoneinfo doesn't expose its transition list, so the zone is sampled
+    every `step` seconds and each change is narrowed to the exact second.
+    """
+    state = zone_state(zone, start)
+    transitions = [(start, *state)]
+    previous = start
+    while previous < end:
+        current = min(previous + step, end)
+        current_state = zone_state(zone, current)
+        if current_state != state:
+            low, high = previous, current  # state changes in (low, high]
+            while high - low > 1:
+                middle = (low + high) // 2
+                if zone_state(zone, middle) == state:
+                    low = middle
+                else:
+                    high = middle
+            state = zone_state(zone, high)
+            transitions.append((high, *state))
+        previous = current
+    return transitions
+
+
+def wall_clock_to_utc(local_seconds, offset_at):
+    """
+    (UTC epoch, ambiguous, nonexistent) for a wall-clock time given as
+    seconds since 1970-01-01 local, with zoneinfo's fold=0 rules: a repeated
+    time is its first occurrence, a skipped one is read with the offset from
+    before the change
+
+    `offset_at` maps UTC epoch seconds to offsets. Only arithmetic and
+    bitwise operators are used, so `local_seconds` can be an int or a numpy
+    array of them (with an `offset_at` that takes arrays).
+    """
+    before = offset_at(local_seconds - NEIGHBOURHOOD)
+    after = offset_at(local_seconds + NEIGHBOURHOOD)
+    first, second = local_seconds - before, local_seconds - after
+    first_valid = offset_at(first) == before
+    second_valid = (offset_at(second) == after) & (second != first)
+    # The second reading only wins when it is the only valid one
+    epoch = first + (second - first) * (second_valid & (first_valid ^ True))
+    return epoch, first_valid & second_valid, (first_valid | second_valid) ^ True
+
+
+class DSTTransitionIndex:
+    """
+    Sorted transition instants of one zone over [first_year, last_year]
+
+    `zone` is a ZoneInfo (or any tzinfo). Years are UTC calendar years.
+    """
+
+    def __init__(self, zone, first_year=None, last_year=None):
+        this_year = datetime.now(dt_timezone.utc).year
+        self.zone = zone
+        self.first_year = this_year - YEARS_BACK if first_year is None else first_year
+        self.last_year = this_year + YEARS_AHEAD if last_year is None else last_year
+        self.start = year_start(self.first_year)
+        self.end = year_start(self.last_year + 1)
+        transitions = zone_transitions(zone, self.start, self.end)
+        self.instants = array('q', (t[0] for t in transitions))
+        self.offsets = array('l', (t[1] for t in transitions))
+        self.dst = array('b', (t[2] for t in transitions))
+
+    def __len__(self):
+        """Number of transitions inside the range"""
+        return len(self.instants) - 1
+
+    def lookup(self, epoch):
+        """(UTC offset in seconds, is_dst) at a UTC epoch second"""
+        if not self.start <= epoch < self.end:
+            return zone_state(self.zone, int(epoch // 1))
+        i = bisect_right(self.instants, epoch) - 1
+        return self.offsets[i], bool(self.dst[i])
+
+    def utcoffset(self, epoch):
+        return self.lookup(epoch)[0]
+
+    def is_dst(self, epoch):
+        return self.lookup(epoch)[1]
+
+    def local_to_utc(self, local_seconds):
+        """(UTC epoch, ambiguous, nonexistent) for one wall-clock time; see wall_clock_to_utc"""
+        epoch, ambiguous, nonexistent = wall_clock_to_utc(local_seconds, self.utcoffset)
+        return epoch, bool(ambiguous), bool(nonexistent)
+
+
+def verify(zone, first_year, last_year, step=900, window=3600):
+    """Instants where the index and zoneinfo disagree (empty when the index is exact)"""
+    index = DSTTransitionIndex(zone, first_year, last_year)
+    mismatches = []
+
+    def check(epoch):
+        if index.lookup(epoch) != zone_state(zone, epoch):
+            mismatches.append(epoch)
+
+    for epoch in range(index.start, index.end, step):
+        check(epoch)
+    for instant in index.instants[1:]:
+        for epoch in range(max(instant - window, index.start), min(instant + window, index.end)):
+            check(epoch)
+    return index, mismatches
+
+
+def self_test():
+    """verify() every practice zone over the default year range; True when all match zoneinfo"""
+    from zoneinfo import ZoneInfo
+
+    passed = True
+    for name in PRACTICE_ZONES:
+        index, mismatches = verify(ZoneInfo(name), None, None)
+        if mismatches:
+            print(f"❌ {name} {index.first_year}-{index.last_year}: {len(mismatches)} mismatches, "
+                  f"first at {mismatches[0]}")
+            passed = False
+        else:
+            print(f"✅ {name} {index.first_year}-{index.last_year}: {len(index)} transitions match zoneinfo")
+    return passed
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import sys
+    import time
+    from zoneinfo import ZoneInfo
+
+    parser = argparse.ArgumentParser(description='Build and check precomputed DST transition indexes')
+    parser.add_argument('--zones', nargs='+', default=PRACTICE_ZONES + ['Europe/Dublin', 'Australia/Lord_Howe',
+                                                                         'Asia/Kathmandu', 'America/St_Johns'])
+    parser.add_argument('--years', type=int, nargs=2, metavar=('FIRST', 'LAST'))
+    parser.add_argument('--test', action='store_true', help='verify every practice zone over the default years')
+    parser.add_argument('--verify', action='store_true', help='compare every lookup against zoneinfo')
+    parser.add_argument('--benchmark', action='store_true', help='time lookups against zoneinfo')
+    parser.add_argument('--lookups', type=int, default=1_000_000)
+    args = parser.parse_args()
+    if args.test:
+        sys.exit(0 if self_test() else 1)
+    first_year, last_year = args.years or (None, None)
+
+    failed = False
+    for name in args.zones:
+        zone = ZoneInfo(name)
+        if args.verify:
+            started = time.perf_counter()
+            index, mismatches = verify(zone, first_year, last_year)
+            elapsed = time.perf_counter() - started
+            status = '✅' if not mismatches else f"❌ {len(mismatches)} mismatches, first at {mismatches[0]}"
+            print(f"{name:24} {index.first_year}-{index.last_year}: {len(index):3} transitions, "
+                  f"checked in {elapsed:.1f} s {status}")
+            failed = failed or bool(mismatches)
+        else:
+            index = DSTTransitionIndex(zone, first_year, last_year)
+            print(f"{name:24} {index.first_year}-{index.last_year}: {len(index):3} transitions")
+
+        if args.benchmark:
+            rng = random.Random(7)
+            epochs = [rng.randrange(index.start, index.end) for _ in range(args.lookups)]
+            started = time.perf_counter()
+            for epoch in epochs:
+                index.lookup(epoch)
+            index_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            for epoch in epochs:
+                zone_state(zone, epoch)
+            zoneinfo_seconds = time.perf_counter() - started
+            print(f"  {args.lookups:,} lookups: index {index_seconds / args.lookups * 1e9:.0f} ns, "
+                  f"zoneinfo {zoneinfo_seconds / args.lookups * 1e9:.0f} ns")
+
+    sys.exit(1 if failed else 0)
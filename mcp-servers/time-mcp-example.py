@@ -7,24 +7,48 @@ This example shows:
 1. Getting current time for audit logs
 2. Converting times between patient/provider timezones
 3. Creating HIPAA-compliant timestamps
+
+Responses come from time_engine, which answers the same calls in process
+with cached zone rules instead of a round trip to mcp_server_time. Audit and
+medication timestamps are persisted to a hash-chained audit log when one is
+given (--audit-log PATH).
 """
 
 import json
 import asyncio
+import time
 from datetime import datetime
 
+from audit_log import AuditLog, verify
+from time_batch import convert_wall_times
+from time_engine import call_tool
+
 
 class TimeMCPExample:
     """Example integration showing Time MCP usage patterns for medical platform"""
     
-    def __init__(self):
+    def __init__(self, audit_log=None):
         self.examples = []
+        self.audit_log = audit_log
+    
+    def _run(self, example, audit=False):
+        """Answer the example's MCP call in process, record it, and log it when it is an audit event"""
+        example["response"] = call_tool(example["mcp_call"]["name"], example["mcp_call"]["arguments"])
+        if audit and self.audit_log is not None:
+            example["audit_seq"] = self.audit_log.append({
+                "use_case": example["use_case"],
+                "tool": example["mcp_call"]["name"],
+                "arguments": example["mcp_call"]["arguments"],
+                "response": example["response"]
+            })
+        self.examples.append(example)
+        return example
     
     def create_audit_timestamp(self, timezone="UTC"):
         """
         Example: Create HIPAA-compliant audit timestamp
         
-        In real implementation, this would call Time MCP:
+        Answered by time_engine; the equivalent Time MCP call is:
         {
           "name": "get_current_time",
           "arguments": {"timezone": "UTC"}
@@ -37,21 +61,15 @@ class TimeMCPExample:
                 "name": "get_current_time",
                 "arguments": {"timezone": timezone}
             },
-            "expected_response": {
-                "timezone": timezone,
-                "datetime": "2025-06-07T15:30:45+00:00",
-                "is_dst": False
-            },
             "medical_use": "Patient record access audit trail"
         }
-        self.examples.append(example)
-        return example
+        return self._run(example, audit=True)
     
     def convert_appointment_time(self, patient_tz, provider_tz, appointment_time):
         """
         Example: Convert appointment times between patient and provider timezones
         
-        In real implementation, this would call Time MCP:
+        Answered by time_engine; the equivalent Time MCP call is:
         {
           "name": "convert_time",
           "arguments": {
@@ -72,21 +90,42 @@ class TimeMCPExample:
                     "target_timezone": provider_tz
                 }
             },
-            "expected_response": {
-                "source": {
-                    "timezone": patient_tz,
-                    "datetime": "2025-06-07T14:30:00-08:00",
-                    "is_dst": True
-                },
-                "target": {
-                    "timezone": provider_tz,
-                    "datetime": "2025-06-07T17:30:00-05:00",
-                    "is_dst": True
-                },
-                "time_difference": "+3.0h"
-            },
             "medical_use": "Ensure patients and providers have correct appointment times"
         }
+        return self._run(example)
+    
+    def convert_appointment_schedule(self, appointment_times, patient_tzs, provider_tzs):
+        """
+        Example: Convert a whole exported schedule in one batch
+        
+        appointment_times are patient wall-clock times (naive datetimes or
+        "2025-11-02T01:30" strings); the time zones are one name for every
+        slot or one per slot. Slots in a repeated or skipped hour are
+        reported instead of failing the batch.
+        """
+        batch = convert_wall_times(appointment_times, patient_tzs, provider_tzs)
+        responses = list(batch.responses())
+        appointment_times = [str(t) for t in appointment_times]
+        example = {
+            "use_case": "Bulk Appointment Schedule Conversion",
+            "description": "Convert exported schedules between patient and provider timezones in one pass",
+            "mcp_call": {
+                "name": "convert_time",
+                "arguments": {
+                    "source_timezone": patient_tzs if isinstance(patient_tzs, str) else "per slot",
+                    "time": f"{len(batch)} slots",
+                    "target_timezone": provider_tzs if isinstance(provider_tzs, str) else "per slot"
+                }
+            },
+            "response": {
+                "slots": len(batch),
+                "conversions": responses[:3],
+                "ambiguous": [appointment_times[i] for i in batch.ambiguous],
+                "nonexistent": [appointment_times[i] for i in batch.nonexistent]
+            },
+            "medical_use": "Schedule exports convert thousands of slots without a call per slot",
+            "batch": batch
+        }
         self.examples.append(example)
         return example
     
@@ -101,15 +140,9 @@ class TimeMCPExample:
                 "name": "get_current_time",
                 "arguments": {"timezone": timezone}
             },
-            "expected_response": {
-                "timezone": timezone,
-                "datetime": "2025-06-07T09:15:30-05:00",
-                "is_dst": True
-            },
             "medical_use": "Critical for medication timing compliance and safety protocols"
         }
-        self.examples.append(example)
-        return example
+        return self._run(example, audit=True)
     
     def generate_integration_patterns(self):
         """Generate all HIPAA-compliant integration patterns"""
@@ -124,6 +157,13 @@ class TimeMCPExample:
             "14:30"                 # 2:30 PM patient time
         )
         
+        # Schedule export across a fall-back night (01:00-01:59 happens twice)
+        self.convert_appointment_schedule(
+            [f"2025-11-02T{hour:02d}:{minute:02d}" for hour in range(4) for minute in (0, 30)],
+            "America/Chicago",
+            "America/Los_Angeles"
+        )
+        
         # Medication timing
         self.medication_administration_log("America/New_York")
         
@@ -159,7 +199,25 @@ class TimeMCPExample:
             print(f"   Purpose: {pattern['description']}")
             print(f"   Medical Use: {pattern['medical_use']}")
             print(f"   MCP Call: {json.dumps(pattern['mcp_call'], indent=6)}")
-            print(f"   Response: {json.dumps(pattern['expected_response'], indent=6)}")
+            print(f"   Response: {json.dumps(pattern['response'], indent=6)}")
+            if "audit_seq" in pattern:
+                print(f"   Audit Log: entry #{pattern['audit_seq']} in {self.audit_log.path}")
+            print()
+        
+        # Cost of answering a call in process (zones are cached after first use)
+        calls = 10000
+        started = time.perf_counter()
+        for _ in range(calls):
+            call_tool("convert_time", {"source_timezone": "America/Los_Angeles", "time": "14:30",
+                                       "target_timezone": "America/New_York"})
+        elapsed = time.perf_counter() - started
+        print(f"⚡ In-process convert_time: {elapsed / calls * 1e6:.1f} µs per call")
+        print()
+        
+        if self.audit_log is not None:
+            self.audit_log.flush()
+            entries, head, _ = verify(self.audit_log.path)
+            print(f"🔒 Audit log: {entries} entries, hash chain verified (head {head[:16]})")
             print()
         
         print("✅ HIPAA Compliance Benefits:")
@@ -173,6 +231,15 @@ class TimeMCPExample:
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time MCP integration patterns")
+    parser.add_argument("--audit-log", help="append audit and medication timestamps to this hash-chained log")
+    args = parser.parse_args()
+
     # Generate and display integration patterns
-    time_integration = TimeMCPExample()
-    time_integration.print_integration_guide()
\ No newline at end of file
+    audit_log = AuditLog(args.audit_log) if args.audit_log else None
+    time_integration = TimeMCPExample(audit_log)
+    time_integration.print_integration_guide()
+    if audit_log is not None:
+        audit_log.close()
\ No newline at end of file
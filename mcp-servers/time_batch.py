@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Batch timezone conversion for appointment schedules
+
+convert_time answers one HH:MM at a time. Scheduling exports convert
+thousands of slots between the practice time zones at once, so this module
+converts whole arrays: each zone's DSTTransitionIndex is built once per
+year the batch uses, and every time in the batch is then resolved
+against its transitions with a sorted search, vectorized with numpy when it
+is installed.
+
+Wall-clock times follow zoneinfo's fold=0 rules: a time repeated when clocks
+fall back resolves to its first occurrence, and a time skipped when they
+spring forward is read with the offset from before the change. Both cases
+are reported per batch rather than raised, so one bad slot doesn't stop an
+export. Times carrying a UTC offset are not wall-clock times and raise
+ValueError.
+
+Usage:
+    python3 time_batch.py [--slots 100000]    # benchmark against per-slot zoneinfo conversion
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+from dst_index import EPOCH, NEIGHBOURHOOD, DSTTransitionIndex, wall_clock_to_utc, year_start, zone_state
+from time_engine import DAY_NAMES, format_difference, get_zone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The time part of an ISO string followed by Z or a +/- UTC offset
+_OFFSET_SUFFIX = re.compile(r'[T ][\d:.,]*[Zz+-]')
+
+
+# Years with precomputed tables; slots outside them (a typo'd year 2400 or
+# 9999) are resolved one at a time with zoneinfo
+TABLE_YEARS = (1900, 2100)
+# (zone, year) indexes kept between batches; each takes ~2.5 ms to build
+TABLE_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def transition_index(timezone_name, year):
+    """DSTTransitionIndex for one zone over one UTC calendar year"""
+    return DSTTransitionIndex(get_zone(timezone_name), year, year)
+
+
+class ZoneTable:
+    """
+    A zone's transitions over just the years a batch uses, looked up for
+    whole arrays at once
+
+    The table joins one cached DSTTransitionIndex per year, so a batch with
+    slots in 2025 and 2031 builds two years, not seven. Epochs in years
+    outside the table fall back to zoneinfo.
+    """
+
+    def __init__(self, timezone_name, years):
+        self.timezone = timezone_name
+        self.zone = get_zone(timezone_name)
+        self.years = sorted(year for year in set(years) if TABLE_YEARS[0] <= year <= TABLE_YEARS[1])
+        self.year_starts = array('q', (year_start(year) for year in self.years))
+        self.year_ends = array('q', (year_start(year + 1) for year in self.years))
+        self.instants, self.offsets, self.dst = array('q'), array('l'), array('b')
+        for year in self.years:
+            index = transition_index(timezone_name, year)
+            self.instants.extend(index.instants)
+            self.offsets.extend(index.offsets)
+            self.dst.extend(index.dst)
+        if np is not None:
+            self.np_year_starts = np.array(self.year_starts, dtype=np.int64)
+            self.np_year_ends = np.array(self.year_ends, dtype=np.int64)
+            self.starts = np.array(self.instants, dtype=np.int64)
+            self.np_offsets = np.array(self.offsets, dtype=np.int64)
+            self.np_dst = np.array(self.dst, dtype=bool)
+
+    def _covered(self, epochs):
+        """Mask of the epochs (numpy array) inside one of the table's years"""
+        if not self.years:
+            return np.zeros(len(epochs), dtype=bool)
+        year = np.searchsorted(self.np_year_starts, epochs, side='right') - 1
+        return (year >= 0) & (epochs < self.np_year_ends[np.maximum(year, 0)])
+
+    def _lookup(self, epoch):
+        """(offset, is_dst) at one UTC epoch second"""
+        year = bisect_right(self.year_starts, epoch) - 1
+        if year < 0 or epoch >= self.year_ends[year]:
+            return zone_state(self.zone, int(epoch))
+        i = bisect_right(self.instants, epoch) - 1
+        return self.offsets[i], bool(self.dst[i])
+
+    def _column(self, epochs, values, field):
+        """Table `values` at each epoch, with zoneinfo for epochs outside the table's years"""
+        covered = self._covered(epochs)
+        rows = np.maximum(np.searchsorted(self.starts, epochs, side='right') - 1, 0)
+        result = values[rows] if len(values) else np.zeros(len(epochs), dtype=values.dtype)
+        for position in np.flatnonzero(~covered).tolist():
+            result[position] = zone_state(self.zone, int(epochs[position]))[field]
+        return result
+
+    def offset_at(self, epochs):
+        if np is not None:
+            return self._column(np.asarray(epochs, dtype=np.int64), self.np_offsets, 0)
+        return [self._lookup(epoch)[0] for epoch in epochs]
+
+    def dst_at(self, epochs):
+        if np is not None:
+            return self._column(np.asarray(epochs, dtype=np.int64), self.np_dst, 1)
+        return [self._lookup(epoch)[1] for epoch in epochs]
+
+    def local_to_utc(self, local_seconds):
+        """
+        UTC epochs for wall-clock times given as seconds since 1970-01-01
+        local, plus masks of which were ambiguous and which nonexistent
+        """
+        if np is not None:
+            return wall_clock_to_utc(np.asarray(local_seconds, dtype=np.int64), self.offset_at)
+        resolved = [wall_clock_to_utc(seconds, lambda epoch: self._lookup(epoch)[0]) for seconds in local_seconds]
+        utc, ambiguous, nonexistent = zip(*resolved) if resolved else ((), (), ())
+        return list(utc), list(map(bool, ambiguous)), list(map(bool, nonexistent))
+
+
+def _years(epochs):
+    """UTC calendar years a table must cover for these epochs, two days either side"""
+    margin = NEIGHBOURHOOD * 2
+    if np is not None:
+        edges = np.concatenate([epochs - margin, epochs + margin]).astype('datetime64[s]')
+        return set((np.unique(edges.astype('datetime64[Y]')).astype(np.int64) + 1970).tolist())
+    return {datetime.fromtimestamp(epoch + delta, dt_timezone.utc).year
+            for epoch in epochs for delta in (-margin, margin)}
+
+
+def _broadcast(values, count):
+    """A zone name repeated for every slot, or the per-slot list as given"""
+    if isinstance(values, str):
+        return [values] * count
+    values = list(values)
+    if len(values) != count:
+        raise ValueError(f"Expected {count} time zones, got {len(values)}")
+    return values
+
+
+def _format_offset(offset):
+    sign = '+' if offset >= 0 else '-'
+    hours, minutes = divmod(abs(int(offset)) // 60, 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def _iso(epochs, offsets):
+    """ISO 8601 local times with offsets, like datetime.isoformat(timespec='seconds')"""
+    if np is not None:
+        local = (epochs + offsets).astype('datetime64[s]')
+        text = np.datetime_as_string(local, unit='s')
+        suffixes = {offset: _format_offset(offset) for offset in np.unique(offsets).tolist()}
+        return [t + suffixes[o] for t, o in zip(text.tolist(), offsets.tolist())]
+    return [(EPOCH + timedelta(seconds=e + o)).isoformat() + _format_offset(o) for e, o in zip(epochs, offsets)]
+
+
+def _day_names(epochs, offsets):
+    """Local weekday names; 1970-01-01 was a Thursday"""
+    if np is not None:
+        days = ((epochs + offsets) // 86400 + 3) % 7
+        return [DAY_NAMES[d] for d in days.tolist()]
+    return [DAY_NAMES[((e + o) // 86400 + 3) % 7] for e, o in zip(epochs, offsets)]
+
+
+class BatchConversion:
+    """
+    A converted batch: UTC epochs with each side's offset and DST flag
+
+    `ambiguous` and `nonexistent` list the positions of wall-clock inputs
+    that fell in a repeated or skipped hour (always empty for epoch inputs).
+    """
+
+    def __init__(self, source_zones, target_zones):
+        self.source_zones = source_zones
+        self.target_zones = target_zones
+        count = len(source_zones)
+        if np is not None:
+            self.epochs = np.zeros(count, dtype=np.int64)
+            self.source_offsets = np.zeros(count, dtype=np.int64)
+            self.target_offsets = np.zeros(count, dtype=np.int64)
+            self.source_dst = np.zeros(count, dtype=bool)
+            self.target_dst = np.zeros(count, dtype=bool)
+        else:
+            self.epochs, self.source_offsets, self.target_offsets = [0] * count, [0] * count, [0] * count
+            self.source_dst, self.target_dst = [False] * count, [False] * count
+        self.ambiguous = []
+        self.nonexistent = []
+
+    def __len__(self):
+        return len(self.source_zones)
+
+    def _store(self, positions, **columns):
+        for name, values in columns.items():
+            column = getattr(self, name)
+            if np is not None:
+                column[positions] = values
+            else:
+                for position, value in zip(positions, values):
+                    column[position] = value
+
+    def source_datetimes(self):
+        return _iso(self.epochs, self.source_offsets)
+
+    def target_datetimes(self):
+        return _iso(self.epochs, self.target_offsets)
+
+    def source_days(self):
+        return _day_names(self.epochs, self.source_offsets)
+
+    def target_days(self):
+        return _day_names(self.epochs, self.target_offsets)
+
+    def time_differences(self):
+        """Target minus source offset per slot, in convert_time's "+3.0h" format"""
+        if np is not None:
+            differences = (self.target_offsets - self.source_offsets).tolist()
+        else:
+            differences = [t - s for s, t in zip(self.source_offsets, self.target_offsets)]
+        labels = {d: format_difference(d / 3600) for d in set(differences)}
+        return [labels[d] for d in differences]
+
+    def responses(self):
+        """convert_time-shaped response dicts, one per slot"""
+        sources, targets = self.source_datetimes(), self.target_datetimes()
+        source_days, target_days = self.source_days(), self.target_days()
+        source_dst, target_dst = [list(map(bool, flags)) for flags in (self.source_dst, self.target_dst)]
+        for i, difference in enumerate(self.time_differences()):
+            yield {
+                "source": {"timezone": self.source_zones[i], "datetime": sources[i],
+                           "day_of_week": source_days[i], "is_dst": source_dst[i]},
+                "target": {"timezone": self.target_zones[i], "datetime": targets[i],
+                           "day_of_week": target_days[i], "is_dst": target_dst[i]},
+                "time_difference": difference,
+            }
+
+
+def _groups(source_zones, target_zones):
+    """Positions of the slots sharing each (source, target) zone pair"""
+    groups = {}
+    for i, pair in enumerate(zip(source_zones, target_zones)):
+        groups.setdefault(pair, []).append(i)
+    return groups
+
+
+def _select(values, positions):
+    if np is not None:
+        return values[np.asarray(positions)]
+    return [values[i] for i in positions]
+
+
+def _convert(seconds, source_zones, target_zones, wall_clock):
+    count = len(seconds)
+    source_zones = _broadcast(source_zones, count)
+    target_zones = _broadcast(target_zones, count)
+    batch = BatchConversion(source_zones, target_zones)
+    if not count:
+        return batch
+
+    years = _years(seconds)
+    tables = {}
+
+    def table(name):
+        if name not in tables:
+            tables[name] = ZoneTable(name, years)
+        return tables[name]
+
+    for (source, target), positions in _groups(source_zones, target_zones).items():
+        group = _select(seconds, positions)
+        if wall_clock:
+            epochs, ambiguous, nonexistent = table(source).local_to_utc(group)
+            batch.ambiguous.extend(p for p, flag in zip(positions, ambiguous) if flag)
+            batch.nonexistent.extend(p for p, flag in zip(positions, nonexistent) if flag)
+        else:
+            epochs = group
+        batch._store(positions, epochs=epochs,
+                     source_offsets=table(source).offset_at(epochs), source_dst=table(source).dst_at(epochs),
+                     target_offsets=table(target).offset_at(epochs), target_dst=table(target).dst_at(epochs))
+    batch.ambiguous.sort()
+    batch.nonexistent.sort()
+    return batch
+
+
+def convert_epochs(epochs, source_zones, target_zones):
+    """
+    Convert UTC epoch seconds, seen from each slot's source zone, to its
+    target zone. Zones are one name for every slot or a name per slot.
+    """
+    if np is not None:
+        epochs = np.asarray(epochs, dtype=np.int64)
+    else:
+        epochs = [int(e) for e in epochs]
+    return _convert(epochs, source_zones, target_zones, wall_clock=False)
+
+
+def _naive(wall_time):
+    moment = wall_time if isinstance(wall_time, datetime) else datetime.fromisoformat(wall_time)
+    if moment.tzinfo is not None:
+        raise ValueError(f"Wall-clock time {wall_time!s} has a UTC offset; pass times without one")
+    return moment
+
+
+def local_seconds(wall_times):
+    """Seconds since 1970-01-01 on the wall clock for naive datetimes or ISO strings"""
+    wall_times = list(wall_times)
+    if np is not None and wall_times and all(isinstance(t, str) for t in wall_times):
+        # numpy would quietly convert "...-05:00" or "...Z" to UTC; one scan
+        # of the joined strings finds any offset after the date
+        joined = '\n'.join(wall_times)
+        offset = _OFFSET_SUFFIX.search(joined)
+        if offset:
+            line = joined.count('\n', 0, offset.start())
+            raise ValueError(f"Wall-clock time {wall_times[line]} has a UTC offset; pass times without one")
+        return np.array(wall_times, dtype='datetime64[s]').astype(np.int64)
+    seconds = [int((_naive(t) - EPOCH).total_seconds()) for t in wall_times]
+    return np.array(seconds, dtype=np.int64) if np is not None else seconds
+
+
+def convert_wall_times(wall_times, source_zones, target_zones):
+    """
+    Convert wall-clock times (naive datetimes or "YYYY-MM-DDTHH:MM[:SS]"
+    strings) read in each slot's source zone to its target zone
+    """
+    return _convert(local_seconds(wall_times), source_zones, target_zones, wall_clock=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    from time_engine import convert_time
+
+    parser = argparse.ArgumentParser(description='Benchmark batch conversion against per-slot zoneinfo')
+    parser.add_argument('--slots', type=int, default=100_000)
+    args = parser.parse_args()
+
+    zones = ['America/Los_Angeles', 'America/Chicago', 'America/New_York']
+    rng = random.Random(7)
+    start = datetime(2025, 1, 1)
+    slots = [(start + timedelta(minutes=15 * rng.randrange(2 * 365 * 96))).isoformat() for _ in range(args.slots)]
+    sources = [rng.choice(zones) for _ in slots]
+    targets = [rng.choice(zones) for _ in slots]
+
+    started = time.perf_counter()
+    batch = convert_wall_times(slots, sources, targets)
+    responses = list(batch.responses())
+    batch_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    mismatches = 0
+    for slot, source, target, response in zip(slots, sources, targets, responses):
+        day = datetime.fromisoformat(slot)
+        try:
+            expected = convert_time(source, day.strftime('%H:%M'), target, on_date=day.date())
+        except ValueError:
+            continue  # skipped hour; the batch reports these instead of raising
+        mismatches += expected != response
+    single_seconds = time.perf_counter() - started
+
+    print(f"{args.slots:,} slots ({'numpy' if np is not None else 'pure Python'}): "
+          f"batch {batch_seconds:.3f} s, one at a time {single_seconds:.3f} s "
+          f"({single_seconds / batch_seconds:.1f}x), {mismatches} mismatches")
+    print(f"ambiguous: {len(batch.ambiguous)}, nonexistent: {len(batch.nonexistent)}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+In-process time engine for the Time MCP integration
+
+Answers the two Time MCP tools, get_current_time and convert_time, with the
+same response shapes as `python3 -m mcp_server_time`, but from zoneinfo in
+this process instead of a round trip to the server. Zones are loaded once
+and cached, and offsets and DST flags come from each zone's precomputed
+transition index (dst_index.py), so a conversion costs microseconds.
+
+Usage:
+    python3 time_engine.py get_current_time America/New_York
+    python3 time_engine.py convert_time America/Los_Angeles 14:30 America/New_York
+"""
+
+import json
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+
+from dst_index import EPOCH, DSTTransitionIndex
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+class TimeEngineError(ValueError):
+    """Invalid timezone or time, with the same message mcp_server_time gives"""
+
+
+@lru_cache(maxsize=None)
+def known_timezones():
+    """Every IANA key in this host's tz database, read once"""
+    return frozenset(available_timezones()) | {"UTC"}
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """
+    Cached ZoneInfo for an exact IANA key
+
+    Keys are checked against the tz database's own list so that case
+    variants ("america/new_york") are rejected on every filesystem, like
+    mcp_server_time does.
+    """
+    try:
+        zone = ZoneInfo(name)
+        if name not in known_timezones():
+            raise ZoneInfoNotFoundError(f"No time zone found with key {name}")
+    except (ZoneInfoNotFoundError, ValueError, TypeError, OSError) as e:
+        raise TimeEngineError(f"Invalid timezone: {e}") from None
+    return zone
+
+
+@lru_cache(maxsize=None)
+def zone_index(name):
+    """Cached DSTTransitionIndex for a zone over the default range of years"""
+    return DSTTransitionIndex(get_zone(name))
+
+
+@lru_cache(maxsize=None)
+def fixed_offset(seconds):
+    return dt_timezone(timedelta(seconds=seconds))
+
+
+def parse_hhmm(time_str):
+    """(hour, minute) from a 24-hour "HH:MM" string"""
+    try:
+        parsed = datetime.strptime(time_str, "%H:%M")
+    except (TypeError, ValueError):
+        raise TimeEngineError("Invalid time format. Expected HH:MM [24-hour format]") from None
+    return parsed.hour, parsed.minute
+
+
+def format_difference(hours):
+    """"+3.0h", "-1.0h", "+5.75h" as mcp_server_time writes time_difference"""
+    if hours.is_integer():
+        return f"{hours:+.1f}h"
+    return f"{hours:+.2f}".rstrip("0").rstrip(".") + "h"
+
+
+def time_result(timezone_name, epoch, offset, is_dst):
+    """The {timezone, datetime, day_of_week, is_dst} block of a Time MCP response"""
+    moment = datetime.fromtimestamp(epoch, fixed_offset(offset))
+    return {
+        "timezone": timezone_name,
+        "datetime": moment.isoformat(timespec="seconds"),
+        "day_of_week": DAY_NAMES[moment.weekday()],
+        "is_dst": is_dst,
+    }
+
+
+def get_current_time(timezone_name, now=None):
+    """
+    Time MCP get_current_time
+
+    `now` (an aware datetime) replaces the clock, for reproducible examples.
+    """
+    index = zone_index(timezone_name)
+    epoch = now.timestamp() if now is not None else time.time()
+    return time_result(timezone_name, epoch, *index.lookup(epoch))
+
+
+def convert_time(source_timezone, time_str, target_timezone, on_date=None):
+    """
+    Time MCP convert_time: an HH:MM wall-clock time in source_timezone, today
+    (or on `on_date`), as seen in target_timezone
+
+    Times skipped by a clock change (02:30 on a spring-forward day) are
+    rejected; repeated ones resolve to the first occurrence (fold=0).
+    """
+    source_index = zone_index(source_timezone)
+    target_index = zone_index(target_timezone)
+    hour, minute = parse_hhmm(time_str)
+
+    if on_date is None:
+        now = time.time()
+        on_date = (EPOCH + timedelta(seconds=now + source_index.utcoffset(now))).date()
+    local_seconds = (on_date - EPOCH.date()).days * 86400 + hour * 3600 + minute * 60
+
+    epoch, _, nonexistent = source_index.local_to_utc(local_seconds)
+    if nonexistent:
+        raise TimeEngineError(
+            f"Invalid time: {time_str} does not exist in {source_timezone} on "
+            f"{on_date.isoformat()} (skipped by a clock change)"
+        )
+
+    source_offset, source_dst = source_index.lookup(epoch)
+    target_offset, target_dst = target_index.lookup(epoch)
+    hours = (target_offset - source_offset) / 3600
+
+    return {
+        "source": time_result(source_timezone, epoch, source_offset, source_dst),
+        "target": time_result(target_timezone, epoch, target_offset, target_dst),
+        "time_difference": format_difference(hours),
+    }
+
+
+TOOLS = {
+    "get_current_time": lambda arguments: get_current_time(arguments["timezone"]),
+    "convert_time": lambda arguments: convert_time(
+        arguments["source_timezone"], arguments["time"], arguments["target_timezone"]
+    ),
+}
+
+
+def call_tool(name, arguments):
+    """Answer an MCP tool call ({"name": ..., "arguments": {...}}) in process"""
+    if name not in TOOLS:
+        raise TimeEngineError(f"Unknown tool: {name}")
+    try:
+        return TOOLS[name](arguments)
+    except KeyError as e:
+        raise TimeEngineError(f"Missing required argument: {e.args[0]}") from None
+
+
+if __name__ == "__main__":
+    import sys
+
+    try:
+        if len(sys.argv) >= 3 and sys.argv[1] == "get_current_time":
+            result = get_current_time(sys.argv[2])
+        elif len(sys.argv) >= 5 and sys.argv[1] == "convert_time":
+            result = convert_time(sys.argv[2], sys.argv[3], sys.argv[4])
+        else:
+            sys.exit(__doc__.split("Usage:")[1])
+    except TimeEngineError as e:
+        sys.exit(f"Error: {e}")
+    print(json.dumps(result, indent=2))
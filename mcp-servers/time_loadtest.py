@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Load test for the Time MCP call patterns
+
+Replays the calls TimeMCPExample.generate_integration_patterns() makes
+(UTC audit timestamps, LA -> NY appointment conversion, NY medication
+logging, Chicago documentation) as a weighted mix against a local
+time_server.py over TCP. Each of --concurrency connections keeps
+--pipeline requests in flight for --duration seconds, and the run reports
+throughput and p50/p99/p999 latency overall and per call.
+
+Without --connect a server is started on a free port for the run. The
+client is a single asyncio process too, so at high rates compare its CPU
+with the server's before reading the numbers as server limits.
+
+Usage:
+    python3 time_loadtest.py [--concurrency 32] [--pipeline 1] [--duration 10] [--weights 40 30 20 10]
+    python3 time_loadtest.py --connect 127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Share of the mix for each replayed pattern, in generate_integration_patterns order
+DEFAULT_WEIGHTS = [40, 30, 20, 10]
+
+
+def integration_calls():
+    """[(label, mcp_call)] for the single-call patterns of TimeMCPExample"""
+    spec = importlib.util.spec_from_file_location("time_mcp_example", os.path.join(HERE, "time-mcp-example.py"))
+    example = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(example)
+    calls = []
+    for pattern in example.TimeMCPExample().generate_integration_patterns():
+        if "batch" in pattern:
+            continue  # bulk schedule conversion runs in process, not as a tool call
+        call = pattern["mcp_call"]
+        zones = "→".join(v for k, v in call["arguments"].items() if "timezone" in k)
+        calls.append((f"{call['name']} {zones}", call))
+    return calls
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(len(sorted_values) * fraction + 0.999999) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Stats:
+    def __init__(self, labels):
+        self.latencies = {label: [] for label in labels}
+        self.errors = 0
+
+    def merged(self):
+        return sorted(value for values in self.latencies.values() for value in values)
+
+
+async def client(host, port, requests, weights, pipeline, deadline, stats, seed):
+    """One connection: keep `pipeline` requests in flight until the deadline"""
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    rng = random.Random(seed)
+    in_flight = {}
+    slots = asyncio.Semaphore(pipeline)
+    next_id = 0
+
+    async def receive():
+        while in_flight or time.perf_counter() < deadline:
+            line = await reader.readline()
+            if not line:
+                return
+            reply = json.loads(line)
+            label, sent = in_flight.pop(reply.get("id"), (None, None))
+            if label is None:
+                continue
+            if "error" in reply or reply["result"].get("isError"):
+                stats.errors += 1
+            else:
+                stats.latencies[label].append(time.perf_counter() - sent)
+            slots.release()
+
+    receiver = asyncio.create_task(receive())
+    try:
+        while time.perf_counter() < deadline:
+            await slots.acquire()
+            label, payload = rng.choices(requests, weights)[0]
+            next_id += 1
+            in_flight[next_id] = (label, time.perf_counter())
+            writer.write(payload % next_id)
+            await writer.drain()
+        await asyncio.wait_for(receiver, timeout=5)
+    except asyncio.TimeoutError:
+        stats.errors += len(in_flight)
+    finally:
+        receiver.cancel()
+        writer.close()
+
+
+async def run(host, port, calls, weights, concurrency, pipeline, duration):
+    # Requests are pre-serialized with a %d placeholder for the id
+    requests = []
+    for label, call in calls:
+        body = json.dumps({"jsonrpc": "2.0", "id": 0, "method": "tools/call", "params": call})
+        requests.append((label, body.replace('"id": 0', '"id": %d', 1).encode("utf-8") + b"\n"))
+    stats = Stats([label for label, _ in calls])
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(client(host, port, requests, weights, pipeline, deadline, stats, seed)
+                           for seed in range(concurrency)))
+    return stats, time.perf_counter() - started
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    """time_server.py on `port`, once it accepts connections"""
+    server = subprocess.Popen([sys.executable, os.path.join(HERE, "time_server.py"), "--port", str(port)],
+                              stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    sys.exit("❌ time_server.py did not start")
+
+
+def report(stats, elapsed, concurrency, pipeline):
+    merged = stats.merged()
+    print(f"\n📊 {len(merged):,} calls in {elapsed:.1f} s with {concurrency} connections x {pipeline} in flight")
+    print(f"   Throughput: {len(merged) / elapsed:,.0f} calls/s, errors: {stats.errors}")
+    print(f"\n{'call':<52} {'calls':>9} {'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8}")
+    print("-" * 89)
+    rows = [(label, sorted(values)) for label, values in stats.latencies.items()] + [("all", merged)]
+    for label, values in rows:
+        print(f"{label:<52} {len(values):>9,} {percentile(values, 0.50) * 1000:>8.2f} "
+              f"{percentile(values, 0.99) * 1000:>8.2f} {percentile(values, 0.999) * 1000:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Time MCP call patterns against time_server.py")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="existing server (default: start one)")
+    parser.add_argument("--concurrency", type=int, default=32, help="client connections")
+    parser.add_argument("--pipeline", type=int, default=1, help="requests in flight per connection")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--weights", type=float, nargs="+", default=DEFAULT_WEIGHTS,
+                        help="relative frequency of each integration pattern")
+    args = parser.parse_args()
+
+    calls = integration_calls()
+    if len(args.weights) != len(calls):
+        parser.error(f"--weights needs {len(calls)} values, one per pattern: "
+                     + ", ".join(label for label, _ in calls))
+
+    server = None
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        port = int(port)
+    else:
+        host, port = "127.0.0.1", free_port()
+        server = start_server(port)
+
+    print("🏥 Time MCP load test")
+    for (label, _), weight in zip(calls, args.weights):
+        print(f"   {weight / sum(args.weights) * 100:5.1f}%  {label}")
+    try:
+        stats, elapsed = asyncio.run(run(host, port, calls, args.weights, args.concurrency,
+                                         args.pipeline, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    report(stats, elapsed, args.concurrency, args.pipeline)
+
+
+if __name__ == "__main__":
+    main()
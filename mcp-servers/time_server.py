@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Asyncio JSON-RPC time server for the Time MCP calls
+
+Serves get_current_time and convert_time, the calls TimeMCPExample makes,
+over stdio (as an MCP server, a drop-in for `python3 -m mcp_server_time`)
+or TCP, answering from time_engine's in-memory zone cache. Messages are
+newline-delimited JSON-RPC 2.0:
+
+    {"jsonrpc":"2.0","id":1,"method":"tools/call",
+     "params":{"name":"convert_time","arguments":{"source_timezone":"America/Los_Angeles",
+               "time":"14:30","target_timezone":"America/New_York"}}}
+
+MCP's initialize, ping and tools/list are supported, and the tools can also
+be called directly as methods with their arguments as params. Clients may
+pipeline requests (send many before reading) and send JSON-RPC batch
+arrays. Each connection is one task that reads whatever has arrived,
+answers every complete message in it and writes the replies together, so
+many concurrent clients are served without a thread per request.
+
+Usage:
+    python3 time_server.py [--local-timezone America/New_York]    # MCP over stdio
+    python3 time_server.py --port 8765 [--host 127.0.0.1]          # TCP
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from dst_index import PRACTICE_ZONES
+from time_engine import TimeEngineError, call_tool, get_zone, zone_index
+
+SERVER_NAME = "ganger-time"
+SERVER_VERSION = "1.0.0"
+PROTOCOL_VERSION = "2025-06-18"
+READ_SIZE = 256 * 1024
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+def tool_definitions(local_timezone):
+    """tools/list entries, with the same schemas as mcp_server_time"""
+    read_only = {"readOnlyHint": True, "destructiveHint": False, "idempotentHint": True, "openWorldHint": False}
+    return [
+        {
+            "name": "get_current_time",
+            "description": "Get current time in a specific timezone",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "timezone": {
+                        "type": "string",
+                        "description": f"IANA timezone name (e.g., 'America/New_York', 'Europe/London'). "
+                                       f"Use '{local_timezone}' as local timezone if no timezone provided by the user.",
+                    }
+                },
+                "required": ["timezone"],
+            },
+            "annotations": read_only,
+        },
+        {
+            "name": "convert_time",
+            "description": "Convert time between timezones",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "source_timezone": {
+                        "type": "string",
+                        "description": f"Source IANA timezone name (e.g., 'America/New_York', 'Europe/London'). "
+                                       f"Use '{local_timezone}' as local timezone if no source timezone provided by the user.",
+                    },
+                    "time": {
+                        "type": "string",
+                        "description": "Time to convert in 24-hour format (HH:MM)",
+                    },
+                    "target_timezone": {
+                        "type": "string",
+                        "description": f"Target IANA timezone name (e.g., 'Asia/Tokyo', 'America/San_Francisco'). "
+                                       f"Use '{local_timezone}' as local timezone if no target timezone provided by the user.",
+                    },
+                },
+                "required": ["source_timezone", "time", "target_timezone"],
+            },
+            "annotations": read_only,
+        },
+    ]
+
+
+class RPCError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class TimeRPC:
+    """Transport-independent JSON-RPC dispatcher; one instance serves every connection"""
+
+    def __init__(self, local_timezone="UTC", warm_zones=PRACTICE_ZONES):
+        get_zone(local_timezone)
+        self.local_timezone = local_timezone
+        self.tools = tool_definitions(local_timezone)
+        # Build the practice zones' transition indexes before the first request
+        for name in warm_zones:
+            zone_index(name)
+        self.requests = 0
+        self.methods = {
+            "initialize": self.initialize,
+            "ping": lambda params: {},
+            "tools/list": lambda params: {"tools": self.tools},
+            "tools/call": self.tools_call,
+            "get_current_time": lambda params: self.call("get_current_time", params),
+            "convert_time": lambda params: self.call("convert_time", params),
+        }
+
+    def initialize(self, params):
+        requested = params.get("protocolVersion") if isinstance(params, dict) else None
+        return {
+            "protocolVersion": requested or PROTOCOL_VERSION,
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": {"name": SERVER_NAME, "version": SERVER_VERSION},
+        }
+
+    def call(self, name, arguments):
+        """A tool called directly as a method: errors are JSON-RPC errors"""
+        if not isinstance(arguments, dict):
+            raise RPCError(INVALID_PARAMS, "params must be an object of tool arguments")
+        try:
+            return call_tool(name, arguments)
+        except TimeEngineError as e:
+            raise RPCError(INVALID_PARAMS, str(e)) from None
+
+    def tools_call(self, params):
+        """MCP tools/call: tool errors are results with isError set, like the MCP SDK reports them"""
+        if not isinstance(params, dict) or not isinstance(params.get("name"), str):
+            raise RPCError(INVALID_PARAMS, "tools/call needs a tool name")
+        arguments = params.get("arguments") or {}
+        if not isinstance(arguments, dict):
+            raise RPCError(INVALID_PARAMS, "arguments must be an object")
+        try:
+            result = call_tool(params["name"], arguments)
+        except TimeEngineError as e:
+            return {"content": [{"type": "text", "text": f"Error processing mcp-server-time query: {e}"}],
+                    "isError": True}
+        return {"content": [{"type": "text", "text": json.dumps(result, indent=2)}], "isError": False}
+
+    def handle(self, message):
+        """Response dict for one request, or None for a notification"""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" \
+                or not isinstance(message.get("method"), str):
+            return {"jsonrpc": "2.0", "id": message.get("id") if isinstance(message, dict) else None,
+                    "error": {"code": INVALID_REQUEST, "message": "Invalid Request"}}
+        is_notification = "id" not in message
+        self.requests += 1
+        method = self.methods.get(message["method"])
+        try:
+            if method is None:
+                if is_notification:
+                    return None  # notifications/initialized, notifications/cancelled, ...
+                raise RPCError(METHOD_NOT_FOUND, f"Method not found: {message['method']}")
+            result = method(message.get("params", {}))
+        except RPCError as e:
+            error = {"code": e.code, "message": e.message}
+        except Exception as e:  # a bug must not take the connection down
+            error = {"code": INTERNAL_ERROR, "message": f"Internal error: {e}"}
+        else:
+            return None if is_notification else {"jsonrpc": "2.0", "id": message["id"], "result": result}
+        return None if is_notification else {"jsonrpc": "2.0", "id": message["id"], "error": error}
+
+    def handle_line(self, line):
+        """Serialized reply to one framed message (a request or a batch array), or None"""
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            reply = {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": "Parse error"}}
+        else:
+            if isinstance(payload, list):
+                if not payload:
+                    reply = {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": "Empty batch"}}
+                else:
+                    reply = [r for r in map(self.handle, payload) if r is not None] or None
+            else:
+                reply = self.handle(payload)
+        if reply is None:
+            return None
+        return json.dumps(reply, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def serve_connection(rpc, reader, writer):
+    """Answer every complete line as it arrives; replies to one read go out in one write"""
+    buffered = b""
+    try:
+        while True:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                break
+            lines = (buffered + data).split(b"\n")
+            buffered = lines.pop()
+            replies = [rpc.handle_line(line) for line in lines if line.strip()]
+            replies = [reply for reply in replies if reply is not None]
+            if replies:
+                writer.write(b"".join(replies))
+                await writer.drain()
+        if buffered.strip():
+            reply = rpc.handle_line(buffered)
+            if reply is not None:
+                writer.write(reply)
+                await writer.drain()
+    except (ConnectionResetError, BrokenPipeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_tcp(rpc, host, port):
+    server = await asyncio.start_server(lambda r, w: serve_connection(rpc, r, w), host, port, limit=READ_SIZE)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"🕒 Time JSON-RPC server listening on {addresses}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+class _FileWriter:
+    """StreamWriter stand-in for a stdout redirected to a regular file"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        self.stream.write(data)
+
+    async def drain(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+def _feed(loop, reader, stream):
+    """Copy a regular file into a StreamReader (run in a thread)"""
+    while True:
+        data = stream.read1(READ_SIZE)
+        if not data:
+            break
+        loop.call_soon_threadsafe(reader.feed_data, data)
+    loop.call_soon_threadsafe(reader.feed_eof)
+
+
+async def serve_stdio(rpc):
+    """MCP stdio transport: requests on stdin, replies on stdout"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=READ_SIZE)
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except ValueError:
+        # Pipe transports need a pipe, socket or terminal; stdin is a regular file
+        loop.run_in_executor(None, _feed, loop, reader, sys.stdin.buffer)
+    try:
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    except ValueError:
+        writer = _FileWriter(sys.stdout.buffer)
+    await serve_connection(rpc, reader, writer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON-RPC server for get_current_time and convert_time")
+    parser.add_argument("--local-timezone", default="UTC", help="zone suggested to clients when none is given")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="serve TCP on this port instead of stdio")
+    args = parser.parse_args()
+
+    try:
+        rpc = TimeRPC(args.local_timezone)
+    except TimeEngineError:
+        sys.exit(f"Error: invalid --local-timezone {args.local_timezone!r}: not a known IANA timezone name")
+    try:
+        if args.port is not None:
+            asyncio.run(serve_tcp(rpc, args.host, args.port))
+        else:
+            asyncio.run(serve_stdio(rpc))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Byte-offset index of the CREATE statements in the SQL schema dumps
+
+complete-all-tables*.sql and complete-schema-final.sql are ~665 KB each,
+and tooling greps them line by line to find one table's DDL. This makes
+one pass over a memory-mapped dump, splitting it into statements the way
+Postgres does (semicolons inside quotes, comments and $$/$tag$ bodies
+don't count), and records the kind, name, byte offset, length, line and a
+whitespace-insensitive hash of every CREATE TABLE, TYPE, FUNCTION, POLICY,
+INDEX, TRIGGER, VIEW, SEQUENCE and EXTENSION.
+
+The index is saved next to the dump as <dump>.idx.json and rebuilt only
+when the dump's size or mtime changes. With it, any object's DDL is one
+dict lookup and one pread, and two dumps can be compared by hash without
+reading either.
+
+Names are matched without quotes, case-insensitively for unquoted
+identifiers, and with the default `public.` schema dropped. Policies,
+indexes and triggers also record the table they are ON.
+
+Usage:
+    python3 schema_index.py build complete-*.sql
+    python3 schema_index.py list complete-all-tables.sql [--kind table]
+    python3 schema_index.py show complete-all-tables.sql table profiles [--all]
+    python3 schema_index.py diff complete-all-tables.sql complete-schema-final.sql
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+from collections import namedtuple
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.idx.json'
+
+_TOKENS = re.compile(rb"""
+      --[^\n]*                              # line comment
+    | /\*.*?\*/                             # block comment
+    | (?<![\w$])[Ee]'(?:[^'\\]|\\.|'')*'    # escape string
+    | '(?:[^']|'')*'                        # string
+    | "(?:[^"]|"")*"                        # quoted identifier
+    | \$(?:[A-Za-z_][A-Za-z0-9_]*)?\$       # dollar quote opener
+    | ;
+""", re.S | re.X)
+_NONSPACE = re.compile(rb'\S')
+_WHITESPACE = re.compile(rb'\s+')
+_IDENTIFIER = rb'(?:"(?:[^"]|"")*"|[\w$]+)'
+_QUALIFIED = _IDENTIFIER + rb'(?:\s*\.\s*' + _IDENTIFIER + rb')*'
+_HEADER = re.compile(
+    rb'CREATE\s+(?:OR\s+REPLACE\s+)?(?:UNIQUE\s+)?(?:TEMP(?:ORARY)?\s+|UNLOGGED\s+)?'
+    rb'(?P<kind>TABLE|TYPE|FUNCTION|PROCEDURE|POLICY|INDEX|TRIGGER|MATERIALIZED\s+VIEW|VIEW|SEQUENCE|EXTENSION)\s+'
+    rb'(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(?P<name>' + _QUALIFIED + rb')?',
+    re.I)
+_ON = re.compile(rb'\bON\s+(?:(?:TABLE|ONLY)\s+)?(?P<on>' + _QUALIFIED + rb')', re.I)
+_ON_KINDS = {'policy', 'index', 'trigger'}
+
+# kind/name/on are normalized; start and length are byte offsets into the
+# dump, line is 1-based and digest covers the statement with whitespace collapsed
+Entry = namedtuple('Entry', 'kind name on signature start length line digest')
+
+
+def normalize_name(raw):
+    """'public."Staff_Tickets"' -> 'Staff_Tickets', 'Public.Profiles' -> 'profiles'"""
+    parts = []
+    for part in re.findall(_IDENTIFIER, raw):
+        parts.append(part[1:-1].replace(b'""', b'"') if part.startswith(b'"') else part.lower())
+    if len(parts) > 1 and parts[0] == b'public':
+        parts = parts[1:]
+    return '.'.join(part.decode('utf-8', 'replace') for part in parts)
+
+
+def statements(buffer):
+    """(start, end) byte offsets of each statement in a buffer, comments before it excluded"""
+    pos, start, size = 0, None, len(buffer)
+    while True:
+        match = _TOKENS.search(buffer, pos)
+        if match is None:
+            if start is None:
+                rest = _NONSPACE.search(buffer, pos)
+                start = rest.start() if rest else None
+            if start is not None:
+                yield start, size
+            return
+        token_start, token_end = match.span()
+        first = buffer[token_start:token_start + 2]
+        if start is None:
+            text = _NONSPACE.search(buffer, pos, token_start)
+            if text:
+                start = text.start()
+            elif first not in (b'--', b'/*'):
+                start = token_start
+        if first[:1] == b'$':
+            # Skip to the matching closing tag (an unterminated body runs to the end)
+            close = buffer.find(match.group(), token_end)
+            token_end = size if close < 0 else close + len(match.group())
+        elif first[:1] == b';':
+            if start is not None:
+                yield start, token_end
+            start = None
+        pos = token_end
+
+
+def _signature(buffer, name_end, end):
+    """Normalized argument list after a function name"""
+    open_paren = buffer.find(b'(', name_end, end)
+    if open_paren < 0:
+        return ''
+    depth, pos = 0, open_paren
+    while pos < end:
+        char = buffer[pos:pos + 1]
+        if char == b'(':
+            depth += 1
+        elif char == b')':
+            depth -= 1
+            if depth == 0:
+                break
+        pos += 1
+    return _WHITESPACE.sub(b' ', buffer[open_paren + 1:pos]).strip().decode('utf-8', 'replace').lower()
+
+
+def scan(path):
+    """Entries for every indexed CREATE statement in a dump, in file order"""
+    entries = []
+    if os.path.getsize(path) == 0:
+        return entries
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        line, counted = 1, 0
+        for start, end in statements(buffer):
+            header = _HEADER.match(buffer, start, end)
+            if header is None:
+                continue
+            kind = _WHITESPACE.sub(b' ', header.group('kind')).decode('ascii').lower()
+            raw_name = header.group('name')
+            unnamed = raw_name is None or raw_name.upper() == b'ON'  # CREATE INDEX ON t (...)
+            name = '' if unnamed else normalize_name(raw_name)
+            on = ''
+            if kind in _ON_KINDS:
+                target = _ON.search(buffer, header.start('name') if unnamed and raw_name else header.end(), end)
+                on = normalize_name(target.group('on')) if target else ''
+            signature = _signature(buffer, header.end(), end) if kind in ('function', 'procedure') else ''
+            statement = buffer[start:end]
+            line += buffer[counted:start].count(b'\n')
+            counted = start
+            digest = hashlib.blake2b(_WHITESPACE.sub(b' ', statement).strip(), digest_size=12).hexdigest()
+            entries.append(Entry(kind, name, on, signature, start, end - start, line, digest))
+    return entries
+
+
+class SchemaIndex:
+    """The persisted index of one dump; use SchemaIndex.open()"""
+
+    def __init__(self, path, entries):
+        self.path = path
+        self.entries = entries
+        self.by_name = {}
+        for entry in entries:
+            self.by_name.setdefault((entry.kind, entry.name.lower()), []).append(entry)
+
+    @classmethod
+    def open(cls, path, rebuild=False):
+        """The index for `path`, loaded from its sidecar or (re)built and saved"""
+        stat = os.stat(path)
+        index_path = path + INDEX_SUFFIX
+        if not rebuild:
+            try:
+                with open(index_path) as f:
+                    saved = json.load(f)
+                if saved.get('version') == INDEX_VERSION and saved.get('size') == stat.st_size \
+                        and saved.get('mtime_ns') == stat.st_mtime_ns:
+                    return cls(path, [Entry(*entry) for entry in saved['entries']])
+            except (OSError, ValueError, TypeError):
+                pass
+        index = cls(path, scan(path))
+        index.save(stat)
+        return index
+
+    def save(self, stat=None):
+        stat = stat or os.stat(self.path)
+        temp_path = self.path + INDEX_SUFFIX + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'dump': os.path.basename(self.path), 'size': stat.st_size,
+                       'mtime_ns': stat.st_mtime_ns, 'entries': [list(entry) for entry in self.entries]},
+                      f, separators=(',', ':'))
+        os.replace(temp_path, self.path + INDEX_SUFFIX)
+
+    def find(self, kind, name):
+        """Every definition of an object, in file order (later ones replace earlier ones)"""
+        return self.by_name.get((kind.lower(), normalize_name(name.encode('utf-8')).lower()), [])
+
+    def ddl(self, entry):
+        """The statement text of an entry, read at its offset"""
+        with open(self.path, 'rb') as f:
+            return os.pread(f.fileno(), entry.length, entry.start).decode('utf-8', 'replace')
+
+    def objects(self):
+        """{(kind, name, on, signature): last definition}"""
+        return {(e.kind, e.name.lower(), e.on.lower(), e.signature): e for e in self.entries}
+
+
+def diff(old, new):
+    """(added, removed, changed) object keys between two indexes, compared by digest"""
+    before, after = old.objects(), new.objects()
+    added = sorted(after.keys() - before.keys())
+    removed = sorted(before.keys() - after.keys())
+    changed = sorted(key for key in before.keys() & after.keys() if before[key].digest != after[key].digest)
+    return added, removed, changed
+
+
+def _label(key):
+    kind, name, on, signature = key
+    text = f"{kind} {name}"
+    if signature or kind in ('function', 'procedure'):
+        text += f"({signature})"
+    return text + (f" ON {on}" if on else '')
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+    from collections import Counter
+
+    parser = argparse.ArgumentParser(description='Index and query CREATE statements in SQL dumps by byte offset')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_command = commands.add_parser('build', help='(re)build the index of each dump')
+    build_command.add_argument('dumps', nargs='+')
+    list_command = commands.add_parser('list', help='list indexed objects')
+    list_command.add_argument('dump')
+    list_command.add_argument('--kind')
+    show_command = commands.add_parser('show', help="print an object's DDL")
+    show_command.add_argument('dump')
+    show_command.add_argument('kind')
+    show_command.add_argument('name')
+    show_command.add_argument('--all', action='store_true', help='every definition, not just the last')
+    diff_command = commands.add_parser('diff', help='objects added, removed or changed between two dumps')
+    diff_command.add_argument('old')
+    diff_command.add_argument('new')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        for dump in args.dumps:
+            started = time.perf_counter()
+            index = SchemaIndex.open(dump, rebuild=True)
+            elapsed = time.perf_counter() - started
+            kinds = Counter(entry.kind for entry in index.entries)
+            print(f"✅ {dump}: {len(index.entries):,} statements indexed in {elapsed * 1000:.0f} ms "
+                  f"({', '.join(f'{count} {kind}' for kind, count in kinds.most_common())})")
+    elif args.command == 'list':
+        index = SchemaIndex.open(args.dump)
+        for entry in index.entries:
+            if args.kind is None or entry.kind == args.kind.lower():
+                print(f"{entry.line:>7}  {entry.start:>9}  {_label((entry.kind, entry.name, entry.on, entry.signature))}")
+    elif args.command == 'show':
+        index = SchemaIndex.open(args.dump)
+        found = index.find(args.kind, args.name)
+        if not found:
+            sys.exit(f"❌ No {args.kind.lower()} named {args.name} in {args.dump}")
+        for entry in found if args.all else found[-1:]:
+            print(f"-- {args.dump}:{entry.line} (bytes {entry.start}-{entry.start + entry.length})")
+            print(index.ddl(entry))
+    else:
+        old, new = SchemaIndex.open(args.old), SchemaIndex.open(args.new)
+        added, removed, changed = diff(old, new)
+        print(f"📊 {args.old} -> {args.new}: {len(added)} added, {len(removed)} removed, {len(changed)} changed")
+        for sign, keys in (('+', added), ('-', removed), ('~', changed)):
+            for key in keys:
+                print(f"  {sign} {_label(key)}")
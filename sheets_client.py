@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Google Sheets client factory for the platform's service account
+
+`build('sheets', 'v4', credentials=...)` on every run loads the full API
+discovery document and fetches a fresh access token before the first
+call. sheets_service() instead:
+
+- builds from sheets_discovery_v4.json, a static discovery document next to
+  this file trimmed to the methods the platform uses, so no discovery
+  request or 300 KB parse is needed
+- caches the access token on disk (mode 0600) until shortly before it
+  expires, so a new process reuses the last token instead of signing a JWT
+  and calling the token endpoint; the private key isn't even parsed until
+  a token has to be signed for
+- keeps one authorized httplib2 session per (key file, scopes) for the life
+  of the process, so every call after the first reuses its connection
+
+httplib2 sessions are not thread-safe; threads that call the API
+concurrently should each pass their own `http` to sheets_service().
+
+Usage:
+    python3 sheets_client.py --self-test                 # offline, against fake_sheets_server.py
+    python3 sheets_client.py --trim-discovery sheets.v4.json
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+
+import google_auth_httplib2
+import httplib2
+from google.auth import crypt
+from google.oauth2 import service_account
+from googleapiclient.discovery import build_from_document
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DISCOVERY_PATH = os.path.join(HERE, 'sheets_discovery_v4.json')
+SERVICE_ACCOUNT_PATH = "/mnt/q/Projects/ganger-platform/mcp-servers/google-sheets-mcp/service-account.json"
+SCOPES = (
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive.readonly',
+)
+TOKEN_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                               'ganger-platform')
+HTTP_TIMEOUT = 60
+
+# Methods kept in the bundled discovery document (resource path, method)
+DISCOVERY_METHODS = [
+    ('spreadsheets', 'get'),
+    ('spreadsheets.values', 'get'),
+    ('spreadsheets.values', 'batchGet'),
+    ('spreadsheets.values', 'update'),
+    ('spreadsheets.values', 'batchUpdate'),
+    ('spreadsheets.values', 'append'),
+]
+# Schemas the kept methods reference but whose structure the client never
+# needs (it doesn't validate responses); kept as bare objects
+OPAQUE_SCHEMAS = {'Spreadsheet'}
+
+_discovery = None
+_services = {}
+_lock = threading.Lock()
+
+
+def token_cache_path(info, scopes, cache_dir=TOKEN_CACHE_DIR):
+    """Cache file for one service account, token endpoint and scope set"""
+    key = '\n'.join([info['client_email'], info.get('token_uri', ''), *sorted(scopes)])
+    return os.path.join(cache_dir, f"sheets-token-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.json")
+
+
+class LazySigner(crypt.Signer):
+    """Signer that parses the service account's private key on first use"""
+
+    def __init__(self, info):
+        self._info = info
+        self._signer = None
+
+    @property
+    def key_id(self):
+        return self._info.get('private_key_id')
+
+    @property
+    def loaded(self):
+        return self._signer is not None
+
+    def sign(self, message):
+        if self._signer is None:
+            self._signer = crypt.RSASigner.from_service_account_info(self._info)
+        return self._signer.sign(message)
+
+
+class CachedTokenCredentials(service_account.Credentials):
+    """Service account credentials that persist each access token they obtain"""
+
+    token_cache = None
+
+    def load_cached_token(self):
+        """Adopt the cached token if it is still valid; returns whether it was"""
+        try:
+            with open(self.token_cache) as f:
+                cached = json.load(f)
+            self.token = cached['token']
+            self.expiry = datetime.fromisoformat(cached['expiry'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if not self.valid:
+            # `valid` allows for clock skew, so a token this close to expiry is refreshed instead
+            self.token = self.expiry = None
+            return False
+        return True
+
+    def refresh(self, request):
+        super().refresh(request)
+        if self.token_cache and self.expiry:
+            save_token(self.token_cache, self.token, self.expiry)
+
+
+def save_token(path, token, expiry):
+    """Write the token atomically, readable only by the current user"""
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.sheets-token-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'token': token, 'expiry': expiry.isoformat()}, f)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        # An unwritable cache only costs the next process a token request
+
+
+def load_credentials(service_account_path=SERVICE_ACCOUNT_PATH, scopes=SCOPES, cache_dir=TOKEN_CACHE_DIR):
+    """Credentials from a service account key file, primed from the token cache"""
+    with open(service_account_path) as f:
+        info = json.load(f)
+    missing = {'client_email', 'token_uri', 'private_key'} - set(info)
+    if missing:
+        raise ValueError(f"{service_account_path}: not a service account key file (missing {', '.join(sorted(missing))})")
+    credentials = CachedTokenCredentials(
+        LazySigner(info), info['client_email'], info['token_uri'], scopes=list(scopes),
+        project_id=info.get('project_id'), universe_domain=info.get('universe_domain', 'googleapis.com'))
+    credentials.token_cache = token_cache_path(info, scopes, cache_dir)
+    credentials.load_cached_token()
+    return credentials
+
+
+def discovery_document():
+    """The bundled Sheets v4 discovery document, parsed once per process"""
+    global _discovery
+    if _discovery is None:
+        with open(DISCOVERY_PATH) as f:
+            _discovery = json.load(f)
+    return _discovery
+
+
+def sheets_service(service_account_path=SERVICE_ACCOUNT_PATH, scopes=SCOPES, cache_dir=TOKEN_CACHE_DIR, http=None,
+                   api_endpoint=None):
+    """
+    Sheets v4 service for a service account, shared per (key file, scopes)
+
+    Pass `http` (an httplib2.Http) for a service with its own session, e.g.
+    one per thread; it isn't cached. `api_endpoint` replaces
+    https://sheets.googleapis.com/, e.g. with a fake_sheets_server.py URL.
+    """
+    key = (os.path.abspath(service_account_path), tuple(scopes), cache_dir, api_endpoint)
+    if http is None:
+        with _lock:
+            service = _services.get(key)
+            if service is not None:
+                return service
+    credentials = load_credentials(service_account_path, scopes, cache_dir)
+    authorized = google_auth_httplib2.AuthorizedHttp(credentials, http=http or httplib2.Http(timeout=HTTP_TIMEOUT))
+    client_options = {'api_endpoint': api_endpoint} if api_endpoint else None
+    service = build_from_document(discovery_document(), http=authorized, client_options=client_options)
+    if http is None:
+        with _lock:
+            service = _services.setdefault(key, service)
+    return service
+
+
+def service_credentials(service):
+    """The CachedTokenCredentials behind a service from sheets_service()"""
+    return service._http.credentials
+
+
+def clear_services():
+    """Drop the shared services (and their connections)"""
+    with _lock:
+        _services.clear()
+
+
+def trim_discovery(document, methods=DISCOVERY_METHODS, opaque=OPAQUE_SCHEMAS):
+    """A copy of a full discovery document with only `methods` and the schemas they reference"""
+    trimmed = {k: v for k, v in document.items() if k not in ('resources', 'schemas', 'icons')}
+    trimmed['resources'] = {}
+    for path, method in methods:
+        source, target = document, trimmed
+        for name in path.split('.'):
+            source = source['resources'][name]
+            target = target['resources'].setdefault(name, {})
+            target.setdefault('resources', {})
+        target.setdefault('methods', {})[method] = source['methods'][method]
+
+    def references(node):
+        if isinstance(node, dict):
+            for k, v in node.items():
+                if k == '$ref':
+                    yield v
+                else:
+                    yield from references(v)
+        elif isinstance(node, list):
+            for v in node:
+                yield from references(v)
+
+    schemas, pending = {}, list(references(trimmed['resources']))
+    while pending:
+        name = pending.pop()
+        if name in schemas:
+            continue
+        if name in opaque:
+            schemas[name] = {'id': name, 'type': 'object'}
+        else:
+            schemas[name] = document['schemas'][name]
+            pending.extend(references(schemas[name]))
+    trimmed['schemas'] = dict(sorted(schemas.items()))
+
+    def strip(node):
+        # Descriptions only feed generated docstrings
+        if isinstance(node, dict):
+            return {k: strip(v) for k, v in node.items() if k != 'description' or not isinstance(v, str)}
+        if isinstance(node, list):
+            return [strip(v) for v in node]
+        return node
+
+    trimmed = strip(trimmed)
+
+    def prune(node):
+        # Leaf resources carry an empty 'resources' from the walk above
+        for resource in node.get('resources', {}).values():
+            prune(resource)
+        if not node.get('resources'):
+            node.pop('resources', None)
+
+    for resource in trimmed['resources'].values():
+        prune(resource)
+    return trimmed
+
+
+def self_test():
+    """
+    Exercise the factory offline against fake_sheets_server.py's token
+    endpoint, with a temporary token cache. Returns a list of failures.
+    """
+    import time
+
+    from fake_sheets_server import DEFAULT_ID, FakeSheetsServer
+
+    failures = []
+
+    def check(condition, message):
+        print(f"{'✅' if condition else '❌'} {message}")
+        if not condition:
+            failures.append(message)
+
+    with FakeSheetsServer(rows=100) as server, tempfile.TemporaryDirectory() as cache_dir:
+        key_path, tokens = server.service_account_path, lambda: server.requests['token']
+        try:
+            started = time.perf_counter()
+            service = sheets_service(key_path, cache_dir=cache_dir, api_endpoint=server.url)
+            cold = time.perf_counter() - started
+            request = service.spreadsheets().values().batchGet(spreadsheetId=DEFAULT_ID, ranges=['A1:G5'])
+            check(request.uri.startswith(f'{server.url}v4/spreadsheets/{DEFAULT_ID}/values:batchGet?'),
+                  f"service built from the bundled document in {cold * 1000:.1f} ms")
+            check(sheets_service(key_path, cache_dir=cache_dir, api_endpoint=server.url) is service,
+                  "same service returned within the process")
+
+            credentials = service_credentials(service)
+            check(not credentials.valid and not tokens(), "no token requested before it is needed")
+            values = request.execute().get('valueRanges', [{}])[0].get('values', [])
+            check(tokens() == 1 and credentials.valid and len(values) == 5,
+                  "token fetched on the first call, which succeeds")
+            request.execute()
+            check(tokens() == 1, "token reused by the next call")
+            cache_path = credentials.token_cache
+            check(os.path.exists(cache_path) and os.stat(cache_path).st_mode & 0o077 == 0,
+                  "token cached on disk, readable by owner only")
+
+            # A new process: nothing shared in memory, token read from the cache
+            clear_services()
+            started = time.perf_counter()
+            warm = sheets_service(key_path, cache_dir=cache_dir, api_endpoint=server.url)
+            warm_seconds = time.perf_counter() - started
+            warm_credentials = service_credentials(warm)
+            check(warm_credentials.valid and tokens() == 1 and not warm_credentials.signer.loaded,
+                  f"warm start reused the cached token without loading the key in {warm_seconds * 1000:.1f} ms")
+
+            # An expired token is refreshed and the cache rewritten
+            save_token(cache_path, 'stale', datetime(2000, 1, 1))
+            clear_services()
+            stale = sheets_service(key_path, cache_dir=cache_dir, api_endpoint=server.url)
+            check(not service_credentials(stale).valid, "expired cached token ignored")
+            stale.spreadsheets().get(spreadsheetId=DEFAULT_ID).execute()
+            with open(cache_path) as f:
+                check(json.load(f)['token'] == service_credentials(stale).token and tokens() == 2,
+                      "refreshed token written back to the cache")
+        finally:
+            clear_services()
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Sheets client factory checks and discovery document tools')
+    parser.add_argument('--self-test', action='store_true', help='check token caching and session reuse offline')
+    parser.add_argument('--trim-discovery', metavar='FULL_DOCUMENT',
+                        help=f'rewrite {os.path.basename(DISCOVERY_PATH)} from a full sheets v4 discovery document')
+    args = parser.parse_args()
+
+    if args.trim_discovery:
+        with open(args.trim_discovery) as f:
+            trimmed = trim_discovery(json.load(f))
+        with open(DISCOVERY_PATH, 'w') as f:
+            json.dump(trimmed, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f"✅ {DISCOVERY_PATH}: {len(DISCOVERY_METHODS)} methods, {len(trimmed['schemas'])} schemas, "
+              f"revision {trimmed.get('revision')}")
+    elif args.self_test:
+        sys.exit(1 if self_test() else 0)
+    else:
+        parser.print_help()
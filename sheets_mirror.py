@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Incremental mirror of a Google Sheets spreadsheet into SQLite
+
+Scripts like fix-sheets-data.js re-read whole sheets to find what changed.
+SheetsMirror keeps a local copy instead, with a hash per row and per block
+of `block_rows` rows, and each sync does the least work it can:
+
+- Drive's file version is checked first (one small request); an unchanged
+  spreadsheet costs nothing more
+- otherwise every sheet is read through SheetsReader, in batchGet requests
+  whose row windows are the mirror's blocks, and each block's hash is
+  compared as it streams in; unchanged blocks are skipped without touching
+  the database
+- in a changed block only rows whose hash differs are upserted, and rows
+  that became empty are deleted, all in one transaction
+
+The Sheets API can't say which blocks changed without reading them, so a
+changed spreadsheet is still downloaded in full; the savings there are in
+the writes. Rows are stored as JSON arrays of cell values, keyed by the
+sheet's id so renaming a sheet doesn't re-mirror it.
+
+Usage:
+    python3 sheets_mirror.py sync 1AVWbNZg6ozBIVk0D-0EWaHk7xn3LxovGqzBKjgYGq8k [--db sheets_mirror.db]
+    python3 sheets_mirror.py rows 1AVWbNZg6ozBIVk0D-0EWaHk7xn3LxovGqzBKjgYGq8k Sheet1 [--limit 20]
+    python3 sheets_mirror.py benchmark [--rows 50000] [--latency 40] [--edits 25]
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+from sheets_reader import SheetsReader, quote_sheet
+
+DEFAULT_DB = 'sheets_mirror.db'
+BLOCK_ROWS = 1000
+DRIVE_ENDPOINT = 'https://www.googleapis.com/'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spreadsheets (
+    spreadsheet_id TEXT PRIMARY KEY,
+    title TEXT,
+    version TEXT,
+    modified_time TEXT,
+    synced_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sheets (
+    spreadsheet_id TEXT NOT NULL,
+    sheet_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    sheet_index INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    column_count INTEGER NOT NULL,
+    PRIMARY KEY (spreadsheet_id, sheet_id)
+);
+
+CREATE TABLE IF NOT EXISTS blocks (
+    spreadsheet_id TEXT NOT NULL,
+    sheet_id INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    hash BLOB NOT NULL,
+    PRIMARY KEY (spreadsheet_id, sheet_id, block)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rows (
+    spreadsheet_id TEXT NOT NULL,
+    sheet_id INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    hash BLOB NOT NULL,
+    cells TEXT NOT NULL,
+    PRIMARY KEY (spreadsheet_id, sheet_id, row)
+) WITHOUT ROWID;
+"""
+
+SyncResult = namedtuple('SyncResult', 'skipped requests blocks blocks_changed rows_upserted rows_deleted seconds')
+
+
+def row_hash(cells):
+    return hashlib.blake2b(json.dumps(cells, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                           digest_size=16).digest()
+
+
+def block_hash(rows):
+    """Hash of a block's non-empty (row number, row hash) pairs; an empty block hashes to b''"""
+    if not rows:
+        return b''
+    digest = hashlib.blake2b(digest_size=16)
+    for row, hashed in rows:
+        digest.update(row.to_bytes(4, 'big'))
+        digest.update(hashed)
+    return digest.digest()
+
+
+def connect(db_path=DEFAULT_DB):
+    connection = sqlite3.connect(db_path)
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class SheetsMirror:
+    """
+    Mirrors one spreadsheet into a SQLite database
+
+    `service` is a Sheets v4 service, e.g. sheets_client.sheets_service();
+    the Drive version check goes through the same authorized session.
+    """
+
+    def __init__(self, service, spreadsheet_id, db_path=DEFAULT_DB, block_rows=BLOCK_ROWS,
+                 drive_endpoint=DRIVE_ENDPOINT):
+        self.service = service
+        self.spreadsheet_id = spreadsheet_id
+        self.db = connect(db_path)
+        self.block_rows = block_rows
+        self.drive_endpoint = drive_endpoint
+
+    def close(self):
+        self.db.close()
+
+    def drive_version(self):
+        """(version, modifiedTime) from Drive, or (None, None) if Drive can't be asked"""
+        url = (f"{self.drive_endpoint}drive/v3/files/{self.spreadsheet_id}"
+               f"?fields=version%2CmodifiedTime&supportsAllDrives=true")
+        response, content = self.service._http.request(url, 'GET')
+        if response.status != 200:
+            # Without drive.readonly, or with the Drive API disabled, every sync reads the sheets
+            return None, None
+        file = json.loads(content)
+        return file.get('version'), file.get('modifiedTime')
+
+    def sync(self, force=False):
+        """Bring the mirror up to date; returns a SyncResult"""
+        started = time.perf_counter()
+        version, modified_time = self.drive_version()
+        requests = 1
+        stored = self.db.execute('SELECT version FROM spreadsheets WHERE spreadsheet_id = ?',
+                                 (self.spreadsheet_id,)).fetchone()
+        if not force and version is not None and stored is not None and stored[0] == version:
+            return SyncResult(True, requests, 0, 0, 0, 0, time.perf_counter() - started)
+
+        reader = SheetsReader(self.service, self.spreadsheet_id, page_rows=self.block_rows)
+        metadata = reader.metadata()
+        sheets = {}
+        for entry in metadata.get('sheets', []):
+            properties = entry['properties']
+            if properties.get('sheetType', 'GRID') == 'GRID':
+                sheets[quote_sheet(properties['title'])] = properties
+
+        stored_blocks = {}
+        for sheet_id, block, hashed in self.db.execute(
+                'SELECT sheet_id, block, hash FROM blocks WHERE spreadsheet_id = ?', (self.spreadsheet_id,)):
+            stored_blocks[sheet_id, block] = hashed
+
+        counts = {'blocks': 0, 'changed': 0, 'upserted': 0, 'deleted': 0}
+        seen = set()
+        with self.db:
+            for sheet_range, first_row, rows in reader.stream(list(sheets)):
+                sheet_id = sheets[sheet_range]['sheetId']
+                block = (first_row - 1) // self.block_rows
+                seen.add((sheet_id, block))
+                self._apply_block(sheet_id, block, first_row, rows, stored_blocks.get((sheet_id, block)), counts)
+            # Blocks that came back empty, and sheets that were deleted
+            for sheet_id, block in stored_blocks.keys() - seen:
+                self._apply_block(sheet_id, block, block * self.block_rows + 1, [], stored_blocks[sheet_id, block],
+                                  counts)
+            self._save_metadata(metadata, sheets, version, modified_time)
+        return SyncResult(False, requests + reader.requests, counts['blocks'], counts['changed'],
+                          counts['upserted'], counts['deleted'], time.perf_counter() - started)
+
+    def _apply_block(self, sheet_id, block, first_row, rows, stored_hash, counts):
+        """Write one block's differences; `rows` start at sheet row `first_row`"""
+        hashed = [(first_row + i, row_hash(cells), cells) for i, cells in enumerate(rows) if cells]
+        new_hash = block_hash([(row, digest) for row, digest, _ in hashed])
+        counts['blocks'] += 1
+        if new_hash == stored_hash:
+            return
+        counts['changed'] += 1
+        low = block * self.block_rows + 1
+        high = low + self.block_rows - 1
+        existing = dict(self.db.execute(
+            'SELECT row, hash FROM rows WHERE spreadsheet_id = ? AND sheet_id = ? AND row BETWEEN ? AND ?',
+            (self.spreadsheet_id, sheet_id, low, high)))
+        upserts = [(self.spreadsheet_id, sheet_id, row, digest, json.dumps(cells, ensure_ascii=False))
+                   for row, digest, cells in hashed if existing.get(row) != digest]
+        deletes = [(self.spreadsheet_id, sheet_id, row) for row in existing.keys() - {row for row, _, _ in hashed}]
+        self.db.executemany(
+            'INSERT INTO rows (spreadsheet_id, sheet_id, row, hash, cells) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (spreadsheet_id, sheet_id, row) DO UPDATE SET hash = excluded.hash, cells = excluded.cells',
+            upserts)
+        self.db.executemany('DELETE FROM rows WHERE spreadsheet_id = ? AND sheet_id = ? AND row = ?', deletes)
+        if new_hash:
+            self.db.execute('INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?)',
+                            (self.spreadsheet_id, sheet_id, block, new_hash))
+        else:
+            self.db.execute('DELETE FROM blocks WHERE spreadsheet_id = ? AND sheet_id = ? AND block = ?',
+                            (self.spreadsheet_id, sheet_id, block))
+        counts['upserted'] += len(upserts)
+        counts['deleted'] += len(deletes)
+
+    def _save_metadata(self, metadata, sheets, version, modified_time):
+        self.db.execute('DELETE FROM sheets WHERE spreadsheet_id = ?', (self.spreadsheet_id,))
+        self.db.executemany('INSERT INTO sheets VALUES (?, ?, ?, ?, ?, ?)', [
+            (self.spreadsheet_id, p['sheetId'], p['title'], p.get('index', 0),
+             p.get('gridProperties', {}).get('rowCount', 0), p.get('gridProperties', {}).get('columnCount', 0))
+            for p in sheets.values()])
+        self.db.execute('INSERT OR REPLACE INTO spreadsheets VALUES (?, ?, ?, ?, ?)', (
+            self.spreadsheet_id, metadata.get('properties', {}).get('title'), version, modified_time,
+            datetime.now(dt_timezone.utc).isoformat(timespec='seconds')))
+
+    def rows(self, sheet_title):
+        """[(row number, cells)] of a mirrored sheet, in row order"""
+        return [(row, json.loads(cells)) for row, cells in self.db.execute(
+            'SELECT r.row, r.cells FROM rows r JOIN sheets s USING (spreadsheet_id, sheet_id) '
+            'WHERE r.spreadsheet_id = ? AND s.title = ? ORDER BY r.row', (self.spreadsheet_id, sheet_title))]
+
+
+def benchmark(rows, latency, edits, block_rows=BLOCK_ROWS):
+    """Full, unchanged and lightly edited syncs against the fake server; returns whether the mirror matched"""
+    import os
+    import random
+    import tempfile
+
+    from fake_sheets_server import DEFAULT_ID, FakeSheetsServer
+    from sheets_client import clear_services, sheets_service
+
+    def report(label, result):
+        if result.skipped:
+            print(f"  {label:28} {result.requests:3} requests {result.seconds:7.2f} s  (version unchanged)")
+        else:
+            print(f"  {label:28} {result.requests:3} requests {result.seconds:7.2f} s  "
+                  f"{result.blocks_changed}/{result.blocks} blocks changed, "
+                  f"{result.rows_upserted:,} upserted, {result.rows_deleted:,} deleted")
+
+    rng = random.Random(5)
+    with FakeSheetsServer(rows=rows, latency=latency) as server, tempfile.TemporaryDirectory() as workdir:
+        spreadsheet = server.spreadsheets[DEFAULT_ID]
+        service = sheets_service(server.service_account_path, cache_dir=workdir, api_endpoint=server.url)
+        mirror = SheetsMirror(service, DEFAULT_ID, os.path.join(workdir, 'mirror.db'), block_rows=block_rows,
+                              drive_endpoint=server.url)
+        print(f"{rows:,} rows, {block_rows:,}-row blocks, {latency * 1000:g} ms per response")
+        report('first sync', mirror.sync())
+        report('no changes', mirror.sync())
+        for _ in range(edits):
+            spreadsheet.set_values('Inventory', rng.randrange(2, rows + 2), 5, [[str(rng.randrange(0, 500))]])
+        report(f'{edits} edited cells', mirror.sync())
+        spreadsheet.set_values('Inventory', 3, 0, [[''] * 8])  # clear a row
+        spreadsheet.set_values('Vendors', 6, 0, [['Patterson Dental']])  # append a row
+        report('row cleared, row appended', mirror.sync())
+        report('forced, no changes', mirror.sync(force=True))
+
+        expected = [(i + 1, row) for i, row in enumerate(spreadsheet.values('Inventory').get('values', [])) if row]
+        matched = mirror.rows('Inventory') == expected
+        mirror.close()
+    clear_services()
+    return matched
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from sheets_client import SERVICE_ACCOUNT_PATH, sheets_service
+
+    parser = argparse.ArgumentParser(description='Mirror a Google Sheets spreadsheet into SQLite')
+    commands = parser.add_subparsers(dest='command', required=True)
+    sync_command = commands.add_parser('sync', help='bring the local mirror up to date')
+    sync_command.add_argument('spreadsheet_id')
+    sync_command.add_argument('--db', default=DEFAULT_DB)
+    sync_command.add_argument('--service-account', default=SERVICE_ACCOUNT_PATH)
+    sync_command.add_argument('--block-rows', type=int, default=BLOCK_ROWS)
+    sync_command.add_argument('--force', action='store_true', help='read the sheets even if Drive reports no change')
+    rows_command = commands.add_parser('rows', help='print mirrored rows of a sheet')
+    rows_command.add_argument('spreadsheet_id')
+    rows_command.add_argument('sheet')
+    rows_command.add_argument('--db', default=DEFAULT_DB)
+    rows_command.add_argument('--limit', type=int, default=20)
+    bench_command = commands.add_parser('benchmark', help='time syncs against fake_sheets_server.py')
+    bench_command.add_argument('--rows', type=int, default=50000)
+    bench_command.add_argument('--latency', type=float, default=40.0, help='milliseconds per fake response')
+    bench_command.add_argument('--edits', type=int, default=25)
+    bench_command.add_argument('--block-rows', type=int, default=BLOCK_ROWS)
+    args = parser.parse_args()
+
+    if args.command == 'sync':
+        service = sheets_service(args.service_account)
+        mirror = SheetsMirror(service, args.spreadsheet_id, args.db, block_rows=args.block_rows)
+        result = mirror.sync(force=args.force)
+        if result.skipped:
+            print(f"✅ {args.spreadsheet_id} unchanged since the last sync ({result.seconds:.2f} s)")
+        else:
+            print(f"✅ {args.spreadsheet_id} synced in {result.seconds:.2f} s with {result.requests} requests: "
+                  f"{result.blocks_changed}/{result.blocks} blocks changed, {result.rows_upserted:,} rows upserted, "
+                  f"{result.rows_deleted:,} deleted")
+        mirror.close()
+    elif args.command == 'rows':
+        connection = connect(args.db)
+        for row, cells in connection.execute(
+                'SELECT r.row, r.cells FROM rows r JOIN sheets s USING (spreadsheet_id, sheet_id) '
+                'WHERE r.spreadsheet_id = ? AND s.title = ? ORDER BY r.row LIMIT ?',
+                (args.spreadsheet_id, args.sheet, args.limit)):
+            print(f"{row:>7}  {' | '.join(json.loads(cells))}")
+        connection.close()
+    else:
+        if not benchmark(args.rows, args.latency / 1000, args.edits, args.block_rows):
+            sys.exit("❌ mirror differs from the fake spreadsheet")
+        print("✅ mirror matches the fake spreadsheet")
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Batched, paged reads of many Sheets ranges
+
+Reading ranges one `values().get` at a time costs a round trip each.
+SheetsReader plans a whole set of ranges up front instead:
+
+- duplicate ranges are read once, and ranges on the same sheet and columns
+  whose rows overlap or touch are merged into one span
+- spans longer than `page_rows` (or open-ended ones like 'Sheet1!A2:G',
+  bounded by the sheet's grid size) are split into row windows
+- windows are packed into `values.batchGet` requests of at most
+  `max_ranges` ranges and `max_cells` cells
+
+Requests are issued one at a time as the caller consumes stream(), so the
+rows of each response are handed over before the next request is sent and
+a large read never has to be held in memory.
+
+Usage:
+    python3 sheets_reader.py --self-test                 # against fake_sheets_server.py
+    python3 sheets_reader.py --benchmark [--ranges 200] [--rows 20000] [--latency 40]
+"""
+
+import re
+from collections import namedtuple
+
+PAGE_ROWS = 5000
+MAX_RANGES = 100
+MAX_CELLS = 100_000
+NUM_RETRIES = 3
+
+# Columns stop at ZZZ, so longer runs of letters are a sheet name
+_CELL = re.compile(r'([A-Za-z]{0,3})(\d*)')
+_CELLS = re.compile(r'[A-Za-z]{0,3}\d*(:[A-Za-z]{0,3}\d*)?')
+
+# Sheet name (None for the first sheet), 0-based first/last column and
+# 1-based first/last row; a None last column or row runs to the grid's edge
+Span = namedtuple('Span', 'sheet first_col last_col first_row last_row')
+# Rows of a requested range, the first at sheet row `first_row`
+Block = namedtuple('Block', 'range first_row rows')
+
+
+class RangeError(ValueError):
+    """A range isn't valid A1 notation"""
+
+
+def column_index(letters):
+    """'A' -> 0, 'Z' -> 25, 'AA' -> 26"""
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def column_letters(index):
+    """0 -> 'A', 26 -> 'AA'"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def quote_sheet(sheet):
+    if re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', sheet) and not _CELLS.fullmatch(sheet):
+        return sheet
+    return "'" + sheet.replace("'", "''") + "'"
+
+
+def parse_range(a1):
+    """Span for 'A1:G5', 'Sheet2!A:C', "'My Sheet'!B2:D", '2:10' or 'Sheet1'"""
+    sheet, cells = None, a1
+    if a1.startswith("'"):
+        end = 1
+        while True:
+            end = a1.find("'", end)
+            if end < 0:
+                raise RangeError(f"Unterminated sheet name in {a1!r}")
+            if a1[end + 1:end + 2] != "'":
+                break
+            end += 2
+        sheet = a1[1:end].replace("''", "'")
+        cells = a1[end + 1:]
+        if cells and not cells.startswith('!'):
+            raise RangeError(f"Expected '!' after the sheet name in {a1!r}")
+        cells = cells[1:]
+    elif '!' in a1:
+        sheet, cells = a1.split('!', 1)
+    elif not _CELLS.fullmatch(a1):
+        sheet, cells = a1, ''  # a bare sheet name
+    if not cells:
+        return Span(sheet, 0, None, 1, None)
+
+    start, colon, end = cells.partition(':')
+    first, last = _CELL.fullmatch(start), _CELL.fullmatch(end if colon else start)
+    if not first or not last or not start or (colon and not end) \
+            or (first.group(1) == '') != (last.group(1) == ''):
+        raise RangeError(f"Not an A1 range: {a1!r}")
+    first_col = column_index(first.group(1)) if first.group(1) else 0
+    last_col = column_index(last.group(1)) if last.group(1) else None
+    first_row = int(first.group(2)) if first.group(2) else 1
+    last_row = int(last.group(2)) if last.group(2) else None
+    if first_row < 1 or (last_row is not None and last_row < first_row) \
+            or (last_col is not None and last_col < first_col):
+        raise RangeError(f"Empty or reversed range: {a1!r}")
+    return Span(sheet, first_col, last_col, first_row, last_row)
+
+
+def format_range(span):
+    """A1 text for a span with both ends bounded"""
+    cells = (f"{column_letters(span.first_col)}{span.first_row}:"
+             f"{column_letters(span.last_col)}{span.last_row}")
+    return cells if span.sheet is None else f"{quote_sheet(span.sheet)}!{cells}"
+
+
+def merge_spans(spans):
+    """
+    [(merged span, [indexes of the spans it covers])] for spans on the same
+    sheet and columns whose rows overlap or touch; all spans are bounded
+    """
+    merged = []
+    by_columns = {}
+    for i, span in enumerate(spans):
+        by_columns.setdefault((span.sheet, span.first_col, span.last_col), []).append(i)
+    for indexes in by_columns.values():
+        indexes.sort(key=lambda i: spans[i].first_row)
+        current, members = None, []
+        for i in indexes:
+            span = spans[i]
+            if current is not None and span.first_row <= current.last_row + 1:
+                current = current._replace(last_row=max(current.last_row, span.last_row))
+                members.append(i)
+                continue
+            if current is not None:
+                merged.append((current, members))
+            current, members = span, [i]
+        merged.append((current, members))
+    return merged
+
+
+class SheetsReader:
+    """
+    Reads ranges of one spreadsheet through a Sheets v4 service
+
+    `service` is any googleapiclient Sheets service, e.g. from
+    sheets_client.sheets_service(). Options besides the request limits
+    are passed to every batchGet (valueRenderOption, dateTimeRenderOption).
+    """
+
+    def __init__(self, service, spreadsheet_id, page_rows=PAGE_ROWS, max_ranges=MAX_RANGES,
+                 max_cells=MAX_CELLS, **options):
+        self.service = service
+        self.spreadsheet_id = spreadsheet_id
+        self.page_rows = page_rows
+        self.max_ranges = max_ranges
+        self.max_cells = max_cells
+        self.options = options
+        self._metadata = None
+        self.requests = 0
+
+    def metadata(self):
+        """Title and each sheet's title and grid size, fetched once"""
+        if self._metadata is None:
+            self.requests += 1
+            self._metadata = self.service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id,
+                fields='properties.title,sheets.properties(sheetId,title,index,gridProperties)',
+            ).execute(num_retries=NUM_RETRIES)
+        return self._metadata
+
+    def _grid(self, sheet):
+        """(rows, columns) of a sheet's grid; None is the first sheet"""
+        sheets = self.metadata().get('sheets', [])
+        for entry in sheets:
+            properties = entry['properties']
+            if properties['title'] == sheet or (sheet is None and properties.get('index', 0) == 0):
+                grid = properties.get('gridProperties', {})
+                return grid.get('rowCount', 1000), grid.get('columnCount', 26)
+        raise RangeError(f"Unable to parse range: no sheet named {sheet!r}")
+
+    def _bound(self, span):
+        """Span with open ends replaced by the sheet's grid edges (may be empty)"""
+        if span.last_row is not None and span.last_col is not None:
+            return span
+        rows, columns = self._grid(span.sheet)
+        return span._replace(last_col=columns - 1 if span.last_col is None else span.last_col,
+                             last_row=rows if span.last_row is None else span.last_row)
+
+    def plan(self, ranges):
+        """
+        [[(window span, [(range, requested span)])]]: the windows of each
+        batchGet request, with the requested ranges each window overlaps
+        """
+        requested = list(dict.fromkeys(ranges))
+        spans = [self._bound(parse_range(a1)) for a1 in requested]
+        readable = [i for i, span in enumerate(spans)
+                    if span.first_row <= span.last_row and span.first_col <= span.last_col]
+        windows = []
+        for merged, members in merge_spans([spans[i] for i in readable]):
+            members = [(requested[readable[m]], spans[readable[m]]) for m in members]
+            for first in range(merged.first_row, merged.last_row + 1, self.page_rows):
+                window = merged._replace(first_row=first, last_row=min(first + self.page_rows - 1, merged.last_row))
+                windows.append((window, [(a1, span) for a1, span in members
+                                         if span.first_row <= window.last_row and span.last_row >= window.first_row]))
+        # Requests in sheet order: a range's windows stay in row order
+        windows.sort(key=lambda w: (w[0].sheet or '', w[0].first_col, w[0].first_row))
+
+        batches, batch, cells = [], [], 0
+        for window, members in windows:
+            window_cells = (window.last_row - window.first_row + 1) * (window.last_col - window.first_col + 1)
+            if batch and (len(batch) == self.max_ranges or cells + window_cells > self.max_cells):
+                batches.append(batch)
+                batch, cells = [], 0
+            batch.append((window, members))
+            cells += window_cells
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def stream(self, ranges):
+        """
+        Blocks of rows for each of `ranges` as the responses arrive
+
+        A range's blocks come in row order, but blocks of different ranges
+        interleave. Rows are lists of cell values with trailing empty cells
+        omitted, and the trailing empty rows of a window are omitted too,
+        as the API returns them.
+        """
+        for batch in self.plan(ranges):
+            self.requests += 1
+            response = self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id, ranges=[format_range(window) for window, _ in batch],
+                majorDimension='ROWS', **self.options,
+            ).execute(num_retries=NUM_RETRIES)
+            for (window, members), value_range in zip(batch, response.get('valueRanges', [])):
+                values = value_range.get('values', [])
+                for a1, span in members:
+                    first = max(span.first_row, window.first_row)
+                    last = min(span.last_row, window.last_row, window.first_row + len(values) - 1)
+                    # A range ending inside the window has its own trailing empty rows to drop
+                    while last >= first and not values[last - window.first_row]:
+                        last -= 1
+                    if first > last:
+                        continue
+                    yield Block(a1, first, values[first - window.first_row:last - window.first_row + 1])
+
+    def rows(self, a1):
+        """Every row of one range, paged; empty rows before and between pages are filled in as []"""
+        next_row = parse_range(a1).first_row
+        for block in self.stream([a1]):
+            yield from ([] for _ in range(block.first_row - next_row))
+            yield from block.rows
+            next_row = block.first_row + len(block.rows)
+
+    def read(self, ranges):
+        """{range: rows} for every range, as one values().get per range would return them"""
+        result = {a1: [] for a1 in ranges}
+        # Rows are counted from the range's own first row, so empty rows at
+        # its top are kept even when the first window holding data is later
+        first_rows = {a1: parse_range(a1).first_row for a1 in result}
+        for block in self.stream(ranges):
+            rows = result[block.range]
+            rows.extend([] for _ in range(block.first_row - first_rows[block.range] - len(rows)))
+            rows.extend(block.rows)
+        return result
+
+
+def _per_range(service, spreadsheet_id, ranges):
+    """{range: rows} the unbatched way: one values().get per range"""
+    result = {}
+    for a1 in ranges:
+        response = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=a1).execute()
+        result[a1] = response.get('values', [])
+    return result
+
+
+def self_test():
+    """Compare batched reads with per-range reads against the fake server; returns failures"""
+    import tempfile
+
+    from fake_sheets_server import DEFAULT_ID, FakeSheetsServer, Spreadsheet
+    from sheets_client import clear_services, sheets_service
+
+    blanks = [['a', 'b'], [], ['c'], [], [], ['d', '', 'e'], [], []] * 3
+    failures = []
+
+    def check(condition, message):
+        print(f"{'✅' if condition else '❌'} {message}")
+        if not condition:
+            failures.append(message)
+
+    spreadsheets = [Spreadsheet('blanks', 'Blank rows', [("Tom's Sheet", blanks), ('Sheet2', [['x']])])]
+    with FakeSheetsServer(rows=2500) as server, tempfile.TemporaryDirectory() as cache_dir:
+        server.spreadsheets.update((s.spreadsheet_id, s) for s in spreadsheets)
+        service = sheets_service(server.service_account_path, cache_dir=cache_dir, api_endpoint=server.url)
+        cases = [
+            (DEFAULT_ID, ['A1:G5'], {}),
+            (DEFAULT_ID, ['Inventory!A1:H10', 'Inventory!A5:H20', 'Inventory!A21:H30', 'Inventory!A1:H10',
+                          'Inventory!C100:D110', 'Vendors!A:A'], {}),
+            (DEFAULT_ID, ['Inventory!A2:H', 'Inventory!B2300:B2400', 'Inventory!2:3', 'Vendors'], {'page_rows': 700}),
+            (DEFAULT_ID, [f"Inventory!A{r}:H{r + 40}" for r in range(2, 2400, 30)], {}),
+            (DEFAULT_ID, [f"Inventory!A{r}:H{r + 20}" for r in range(2, 2400, 50)], {'max_ranges': 7}),
+            ('blanks', ["'Tom''s Sheet'!A1:C24", "'Tom''s Sheet'!B:B", 'Sheet2!A1:Z999'], {'page_rows': 3}),
+            ('blanks', ["'Tom''s Sheet'!A4:C24", "'Tom''s Sheet'!B7:B"], {'page_rows': 2}),
+        ]
+        for spreadsheet_id, ranges, options in cases:
+            reader = SheetsReader(service, spreadsheet_id, **options)
+            batched = reader.read(ranges)
+            expected = _per_range(service, spreadsheet_id, list(dict.fromkeys(ranges)))
+            check(batched == expected, f"{len(ranges)} ranges of {spreadsheet_id} in {reader.requests} requests "
+                                       f"match per-range reads{f' {options}' if options else ''}")
+
+        reader = SheetsReader(service, DEFAULT_ID, page_rows=500, max_ranges=2)
+        streamed = list(reader.rows('Inventory!A1:H2501'))
+        check(streamed == _per_range(service, DEFAULT_ID, ['Inventory!A1:H2501'])['Inventory!A1:H2501'],
+              f"rows() streams {len(streamed):,} rows in {reader.requests} requests")
+        reader = SheetsReader(service, 'blanks', page_rows=2)
+        streamed = list(reader.rows("'Tom''s Sheet'!A4:C24"))
+        check(streamed == _per_range(service, 'blanks', ["'Tom''s Sheet'!A4:C24"])["'Tom''s Sheet'!A4:C24"],
+              "rows() keeps the empty rows at the top of a range")
+        try:
+            SheetsReader(service, DEFAULT_ID).read(['Inventory!A1:B2:C3'])
+            check(False, "malformed range rejected")
+        except RangeError:
+            check(True, "malformed range rejected")
+    clear_services()
+    return failures
+
+
+def benchmark(ranges, rows, latency, page_rows=PAGE_ROWS):
+    """Time per-range reads against SheetsReader on a fake server with `latency` seconds per response"""
+    import random
+    import tempfile
+    import time
+
+    from fake_sheets_server import DEFAULT_ID, FakeSheetsServer
+    from sheets_client import clear_services, sheets_service
+
+    rng = random.Random(11)
+    wanted = ['Inventory!A1:H1', f"Inventory!A2:H{rows + 1}"]
+    while len(wanted) < ranges:
+        first = rng.randrange(2, rows)
+        wanted.append(f"Inventory!{rng.choice(['A', 'B', 'F'])}{first}:H{first + rng.randrange(1, 200)}")
+
+    with FakeSheetsServer(rows=rows, latency=latency) as server, tempfile.TemporaryDirectory() as cache_dir:
+        service = sheets_service(server.service_account_path, cache_dir=cache_dir, api_endpoint=server.url)
+        service.spreadsheets().get(spreadsheetId=DEFAULT_ID, fields='properties.title').execute()  # token, connection
+
+        started = time.perf_counter()
+        expected = _per_range(service, DEFAULT_ID, wanted)
+        per_range = time.perf_counter() - started
+
+        reader = SheetsReader(service, DEFAULT_ID, page_rows=page_rows)
+        started = time.perf_counter()
+        batched = reader.read(wanted)
+        batched_seconds = time.perf_counter() - started
+    clear_services()
+
+    cells = sum(len(row) for values in expected.values() for row in values)
+    print(f"{len(wanted)} ranges, {cells:,} cells, {latency * 1000:g} ms per response")
+    print(f"  values.get per range: {len(wanted):5} requests {per_range:7.2f} s")
+    print(f"  SheetsReader:         {reader.requests:5} requests {batched_seconds:7.2f} s "
+          f"({per_range / batched_seconds:.1f}x)")
+    return batched == expected
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Check and benchmark batched Sheets range reads')
+    parser.add_argument('--self-test', action='store_true', help='compare with per-range reads on the fake server')
+    parser.add_argument('--benchmark', action='store_true')
+    parser.add_argument('--ranges', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=40.0, help='milliseconds per fake response')
+    parser.add_argument('--page-rows', type=int, default=PAGE_ROWS)
+    args = parser.parse_args()
+
+    if args.self_test:
+        sys.exit(1 if self_test() else 0)
+    elif args.benchmark:
+        if not benchmark(args.ranges, args.rows, args.latency / 1000, args.page_rows):
+            sys.exit("❌ batched reads differ from per-range reads")
+    else:
+        parser.print_help()
@@ -4,36 +4,30 @@ Test script to verify Google Sheets MCP functionality
 """
 import os
 import json
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from sheets_client import SERVICE_ACCOUNT_PATH, service_credentials, sheets_service
+from sheets_reader import SheetsReader
 
 def test_service_account():
     """Test if service account can access Google Sheets API"""
     try:
         # Load service account credentials
-        service_account_path = "/mnt/q/Projects/ganger-platform/mcp-servers/google-sheets-mcp/service-account.json"
+        service_account_path = SERVICE_ACCOUNT_PATH
         
         if not os.path.exists(service_account_path):
             print(f"❌ Service account file not found: {service_account_path}")
             return False
             
-        # Load credentials
-        credentials = service_account.Credentials.from_service_account_file(
-            service_account_path,
-            scopes=[
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/drive.readonly'
-            ]
-        )
-        
-        # Test Sheets API access
-        service = build('sheets', 'v4', credentials=credentials)
+        # Test Sheets API access (bundled discovery document, cached token)
+        service = sheets_service(service_account_path)
+        credentials = service_credentials(service)
         
         # Try to access the specific spreadsheet
         spreadsheet_id = '1AVWbNZg6ozBIVk0D-0EWaHk7xn3LxovGqzBKjgYGq8k'
         
-        # Test reading spreadsheet info
-        result = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+        reader = SheetsReader(service, spreadsheet_id)
+        
+        # Test reading spreadsheet info (title and sheet sizes only)
+        result = reader.metadata()
         
         print(f"✅ Successfully connected to Google Sheets API")
         print(f"✅ Spreadsheet title: {result['properties']['title']}")
@@ -41,12 +35,7 @@ def test_service_account():
         
         # Test reading data
         range_name = 'A1:G5'  # Test reading first few cells
-        values_result = service.spreadsheets().values().get(
-            spreadsheetId=spreadsheet_id, 
-            range=range_name
-        ).execute()
-        
-        values = values_result.get('values', [])
+        values = reader.read([range_name])[range_name]
         print(f"✅ Successfully read {len(values)} rows from spreadsheet")
         
         if values: